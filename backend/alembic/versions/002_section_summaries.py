@@ -0,0 +1,26 @@
+"""Add cached section summaries
+
+Revision ID: 002
+Revises: 001
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '002'
+down_revision = '001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Summaries are filled lazily the next time a section is used as context
+    op.add_column('sections', sa.Column('summary', sa.Text(), nullable=True))
+    op.add_column('sections', sa.Column('summary_hash', sa.String(length=64), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('sections', 'summary_hash')
+    op.drop_column('sections', 'summary')
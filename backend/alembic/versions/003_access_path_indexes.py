@@ -0,0 +1,36 @@
+"""Add composite indexes for hot access paths
+
+Revision ID: 003
+Revises: 002
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '003'
+down_revision = '002'
+branch_labels = None
+depends_on = None
+
+# (index name, table, columns) -- kept in sync with the models' __table_args__
+INDEXES = [
+    ('ix_projects_user_id_updated_at', 'projects', ['user_id', 'updated_at', 'id']),
+    ('ix_sections_project_id_order_index', 'sections', ['project_id', 'order_index']),
+    ('ix_revisions_section_id_created_at', 'revisions', ['section_id', 'created_at']),
+    ('ix_revisions_project_id_created_at', 'revisions', ['project_id', 'created_at']),
+    ('ix_comments_section_id_created_at', 'comments', ['section_id', 'created_at']),
+    ('ix_comments_project_id_created_at', 'comments', ['project_id', 'created_at']),
+    ('ix_feedbacks_section_id_created_at', 'feedbacks', ['section_id', 'created_at']),
+    ('ix_feedbacks_project_id_created_at', 'feedbacks', ['project_id', 'created_at']),
+]
+
+
+def upgrade() -> None:
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns)
+
+
+def downgrade() -> None:
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
@@ -0,0 +1,158 @@
+"""Store revisions as periodic snapshots plus deltas
+
+Revision ID: 004
+Revises: 003
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+import json
+import re
+from difflib import SequenceMatcher
+from itertools import groupby
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '004'
+down_revision = '003'
+branch_labels = None
+depends_on = None
+
+# Rows rewritten per executemany
+BATCH_SIZE = 1000
+
+# The storage format as this revision defines it. A frozen copy of
+# app.services.revision_store at the time, so later changes to that module
+# or to REVISION_SNAPSHOT_INTERVAL cannot change what this migration does.
+SNAPSHOT_INTERVAL = 10
+_TOKENS = re.compile(r"\s*\S+\s*|\s+")
+
+
+def encode_delta(source, target):
+    if target is None:
+        return "null"
+    a, b = _TOKENS.findall(source), _TOKENS.findall(target)
+    ops = []
+    for tag, i1, i2, j1, j2 in SequenceMatcher(None, a, b, autojunk=False).get_opcodes():
+        if tag == "equal":
+            ops.append(i2 - i1)
+            continue
+        if i2 > i1:
+            ops.append(i1 - i2)
+        if j2 > j1:
+            ops.append("".join(b[j1:j2]))
+    return json.dumps(ops, ensure_ascii=False, separators=(",", ":"))
+
+
+def apply_delta(source, delta):
+    ops = json.loads(delta)
+    if ops is None:
+        return None
+    tokens = _TOKENS.findall(source)
+    out, pos = [], 0
+    for op_ in ops:
+        if isinstance(op_, str):
+            out.append(op_)
+        elif op_ >= 0:
+            out.extend(tokens[pos:pos + op_])
+            pos += op_
+        else:
+            pos -= op_
+    return "".join(out)
+
+
+def pack(version, previous, old_content, new_content):
+    row = {"version": version, "snapshot": None, "delta": None, "old_delta": None}
+    delta = None
+    if previous is not None and (version - 1) % SNAPSHOT_INTERVAL:
+        delta = encode_delta(previous, new_content)
+    if delta is not None and len(delta) < len(new_content):
+        row["delta"] = delta
+    else:
+        row["snapshot"] = new_content
+    if old_content != previous:
+        row["old_delta"] = encode_delta(new_content, old_content)
+    return row
+
+
+def rebuild(rows):
+    contents = {}
+    for row in rows:
+        if row.snapshot is not None:
+            contents[row.version] = row.snapshot
+        else:
+            contents[row.version] = apply_delta(contents[row.version - 1], row.delta)
+    return contents
+
+
+def old_content_of(row, contents):
+    if row.old_delta is not None:
+        return apply_delta(contents[row.version], row.old_delta)
+    return contents.get(row.version - 1)
+
+
+def _rewrite(select_sql: str, update_sql: str, convert) -> None:
+    """Stream revisions section by section and write back converted rows."""
+    conn = op.get_bind()
+    rows = conn.execute(sa.text(select_sql).execution_options(stream_results=True))
+    update = sa.text(update_sql)
+    pending = []
+    for _, section_rows in groupby(rows, key=lambda row: row.section_id):
+        pending.extend(convert(list(section_rows)))
+        if len(pending) >= BATCH_SIZE:
+            conn.execute(update, pending)
+            pending = []
+    if pending:
+        conn.execute(update, pending)
+
+
+def _compress(rows):
+    previous = None
+    for version, row in enumerate(rows, start=1):
+        yield dict(pack(version, previous, row.old_content, row.new_content), id=row.id)
+        previous = row.new_content
+
+
+def _expand(rows):
+    contents = rebuild(rows)
+    for row in rows:
+        yield {"id": row.id, "old_content": old_content_of(row, contents), "new_content": contents[row.version]}
+
+
+def upgrade() -> None:
+    op.add_column('revisions', sa.Column('version', sa.Integer(), nullable=True))
+    op.add_column('revisions', sa.Column('snapshot', sa.Text(), nullable=True))
+    op.add_column('revisions', sa.Column('delta', sa.Text(), nullable=True))
+    op.add_column('revisions', sa.Column('old_delta', sa.Text(), nullable=True))
+
+    _rewrite(
+        "SELECT id, section_id, old_content, new_content FROM revisions "
+        "ORDER BY section_id, created_at, id",
+        "UPDATE revisions SET version = :version, snapshot = :snapshot, "
+        "delta = :delta, old_delta = :old_delta WHERE id = :id",
+        _compress
+    )
+
+    op.alter_column('revisions', 'version', nullable=False)
+    op.create_unique_constraint('uq_revisions_section_id_version', 'revisions', ['section_id', 'version'])
+    op.drop_column('revisions', 'new_content')
+    op.drop_column('revisions', 'old_content')
+
+
+def downgrade() -> None:
+    op.add_column('revisions', sa.Column('old_content', sa.Text(), nullable=True))
+    op.add_column('revisions', sa.Column('new_content', sa.Text(), nullable=True))
+
+    _rewrite(
+        "SELECT id, section_id, version, snapshot, delta, old_delta FROM revisions "
+        "ORDER BY section_id, version",
+        "UPDATE revisions SET old_content = :old_content, new_content = :new_content WHERE id = :id",
+        _expand
+    )
+
+    op.alter_column('revisions', 'new_content', nullable=False)
+    op.drop_constraint('uq_revisions_section_id_version', 'revisions', type_='unique')
+    op.drop_column('revisions', 'old_delta')
+    op.drop_column('revisions', 'delta')
+    op.drop_column('revisions', 'snapshot')
+    op.drop_column('revisions', 'version')
@@ -0,0 +1,45 @@
+"""One feedback row per user and section, with counters on sections
+
+Revision ID: 005
+Revises: 004
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '005'
+down_revision = '004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('feedbacks', sa.Column('updated_at', sa.DateTime(), nullable=True))
+    op.execute("UPDATE feedbacks SET updated_at = created_at")
+
+    # Keep only each user's latest vote per section
+    op.execute(
+        "DELETE FROM feedbacks f USING feedbacks g "
+        "WHERE f.section_id = g.section_id AND f.user_id = g.user_id "
+        "AND (f.created_at, f.id) < (g.created_at, g.id)"
+    )
+    op.create_unique_constraint('uq_feedbacks_section_id_user_id', 'feedbacks', ['section_id', 'user_id'])
+
+    op.add_column('sections', sa.Column('like_count', sa.Integer(), nullable=False, server_default='0'))
+    op.add_column('sections', sa.Column('dislike_count', sa.Integer(), nullable=False, server_default='0'))
+    op.execute(
+        "UPDATE sections s SET like_count = c.likes, dislike_count = c.dislikes "
+        "FROM (SELECT section_id, count(*) FILTER (WHERE liked) AS likes, "
+        "count(*) FILTER (WHERE NOT liked) AS dislikes FROM feedbacks GROUP BY section_id) c "
+        "WHERE s.id = c.section_id"
+    )
+
+
+def downgrade() -> None:
+    # Collapsed duplicate votes are not restored
+    op.drop_column('sections', 'dislike_count')
+    op.drop_column('sections', 'like_count')
+    op.drop_constraint('uq_feedbacks_section_id_user_id', 'feedbacks', type_='unique')
+    op.drop_column('feedbacks', 'updated_at')
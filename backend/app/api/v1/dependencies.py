@@ -1,35 +1,139 @@
+from dataclasses import dataclass, field
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
-from app.core.database import get_db
+from sqlalchemy import and_, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List
+from app.core.config import settings
+from app.core.database import get_async_db
 from app.core.security import decode_access_token
+from app.models.project import Project
+from app.models.section import Section
 from app.models.user import User
+from app.services.principal_cache import Principal, principal_cache
 from uuid import UUID
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")
 
-async def get_current_user(
-    token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
-) -> User:
-    """Get current authenticated user from JWT token."""
-    credentials_exception = HTTPException(
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    
+
+def _decode_claims(token: str) -> dict:
+    """Verified token claims with ``sub`` parsed to a UUID."""
     payload = decode_access_token(token)
-    if payload is None:
-        raise credentials_exception
+    if payload is None or payload.get("sub") is None:
+        raise _credentials_exception()
+    try:
+        payload["sub"] = UUID(str(payload["sub"]))
+    except ValueError:
+        raise _credentials_exception()
+    return payload
+
+async def get_current_user(
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_async_db)
+) -> Principal:
+    """Get current authenticated user from JWT token.
+    
+    The user row is looked up once per AUTH_PRINCIPAL_CACHE_TTL_SECONDS;
+    updating or deleting the user evicts it immediately.
+    """
+    user_id: UUID = _decode_claims(token)["sub"]
     
-    user_id: UUID = payload.get("sub")
-    if user_id is None:
-        raise credentials_exception
+    principal = principal_cache.get(user_id)
+    if principal is not None:
+        return principal
     
-    user = db.query(User).filter(User.id == user_id).first()
+    result = await db.execute(select(User).where(User.id == user_id))
+    user = result.scalar_one_or_none()
     if user is None:
-        raise credentials_exception
+        raise _credentials_exception()
+    
+    principal = Principal.from_user(user)
+    principal_cache.set(principal)
+    return principal
+
+async def get_current_principal(
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_async_db)
+) -> Principal:
+    """Authenticate a read-only request.
+    
+    With AUTH_CLAIMS_ONLY_READS the signed token is trusted as is and no
+    database lookup happens, so a deleted user keeps read access to
+    whatever still belongs to them until the token expires. Otherwise this
+    behaves like get_current_user.
+    """
+    if settings.AUTH_CLAIMS_ONLY_READS:
+        claims = _decode_claims(token)
+        return Principal(id=claims["sub"], email=claims.get("email"))
+    return await get_current_user(token, db)
+
+@dataclass
+class OwnedSection:
+    """A section, its project and (optionally) the first other sections."""
+    project: Project
+    section: Section
+    neighbors: List[Section] = field(default_factory=list)
+
+async def load_owned_section(
+    db: AsyncSession,
+    user_id: UUID,
+    project_id: UUID,
+    section_id: UUID,
+    neighbors: int = 0
+) -> OwnedSection:
+    """Check ownership and load a section with one statement.
+    
+    The project is outer-joined to the requested section (plus the first
+    ``neighbors`` other sections by order_index), so a missing project and
+    a missing section still produce their own 404s.
+    """
+    wanted = Section.id == section_id
+    if neighbors:
+        neighbor_ids = select(Section.id).where(
+            Section.project_id == project_id,
+            Section.id != section_id
+        ).order_by(Section.order_index).limit(neighbors)
+        wanted = or_(wanted, Section.id.in_(neighbor_ids.scalar_subquery()))
     
-    return user
+    result = await db.execute(
+        select(Project, Section)
+        .outerjoin(Section, and_(Section.project_id == Project.id, wanted))
+        .where(Project.id == project_id, Project.user_id == user_id)
+        .order_by(Section.order_index)
+    )
+    rows = result.all()
+    
+    if not rows:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Project not found"
+        )
+    
+    sections = [s for _, s in rows if s is not None]
+    section = next((s for s in sections if s.id == section_id), None)
+    if section is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Section not found"
+        )
+    
+    return OwnedSection(
+        project=rows[0][0],
+        section=section,
+        neighbors=[s for s in sections if s.id != section_id]
+    )
 
+async def get_owned_section(
+    project_id: UUID,
+    section_id: UUID,
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+) -> OwnedSection:
+    """Dependency for ``/{project_id}/sections/{section_id}`` routes."""
+    return await load_owned_section(db, current_user.id, project_id, section_id)
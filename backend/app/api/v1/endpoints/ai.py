@@ -3,9 +3,9 @@ from sqlalchemy.orm import Session
 from pydantic import BaseModel
 from typing import List, Optional
 from app.core.database import get_db
-from app.api.v1.dependencies import get_current_user
-from app.models.user import User
+from app.api.v1.dependencies import Principal, get_current_user
 from app.services.llm_service import get_llm_service
+from app.services.llm_resilience import LLMUnavailableError
 
 router = APIRouter()
 
@@ -13,6 +13,7 @@ class SuggestOutlineRequest(BaseModel):
     topic: str
     doc_type: str  # "docx" or "pptx"
     num_items: Optional[int] = None
+    bypass_cache: bool = False
 
 class SuggestOutlineResponse(BaseModel):
     items: List[str]
@@ -21,7 +22,7 @@ class SuggestOutlineResponse(BaseModel):
 @router.post("/suggest-outline", response_model=SuggestOutlineResponse)
 async def suggest_outline(
     request: SuggestOutlineRequest,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Generate AI-suggested outline (sections for Word) or slide titles (for PowerPoint)."""
@@ -41,7 +42,10 @@ async def suggest_outline(
         )
         
         # Generate suggestions
-        response_text = await llm_service.generate_content(prompt)
+        response_text = await llm_service.generate_content(
+            prompt,
+            use_cache=not request.bypass_cache
+        )
         
         # Parse response (one item per line)
         items = [
@@ -69,6 +73,8 @@ async def suggest_outline(
             message=f"Generated {len(cleaned_items)} suggestions"
         )
     
+    except LLMUnavailableError:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
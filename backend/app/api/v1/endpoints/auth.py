@@ -4,7 +4,7 @@ from app.core.database import get_db
 from app.core.security import verify_password, get_password_hash, create_access_token
 from app.models.user import User
 from app.schemas.auth import UserCreate, UserLogin, Token, UserResponse
-from app.api.v1.dependencies import get_current_user
+from app.api.v1.dependencies import Principal, get_current_user
 from datetime import timedelta
 from app.core.config import settings
 
@@ -37,7 +37,7 @@ async def register(user_data: UserCreate, db: Session = Depends(get_db)):
     # Create access token
     access_token_expires = timedelta(minutes=settings.JWT_ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": str(new_user.id)},
+        data={"sub": str(new_user.id), "email": new_user.email},
         expires_delta=access_token_expires
     )
     
@@ -59,14 +59,14 @@ async def login(user_data: UserLogin, db: Session = Depends(get_db)):
     
     access_token_expires = timedelta(minutes=settings.JWT_ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": str(user.id)},
+        data={"sub": str(user.id), "email": user.email},
         expires_delta=access_token_expires
     )
     
     return {"access_token": access_token, "token_type": "bearer"}
 
 @router.get("/me", response_model=UserResponse)
-async def get_current_user_info(current_user: User = Depends(get_current_user)):
+async def get_current_user_info(current_user: Principal = Depends(get_current_user)):
     """Get current user information."""
     return current_user
 
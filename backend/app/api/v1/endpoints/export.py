@@ -1,23 +1,32 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from fastapi.responses import FileResponse
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, status, Query
+from fastapi.responses import Response, StreamingResponse
+from starlette.background import BackgroundTask
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import BinaryIO, Iterator, Optional, Tuple
+from urllib.parse import quote
 from uuid import UUID
-import os
 from pathlib import Path
-from app.core.database import get_db
-from app.api.v1.dependencies import get_current_user
-from app.models.user import User
+import os
+from app.core.database import get_async_db
+from app.api.v1.dependencies import Principal, get_current_principal, get_current_user
 from app.models.project import Project, DocumentType
 from app.models.section import Section
 from app.core.config import settings
-from docx import Document
-from pptx import Presentation
-from pptx.util import Inches, Pt
+from app.core.metrics import metrics
+from app.schemas.export import ExportJobResponse
+from app.services.export_cache import export_cache, export_key
+from app.services.export_jobs import ExportJob, ExportJobStatus, export_jobs
+from app.services.export_pool import export_pool
+from app.services.export_renderer import MEDIA_TYPES, ExportDocument
 
 router = APIRouter()
 
+# Bytes per chunk when streaming a rendered export
+EXPORT_CHUNK_SIZE = 64 * 1024
+
 def ensure_export_dir():
-    """Ensure export directory exists."""
+    """Ensure the directory large exports spill into exists."""
     export_dir = Path(settings.EXPORT_TMP_DIR)
     export_dir.mkdir(parents=True, exist_ok=True)
     return export_dir
@@ -25,19 +34,54 @@ def ensure_export_dir():
 # Ensure export directory exists on startup
 ensure_export_dir()
 
-@router.get("/project/{project_id}")
-async def export_project(
+def content_disposition(filename: str) -> str:
+    """An attachment header, RFC 5987-encoded when the name is not plain ASCII."""
+    quoted = quote(filename)
+    if quoted != filename:
+        return f"attachment; filename*=utf-8''{quoted}"
+    return f'attachment; filename="{filename}"'
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """If-None-Match comparison (weak, as RFC 9110 requires for this header)."""
+    if if_none_match.strip() == "*":
+        return True
+    candidates = (tag.strip() for tag in if_none_match.split(","))
+    return etag in (tag[2:] if tag.startswith("W/") else tag for tag in candidates)
+
+def _close(buffer: BinaryIO, path: Optional[str] = None) -> None:
+    """Close ``buffer`` and delete its file, if given; safe to repeat."""
+    buffer.close()
+    if path is not None:
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+
+def _read_chunks(buffer: BinaryIO, path: Optional[str] = None) -> Iterator[bytes]:
+    # Iterated in a worker thread by StreamingResponse; the buffer is closed
+    # (and a spilled file at ``path`` deleted) even if the client leaves
+    try:
+        while chunk := buffer.read(EXPORT_CHUNK_SIZE):
+            yield chunk
+    finally:
+        _close(buffer, path)
+
+def export_filename(project: Project, doc_type: DocumentType) -> str:
+    return f"{project.title.replace(' ', '_')}_{project.id}.{doc_type.value}"
+
+async def _load_document(
+    db: AsyncSession,
+    user_id: UUID,
     project_id: UUID,
-    type: str = Query(..., description="Export type: docx or pptx"),
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
-):
-    """Export project as .docx or .pptx file."""
+    type: str
+) -> Tuple[Project, ExportDocument]:
+    """The caller's project and a snapshot of it to render as ``type``."""
     # Verify project belongs to user
-    project = db.query(Project).filter(
+    result = await db.execute(select(Project).where(
         Project.id == project_id,
-        Project.user_id == current_user.id
-    ).first()
+        Project.user_id == user_id
+    ))
+    project = result.scalar_one_or_none()
     
     if not project:
         raise HTTPException(
@@ -46,9 +90,10 @@ async def export_project(
         )
     
     # Get all sections ordered by order_index
-    sections = db.query(Section).filter(
+    result = await db.execute(select(Section).where(
         Section.project_id == project_id
-    ).order_by(Section.order_index).all()
+    ).order_by(Section.order_index))
+    sections = result.scalars().all()
     
     if not sections:
         raise HTTPException(
@@ -56,96 +101,139 @@ async def export_project(
             detail="Project has no sections to export"
         )
     
-    export_dir = ensure_export_dir()
-    
-    if type.lower() == "docx":
-        if project.doc_type != DocumentType.DOCX:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Project is not a Word document"
-            )
-        
-        # Create Word document
-        doc = Document()
-        doc.add_heading(project.title, 0)
-        
-        for section in sections:
-            # Add section heading
-            doc.add_heading(section.title, level=1)
-            
-            # Add content
-            if section.content:
-                # Split content into paragraphs
-                paragraphs = section.content.split('\n\n')
-                for para in paragraphs:
-                    if para.strip():
-                        doc.add_paragraph(para.strip())
-            else:
-                doc.add_paragraph("[Content not generated]")
-        
-        # Save file
-        filename = f"{project.title.replace(' ', '_')}_{project_id}.docx"
-        filepath = export_dir / filename
-        doc.save(str(filepath))
-        
-        return FileResponse(
-            path=str(filepath),
-            filename=filename,
-            media_type="application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+    try:
+        doc_type = DocumentType(type.lower())
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid export type. Use 'docx' or 'pptx'"
         )
     
-    elif type.lower() == "pptx":
-        if project.doc_type != DocumentType.PPTX:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Project is not a PowerPoint presentation"
-            )
-        
-        # Create PowerPoint presentation
-        prs = Presentation()
-        prs.slide_width = Inches(10)
-        prs.slide_height = Inches(7.5)
-        
-        # Title slide
-        title_slide_layout = prs.slide_layouts[0]
-        slide = prs.slides.add_slide(title_slide_layout)
-        title = slide.shapes.title
-        subtitle = slide.placeholders[1]
-        title.text = project.title
-        subtitle.text = project.topic
-        
-        # Content slides
-        for section in sections:
-            bullet_slide_layout = prs.slide_layouts[1]
-            slide = prs.slides.add_slide(bullet_slide_layout)
-            shapes = slide.shapes
-            
-            title_shape = shapes.title
-            body_shape = shapes.placeholders[1]
-            
-            title_shape.text = section.title
-            
-            tf = body_shape.text_frame
-            tf.text = section.content or "[Content not generated]"
-            
-            # Format text
-            for paragraph in tf.paragraphs:
-                paragraph.font.size = Pt(14)
-        
-        # Save file
-        filename = f"{project.title.replace(' ', '_')}_{project_id}.pptx"
-        filepath = export_dir / filename
-        prs.save(str(filepath))
-        
-        return FileResponse(
-            path=str(filepath),
-            filename=filename,
-            media_type="application/vnd.openxmlformats-officedocument.presentationml.presentation"
+    if project.doc_type != doc_type:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Project is not a Word document" if doc_type == DocumentType.DOCX
+            else "Project is not a PowerPoint presentation"
         )
     
-    else:
+    return project, ExportDocument.from_project(project, sections)
+
+@router.get("/project/{project_id}")
+async def export_project(
+    project_id: UUID,
+    type: str = Query(..., description="Export type: docx or pptx"),
+    if_none_match: Optional[str] = Header(None),
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Export project as .docx or .pptx file.
+    
+    The response carries a strong ETag derived from the document content;
+    a matching If-None-Match gets 304 without rendering. Rendered files
+    are kept in an in-memory LRU keyed the same way.
+    """
+    project, document = await _load_document(db, current_user.id, project_id, type)
+    doc_type = document.doc_type
+    key = export_key(document)
+    etag = f'"{key}"'
+    headers = {
+        "Content-Disposition": content_disposition(export_filename(project, doc_type)),
+        "ETag": etag,
+        # Clients may keep the file but must revalidate it on every use
+        "Cache-Control": "private, no-cache",
+    }
+    
+    if if_none_match and etag_matches(if_none_match, etag):
+        metrics.incr("export.not_modified")
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={
+            "ETag": etag,
+            "Cache-Control": headers["Cache-Control"],
+        })
+    
+    cached = export_cache.get(key)
+    if cached is not None:
+        return Response(content=cached, media_type=MEDIA_TYPES[doc_type], headers=headers)
+    
+    # Rendered in a worker process; very large files come back as a temp
+    # file, deleted once it has been sent. It is closed first, since
+    # Windows cannot delete an open file.
+    rendered = await export_pool.render(document)
+    if rendered.data is not None:
+        export_cache.set(key, rendered.data)
+        return Response(content=rendered.data, media_type=MEDIA_TYPES[doc_type], headers=headers)
+    
+    buffer = open(rendered.path, "rb")
+    return StreamingResponse(
+        _read_chunks(buffer, rendered.path),
+        media_type=MEDIA_TYPES[doc_type],
+        headers=dict(headers, **{"Content-Length": str(rendered.size)}),
+        # Also covers a response that is never iterated
+        background=BackgroundTask(_close, buffer, rendered.path)
+    )
+
+@router.post("/project/{project_id}/jobs", response_model=ExportJobResponse, status_code=status.HTTP_202_ACCEPTED)
+async def create_export_job(
+    project_id: UUID,
+    request: Request,
+    response: Response,
+    type: str = Query(..., description="Export type: docx or pptx"),
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Render the project in the background; poll the job, then download it.
+    
+    Submitting a snapshot that is already queued, running or finished
+    returns that job instead of starting another.
+    """
+    project, document = await _load_document(db, current_user.id, project_id, type)
+    job = export_jobs.submit(
+        document,
+        user_id=current_user.id,
+        project_id=project_id,
+        filename=export_filename(project, document.doc_type)
+    )
+    response.headers["Location"] = str(request.url_for("get_export_job", job_id=job.id))
+    return job
+
+def _get_job(job_id: UUID, user_id: UUID) -> ExportJob:
+    job = export_jobs.get(job_id, user_id)
+    if not job:
         raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Invalid export type. Use 'docx' or 'pptx'"
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Export job not found"
         )
+    return job
 
+@router.get("/jobs/{job_id}", response_model=ExportJobResponse)
+async def get_export_job(
+    job_id: UUID,
+    current_user: Principal = Depends(get_current_principal)
+):
+    """Status and progress (sections rendered) of an export job."""
+    return _get_job(job_id, current_user.id)
+
+@router.get("/jobs/{job_id}/download")
+async def download_export_job(
+    job_id: UUID,
+    current_user: Principal = Depends(get_current_principal)
+):
+    """The finished file, until the job expires."""
+    job = _get_job(job_id, current_user.id)
+    if job.status != ExportJobStatus.DONE:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Export job failed" if job.status == ExportJobStatus.FAILED
+            else "Export job is not finished"
+        )
+    
+    # Opened before any await, so expiry can only unlink it under us
+    buffer = open(job.path, "rb")
+    return StreamingResponse(
+        _read_chunks(buffer),
+        media_type=MEDIA_TYPES[job.doc_type],
+        headers={
+            "Content-Disposition": content_disposition(job.filename),
+            "Content-Length": str(job.size),
+            "ETag": f'"{job.key}"',
+        }
+    )
@@ -1,57 +1,79 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from uuid import UUID
-from app.core.database import get_db
-from app.api.v1.dependencies import get_current_user
-from app.models.user import User
-from app.models.project import Project
-from app.models.section import Section
+from datetime import datetime
+from fastapi import APIRouter, Depends, status
+from sqlalchemy import literal_column, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.database import get_async_db
+from app.api.v1.dependencies import OwnedSection, Principal, get_current_user, get_owned_section, load_owned_section
 from app.models.feedback import Feedback
-from app.schemas.feedback import FeedbackCreate, FeedbackResponse
+from app.models.section import Section
+from app.schemas.feedback import FeedbackCreate, FeedbackResponse, FeedbackTotals
 
 router = APIRouter()
 
 @router.post("", response_model=FeedbackResponse, status_code=status.HTTP_201_CREATED)
 async def submit_feedback(
     feedback_data: FeedbackCreate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Submit like/dislike feedback for a section."""
-    # Verify project belongs to user
-    project = db.query(Project).filter(
-        Project.id == feedback_data.project_id,
-        Project.user_id == current_user.id
-    ).first()
-    
-    if not project:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Project not found"
-        )
+    """Submit like/dislike feedback for a section.
     
-    # Verify section exists
-    section = db.query(Section).filter(
-        Section.id == feedback_data.section_id,
-        Section.project_id == feedback_data.project_id
-    ).first()
+    Each user has one vote per section: submitting again replaces it. The
+    section's like/dislike counters change in the same transaction, and
+    only when the vote is new or flipped.
+    """
+    # Verify the section exists in a project the user owns
+    await load_owned_section(db, current_user.id, feedback_data.project_id, feedback_data.section_id)
     
-    if not section:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Section not found"
-        )
-    
-    # Create feedback
-    feedback = Feedback(
+    now = datetime.utcnow()
+    upsert = insert(Feedback).values(
         section_id=feedback_data.section_id,
         project_id=feedback_data.project_id,
         user_id=current_user.id,
-        liked=feedback_data.liked
+        liked=feedback_data.liked,
+        created_at=now,
+        updated_at=now
     )
-    db.add(feedback)
-    db.commit()
-    db.refresh(feedback)
+    # Repeating the same vote matches no row and returns nothing; xmax is 0
+    # only for a freshly inserted row, so a returned row without it flipped
+    upsert = upsert.on_conflict_do_update(
+        constraint="uq_feedbacks_section_id_user_id",
+        set_={"liked": upsert.excluded.liked, "updated_at": now},
+        where=Feedback.liked.is_distinct_from(upsert.excluded.liked)
+    ).returning(Feedback, literal_column("xmax = 0").label("inserted"))
+    row = (await db.execute(upsert)).first()
+    
+    if row is None:
+        result = await db.execute(select(Feedback).where(
+            Feedback.section_id == feedback_data.section_id,
+            Feedback.user_id == current_user.id
+        ))
+        feedback = result.scalar_one()
+    else:
+        feedback, inserted = row
+        likes = 1 if feedback.liked else 0
+        dislikes = 1 - likes
+        if not inserted:
+            # A flipped vote also takes one away from the other side
+            likes, dislikes = likes - dislikes, dislikes - likes
+        await db.execute(update(Section).where(
+            Section.id == feedback_data.section_id
+        ).values(
+            like_count=Section.like_count + likes,
+            dislike_count=Section.dislike_count + dislikes,
+            # A vote is not an edit of the section
+            updated_at=Section.updated_at
+        ))
     
+    await db.commit()
     return feedback
 
+@router.get("/projects/{project_id}/sections/{section_id}", response_model=FeedbackTotals)
+async def get_feedback_totals(owned: OwnedSection = Depends(get_owned_section)):
+    """Like/dislike totals for a section, read from its counters."""
+    return FeedbackTotals(
+        section_id=owned.section.id,
+        likes=owned.section.like_count,
+        dislikes=owned.section.dislike_count
+    )
@@ -1,78 +1,109 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+import asyncio
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from sqlalchemy import bindparam, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.attributes import set_committed_value
+from typing import Iterable, List, Optional
 from uuid import UUID
-from app.core.database import get_db
-from app.api.v1.dependencies import get_current_user
-from app.models.user import User
+from app.core.database import get_async_db
+from app.api.v1.dependencies import Principal, get_current_user, load_owned_section
+from app.api.v1.streaming import stream_completion
 from app.models.project import Project
 from app.models.section import Section
-from app.schemas.generation import GenerateRequest, GenerateResponse
+from app.schemas.generation import (
+    GenerateRequest,
+    GenerateResponse,
+    GenerateProjectRequest,
+    GenerateProjectResponse,
+    SectionGenerationResult,
+)
+from app.core.config import settings
+from app.core.metrics import metrics
 from app.services.llm_service import get_llm_service
-from datetime import datetime
+from app.services.revision_store import save_llm_content
+from app.services.prompt_budget import stale_summary
+from app.services.llm_resilience import LLMUnavailableError
 
 router = APIRouter()
 
-@router.post("/section", response_model=GenerateResponse)
-async def generate_section_content(
-    request: GenerateRequest,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
-):
-    """Generate content for a section using AI."""
-    # Verify project belongs to user
-    project = db.query(Project).filter(
-        Project.id == request.project_id,
-        Project.user_id == current_user.id
-    ).first()
-    
-    if not project:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Project not found"
-        )
-    
-    # Get section
-    section = db.query(Section).filter(
-        Section.id == request.section_id,
-        Section.project_id == request.project_id
-    ).first()
-    
-    if not section:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Section not found"
-        )
-    
-    # Get neighboring sections for context
-    neighboring_sections = db.query(Section).filter(
-        Section.project_id == request.project_id,
-        Section.id != request.section_id
-    ).order_by(Section.order_index).limit(3).all()
+GENERATION_REVISION_PROMPT = "[generate]"
+
+# Stores a refreshed summary without firing Section.updated_at's onupdate
+_SAVE_SUMMARY = update(Section.__table__).where(
+    Section.__table__.c.id == bindparam("section_id")
+).values(
+    summary=bindparam("new_summary"),
+    summary_hash=bindparam("new_hash"),
+    updated_at=Section.__table__.c.updated_at
+)
+
+async def _prepare_generation(request: GenerateRequest, current_user: Principal, db: AsyncSession):
+    """Check ownership and build the generation prompt for a section."""
+    owned = await load_owned_section(
+        db, current_user.id, request.project_id, request.section_id, neighbors=3
+    )
+    await _refresh_summaries(db, owned.neighbors)
+    return owned.project, owned.section, _build_prompt(owned.project, owned.section, owned.neighbors)
+
+async def _refresh_summaries(db: AsyncSession, sections: Iterable[Section]) -> None:
+    """Recompute missing or stale section summaries and store them.
     
+    Written with a Core UPDATE that keeps updated_at, so a section that was
+    only summarised for a neighbour's prompt does not look edited. The
+    loaded objects get the new values as if read back from the database.
+    The UPDATE is committed straight away: holding its row locks through
+    the LLM call would serialise generation of sibling sections.
+    """
+    rows = []
+    for s in sections:
+        refreshed = stale_summary(s)
+        if refreshed is None:
+            continue
+        summary, digest = refreshed
+        set_committed_value(s, "summary", summary)
+        set_committed_value(s, "summary_hash", digest)
+        rows.append({"section_id": s.id, "new_summary": summary, "new_hash": digest})
+    if rows:
+        await db.execute(_SAVE_SUMMARY, rows)
+        await db.commit()
+
+def _build_prompt(project: Project, section: Section, neighboring_sections: List[Section]) -> str:
+    """Build the generation prompt for a section from its project context."""
+    # Summaries were refreshed by _refresh_summaries
     neighbors_data = [
-        {"title": s.title, "content": s.content or ""}
+        {"title": s.title, "summary": s.summary}
         for s in neighboring_sections
     ]
     
-    # Build prompt
-    llm_service = get_llm_service()
-    prompt = llm_service.build_generation_prompt(
+    return get_llm_service().build_generation_prompt(
         project_topic=project.topic,
         section_title=section.title,
         section_type=section.type.value,
         previous_content=section.content,
         neighboring_sections=neighbors_data
     )
+
+@router.post("/section", response_model=GenerateResponse)
+async def generate_section_content(
+    request: GenerateRequest,
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Generate content for a section using AI."""
+    project, section, prompt = await _prepare_generation(request, current_user, db)
+    llm_service = get_llm_service()
     
     # Generate content
     try:
-        generated_content = await llm_service.generate_content(prompt)
+        generated_content = await llm_service.generate_content(
+            prompt,
+            use_cache=not request.bypass_cache
+        )
         
-        # Store in database
-        section.llm_raw = generated_content
-        section.content = generated_content
-        db.commit()
-        db.refresh(section)
+        await save_llm_content(
+            db, project, section, current_user.id, GENERATION_REVISION_PROMPT, generated_content
+        )
+        await db.refresh(section)
         
         return GenerateResponse(
             section_id=section.id,
@@ -80,9 +111,207 @@ async def generate_section_content(
             llm_raw=generated_content,
             message="Content generated successfully"
         )
+    except LLMUnavailableError:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to generate content: {str(e)}"
         )
 
+@router.post("/section/stream")
+async def stream_section_content(
+    request: GenerateRequest,
+    http_request: Request,
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Generate section content, streaming tokens as Server-Sent Events.
+    
+    Emits ``token`` events while the provider is producing text, then a
+    ``done`` event carrying the GenerateResponse payload once the content
+    and its revision have been committed.
+    """
+    project, section, prompt = await _prepare_generation(request, current_user, db)
+    llm_service = get_llm_service()
+    # Fail with 503 before the stream starts rather than inside it
+    llm_service.ensure_available()
+    chunks = llm_service.stream_content(
+        prompt,
+        use_cache=not request.bypass_cache
+    )
+    
+    async def save(generated_content: str) -> dict:
+        await save_llm_content(
+            db, project, section, current_user.id, GENERATION_REVISION_PROMPT, generated_content
+        )
+        return GenerateResponse(
+            section_id=section.id,
+            content=generated_content,
+            llm_raw=generated_content,
+            message="Content generated successfully"
+        ).model_dump(mode="json")
+    
+    return stream_completion(http_request, chunks, save, "Failed to generate content")
+
+def _build_batch_prompt(project: Project, group: List[Section], sections: List[Section]) -> str:
+    """Build the combined prompt for a group of sections."""
+    group_ids = {s.id for s in group}
+    return get_llm_service().build_batch_generation_prompt(
+        project_topic=project.topic,
+        section_type=group[0].type.value,
+        sections=[
+            {"title": s.title, "previous_content": s.content}
+            for s in group
+        ],
+        neighboring_sections=[
+            {"title": s.title, "summary": s.summary}
+            for s in sections if s.id not in group_ids
+        ][:3]
+    )
+
+async def _generate_batch(prompt: str, group: List[Section], use_cache: bool) -> Optional[List[str]]:
+    """Generate a group of sections with one LLM call.
+    
+    Returns per-section content in group order, or None if the call failed
+    or its answer could not be split back into sections.
+    """
+    llm_service = get_llm_service()
+    try:
+        response_text = await llm_service.generate_content(
+            prompt,
+            max_tokens=settings.LLM_BATCH_MAX_TOKENS_PER_SECTION * len(group),
+            use_cache=use_cache
+        )
+    except Exception:
+        return None
+    metrics.incr("llm.batch.calls")
+    metrics.incr("llm.batch.sections", len(group))
+    return llm_service.parse_batch_generation_response(response_text, len(group))
+
+@router.post("/project/{project_id}", response_model=GenerateProjectResponse)
+async def generate_project_content(
+    project_id: UUID,
+    request: GenerateProjectRequest,
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Generate content for every empty section of a project in one request.
+    
+    Pass ``section_ids`` to (re)generate a chosen subset instead. Provider
+    calls fan out with at most LLM_BULK_CONCURRENCY in flight, finished
+    sections are committed in batches of LLM_BULK_COMMIT_BATCH, and a
+    failure is reported per section without aborting the rest. With
+    ``batch`` set, up to LLM_BATCH_SIZE sections share one LLM call.
+    """
+    # Verify project belongs to user
+    result = await db.execute(select(Project).where(
+        Project.id == project_id,
+        Project.user_id == current_user.id
+    ))
+    project = result.scalar_one_or_none()
+    
+    if not project:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Project not found"
+        )
+    
+    result = await db.execute(select(Section).where(
+        Section.project_id == project_id
+    ).order_by(Section.order_index))
+    sections = result.scalars().all()
+    
+    if request.section_ids is not None:
+        by_id = {s.id: s for s in sections}
+        missing = [sid for sid in request.section_ids if sid not in by_id]
+        if missing:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Section not found: {missing[0]}"
+            )
+        targets = [by_id[sid] for sid in dict.fromkeys(request.section_ids)]
+    else:
+        targets = [s for s in sections if not s.content]
+    
+    group_size = max(1, settings.LLM_BATCH_SIZE) if request.batch else 1
+    groups = [targets[i:i + group_size] for i in range(0, len(targets), group_size)]
+    
+    # Build every prompt up front so all sections see the same pre-generation context
+    await _refresh_summaries(db, sections)
+    prompts = {
+        section.id: _build_prompt(
+            project,
+            section,
+            [s for s in sections if s.id != section.id][:3]
+        )
+        for section in targets
+    }
+    batch_prompts = [
+        _build_batch_prompt(project, group, sections) if len(group) > 1 else None
+        for group in groups
+    ]
+    
+    llm_service = get_llm_service()
+    semaphore = asyncio.Semaphore(max(1, settings.LLM_BULK_CONCURRENCY))
+    use_cache = not request.bypass_cache
+    
+    async def generate_one(section: Section):
+        try:
+            content = await llm_service.generate_content(
+                prompts[section.id],
+                use_cache=use_cache
+            )
+            return section, content, None
+        except Exception as e:
+            return section, None, str(e)
+    
+    async def generate(group: List[Section], batch_prompt: Optional[str]):
+        async with semaphore:
+            if batch_prompt is None:
+                return [await generate_one(group[0])]
+            
+            contents = await _generate_batch(batch_prompt, group, use_cache)
+            if contents is not None:
+                return [(section, content, None) for section, content in zip(group, contents)]
+            # Unparseable or failed batch: answer each section on its own
+            metrics.incr("llm.batch.fallbacks")
+            return list(await asyncio.gather(*(generate_one(s) for s in group)))
+    
+    results = {}
+    pending_commit = 0
+    for finished in asyncio.as_completed([generate(g, p) for g, p in zip(groups, batch_prompts)]):
+        for section, content, error in await finished:
+            if error is not None:
+                results[section.id] = SectionGenerationResult(
+                    section_id=section.id,
+                    success=False,
+                    error=f"Failed to generate content: {error}"
+                )
+                continue
+            
+            section.llm_raw = content
+            section.content = content
+            project.touch()
+            results[section.id] = SectionGenerationResult(
+                section_id=section.id,
+                success=True,
+                content=content
+            )
+            pending_commit += 1
+        if pending_commit >= settings.LLM_BULK_COMMIT_BATCH:
+            await db.commit()
+            pending_commit = 0
+    
+    if pending_commit:
+        await db.commit()
+    
+    ordered = [results[s.id] for s in targets]
+    succeeded = sum(1 for r in ordered if r.success)
+    return GenerateProjectResponse(
+        project_id=project_id,
+        results=ordered,
+        succeeded=succeeded,
+        failed=len(ordered) - succeeded,
+        message=f"Generated {succeeded} of {len(ordered)} sections"
+    )
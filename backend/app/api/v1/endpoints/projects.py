@@ -1,31 +1,122 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
+import base64
+import binascii
+import json
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from sqlalchemy import func, select, tuple_
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from typing import List, Optional, Tuple
 from uuid import UUID
-from app.core.database import get_db
-from app.api.v1.dependencies import get_current_user
-from app.models.user import User
-from app.models.project import Project
-from app.models.section import Section, SectionType
-from app.schemas.project import ProjectCreate, ProjectUpdate, ProjectResponse
-from app.schemas.section import SectionCreate
+from app.core.database import get_async_db
+from app.api.v1.dependencies import Principal, get_current_principal, get_current_user
+from app.models.project import DocumentType, Project
+from app.models.section import Section
+from app.schemas.project import ProjectCreate, ProjectUpdate, ProjectResponse, ProjectSummary
 
 router = APIRouter()
 
-@router.get("", response_model=List[ProjectResponse])
+# Section titles included per project in the listing
+SUMMARY_TITLE_LIMIT = 10
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 100
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+def encode_cursor(updated_at: datetime, project_id: UUID) -> str:
+    """Opaque cursor pointing just past a project in listing order."""
+    payload = json.dumps([updated_at.isoformat(), str(project_id)])
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[datetime, UUID]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        updated_at, project_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return datetime.fromisoformat(updated_at), UUID(project_id)
+    except (ValueError, TypeError, binascii.Error):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+@router.get("", response_model=List[ProjectSummary])
 async def list_projects(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    response: Response,
+    cursor: Optional[str] = Query(None, description="Cursor from the previous page's X-Next-Cursor header"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, description=f"Page size (at most {MAX_PAGE_SIZE})"),
+    doc_type: Optional[DocumentType] = Query(None),
+    title_prefix: Optional[str] = Query(None, description="Case-insensitive title prefix"),
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """List all projects for the current user."""
-    projects = db.query(Project).filter(Project.user_id == current_user.id).all()
-    return projects
+    """List the current user's projects, most recently updated first.
+    
+    Pages are keyed on (updated_at, id), so each page costs the same no
+    matter how deep it is. When more projects remain, the cursor for the
+    next page is returned in the X-Next-Cursor header. Section counts and
+    titles are aggregated in the same query, for the page's projects only;
+    section bodies are only returned by the project detail endpoint.
+    """
+    limit = min(limit, MAX_PAGE_SIZE)
+    filters = [Project.user_id == current_user.id]
+    if doc_type is not None:
+        filters.append(Project.doc_type == doc_type)
+    if title_prefix:
+        filters.append(Project.title.istartswith(title_prefix, autoescape=True))
+    if cursor:
+        updated_at, project_id = decode_cursor(cursor)
+        filters.append(tuple_(Project.updated_at, Project.id) < tuple_(updated_at, project_id))
+    
+    # The page is cut from ix_projects_user_id_updated_at first, so only
+    # its projects' sections are joined and aggregated
+    page = (
+        select(Project.id)
+        .where(*filters)
+        .order_by(Project.updated_at.desc(), Project.id.desc())
+        .limit(limit + 1)
+        .subquery()
+    )
+    result = await db.execute(
+        select(
+            Project,
+            func.count(Section.id).label("section_count"),
+            func.greatest(Project.updated_at, func.max(Section.updated_at)).label("last_updated_at"),
+            func.array_agg(
+                aggregate_order_by(Section.title, Section.order_index)
+            ).filter(Section.id.isnot(None)).label("section_titles")
+        )
+        .join(page, page.c.id == Project.id)
+        .outerjoin(Section, Section.project_id == Project.id)
+        .group_by(Project.id)
+        .order_by(Project.updated_at.desc(), Project.id.desc())
+    )
+    rows = result.all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1][0]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(last.updated_at, last.id)
+    
+    return [
+        ProjectSummary(
+            id=project.id,
+            user_id=project.user_id,
+            title=project.title,
+            doc_type=project.doc_type,
+            topic=project.topic,
+            created_at=project.created_at,
+            updated_at=project.updated_at,
+            section_count=section_count,
+            last_updated_at=last_updated_at,
+            section_titles=(section_titles or [])[:SUMMARY_TITLE_LIMIT]
+        )
+        for project, section_count, last_updated_at, section_titles in rows
+    ]
 
 @router.post("", response_model=ProjectResponse, status_code=status.HTTP_201_CREATED)
 async def create_project(
     project_data: ProjectCreate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Create a new project."""
     new_project = Project(
@@ -35,21 +126,23 @@ async def create_project(
         topic=project_data.topic
     )
     db.add(new_project)
-    db.commit()
-    db.refresh(new_project)
+    await db.commit()
+    await db.refresh(new_project, attribute_names=["sections"])
     return new_project
 
 @router.get("/{project_id}", response_model=ProjectResponse)
 async def get_project(
     project_id: UUID,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get project details with sections."""
-    project = db.query(Project).filter(
-        Project.id == project_id,
-        Project.user_id == current_user.id
-    ).first()
+    result = await db.execute(
+        select(Project)
+        .where(Project.id == project_id, Project.user_id == current_user.id)
+        .options(selectinload(Project.sections))
+    )
+    project = result.scalar_one_or_none()
     
     if not project:
         raise HTTPException(
@@ -63,14 +156,16 @@ async def get_project(
 async def update_project(
     project_id: UUID,
     project_data: ProjectUpdate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update project configuration."""
-    project = db.query(Project).filter(
-        Project.id == project_id,
-        Project.user_id == current_user.id
-    ).first()
+    result = await db.execute(
+        select(Project)
+        .where(Project.id == project_id, Project.user_id == current_user.id)
+        .options(selectinload(Project.sections))
+    )
+    project = result.scalar_one_or_none()
     
     if not project:
         raise HTTPException(
@@ -83,21 +178,22 @@ async def update_project(
     if project_data.topic is not None:
         project.topic = project_data.topic
     
-    db.commit()
-    db.refresh(project)
+    await db.commit()
     return project
 
 @router.delete("/{project_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_project(
     project_id: UUID,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Delete a project."""
-    project = db.query(Project).filter(
-        Project.id == project_id,
-        Project.user_id == current_user.id
-    ).first()
+    result = await db.execute(
+        select(Project)
+        .where(Project.id == project_id, Project.user_id == current_user.id)
+        .options(selectinload(Project.sections))
+    )
+    project = result.scalar_one_or_none()
     
     if not project:
         raise HTTPException(
@@ -105,7 +201,7 @@ async def delete_project(
             detail="Project not found"
         )
     
-    db.delete(project)
-    db.commit()
+    await db.delete(project)
+    await db.commit()
     return None
 
@@ -1,47 +1,21 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from uuid import UUID
-from app.core.database import get_db
-from app.api.v1.dependencies import get_current_user
-from app.models.user import User
-from app.models.project import Project
-from app.models.section import Section
-from app.models.revision import Revision
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.database import get_async_db
+from app.api.v1.dependencies import Principal, get_current_user, load_owned_section
+from app.api.v1.streaming import stream_completion
 from app.schemas.refinement import RefineRequest, RefineResponse
 from app.services.llm_service import get_llm_service
+from app.services.revision_store import save_llm_content
+from app.services.llm_resilience import LLMUnavailableError
 
 router = APIRouter()
 
-@router.post("/section", response_model=RefineResponse)
-async def refine_section_content(
-    request: RefineRequest,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
-):
-    """Refine section content using AI based on user prompt."""
-    # Verify project belongs to user
-    project = db.query(Project).filter(
-        Project.id == request.project_id,
-        Project.user_id == current_user.id
-    ).first()
-    
-    if not project:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Project not found"
-        )
-    
-    # Get section
-    section = db.query(Section).filter(
-        Section.id == request.section_id,
-        Section.project_id == request.project_id
-    ).first()
-    
-    if not section:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Section not found"
-        )
+async def _prepare_refinement(request: RefineRequest, current_user: Principal, db: AsyncSession):
+    """Check ownership and build the refinement prompt for a section."""
+    owned = await load_owned_section(
+        db, current_user.id, request.project_id, request.section_id
+    )
+    section = owned.section
     
     if not section.content:
         raise HTTPException(
@@ -49,36 +23,37 @@ async def refine_section_content(
             detail="Section has no content to refine. Generate content first."
         )
     
-    old_content = section.content
-    
     # Build refinement prompt
-    llm_service = get_llm_service()
-    prompt = llm_service.build_refinement_prompt(
-        current_content=old_content,
+    prompt = get_llm_service().build_refinement_prompt(
+        current_content=section.content,
         refinement_instruction=request.prompt,
         section_type=section.type.value
     )
+    return owned.project, section, prompt
+
+@router.post("/section", response_model=RefineResponse)
+async def refine_section_content(
+    request: RefineRequest,
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Refine section content using AI based on user prompt."""
+    project, section, prompt = await _prepare_refinement(request, current_user, db)
+    old_content = section.content
+    llm_service = get_llm_service()
     
     # Generate refined content
     try:
-        new_content = await llm_service.generate_content(prompt)
-        
-        # Store revision
-        revision = Revision(
-            section_id=section.id,
-            project_id=request.project_id,
-            user_id=current_user.id,
-            prompt=request.prompt,
-            old_content=old_content,
-            new_content=new_content
+        new_content = await llm_service.generate_content(
+            prompt,
+            use_cache=not request.bypass_cache
         )
-        db.add(revision)
         
-        # Update section content
-        section.content = new_content
-        db.commit()
-        db.refresh(section)
-        db.refresh(revision)
+        revision = await save_llm_content(
+            db, project, section, current_user.id, request.prompt, new_content
+        )
+        await db.refresh(section)
+        await db.refresh(revision)
         
         return RefineResponse(
             section_id=section.id,
@@ -87,9 +62,47 @@ async def refine_section_content(
             revision_id=revision.id,
             message="Content refined successfully"
         )
+    except LLMUnavailableError:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to refine content: {str(e)}"
         )
 
+@router.post("/section/stream")
+async def stream_refined_content(
+    request: RefineRequest,
+    http_request: Request,
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Refine section content, streaming tokens as Server-Sent Events.
+    
+    Emits ``token`` events while the provider is producing text, then a
+    ``done`` event carrying the RefineResponse payload once the content
+    and its revision have been committed.
+    """
+    project, section, prompt = await _prepare_refinement(request, current_user, db)
+    old_content = section.content
+    llm_service = get_llm_service()
+    # Fail with 503 before the stream starts rather than inside it
+    llm_service.ensure_available()
+    chunks = llm_service.stream_content(
+        prompt,
+        use_cache=not request.bypass_cache
+    )
+    
+    async def save(new_content: str) -> dict:
+        revision = await save_llm_content(
+            db, project, section, current_user.id, request.prompt, new_content
+        )
+        return RefineResponse(
+            section_id=section.id,
+            old_content=old_content,
+            new_content=new_content,
+            revision_id=revision.id,
+            message="Content refined successfully"
+        ).model_dump(mode="json")
+    
+    return stream_completion(http_request, chunks, save, "Failed to refine content")
@@ -1,13 +1,17 @@
+import uuid
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 from uuid import UUID
-from app.core.database import get_db
-from app.api.v1.dependencies import get_current_user
-from app.models.user import User
+from app.core.database import get_async_db
+from app.api.v1.dependencies import OwnedSection, Principal, get_current_user, get_owned_section
 from app.models.project import Project
 from app.models.section import Section, SectionType
-from app.schemas.section import SectionCreate, SectionUpdate, SectionResponse
+from app.models.revision import Revision
+from app.models.comment import Comment
+from app.models.feedback import Feedback
+from app.schemas.section import SectionBatch, SectionCreate, SectionUpdate, SectionResponse
 
 router = APIRouter()
 
@@ -15,15 +19,16 @@ router = APIRouter()
 async def create_section(
     project_id: UUID,
     section_data: SectionCreate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Create a new section for a Word document or slide for a PowerPoint presentation."""
     # Verify project exists and belongs to user
-    project = db.query(Project).filter(
+    result = await db.execute(select(Project).where(
         Project.id == project_id,
         Project.user_id == current_user.id
-    ).first()
+    ))
+    project = result.scalar_one_or_none()
     
     if not project:
         raise HTTPException(
@@ -41,41 +46,126 @@ async def create_section(
         order_index=section_data.order_index
     )
     db.add(new_section)
-    db.commit()
-    db.refresh(new_section)
+    project.touch()
+    await db.commit()
+    await db.refresh(new_section)
     return new_section
 
-@router.put("/{project_id}/sections/{section_id}", response_model=SectionResponse)
-async def update_section(
+@router.post("/{project_id}/sections/batch", response_model=List[SectionResponse])
+async def batch_sections(
     project_id: UUID,
-    section_id: UUID,
-    section_data: SectionUpdate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    batch: SectionBatch,
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Update a section."""
-    # Verify project belongs to user
-    project = db.query(Project).filter(
-        Project.id == project_id,
-        Project.user_id == current_user.id
-    ).first()
+    """Create, update, delete and reorder sections in one transaction.
     
-    if not project:
+    ``sections`` lists every section that should remain, in order: items
+    with an ``id`` update that section, items without one create it, and
+    list position becomes ``order_index``. Sections in ``delete`` are
+    removed with their revisions, comments and feedback. An existing
+    section that is neither listed nor deleted is rejected, so a client
+    working from a stale list cannot silently drop or misorder it.
+    """
+    # Ownership check and current ordering in one statement
+    result = await db.execute(
+        select(Project, Section.id, Section.order_index, Section.title)
+        .outerjoin(Section, Section.project_id == Project.id)
+        .where(Project.id == project_id, Project.user_id == current_user.id)
+    )
+    rows = result.all()
+    
+    if not rows:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Project not found"
         )
     
-    section = db.query(Section).filter(
-        Section.id == section_id,
-        Section.project_id == project_id
-    ).first()
+    project = rows[0][0]
+    existing = {
+        section_id: (order_index, title)
+        for _, section_id, order_index, title in rows
+        if section_id is not None
+    }
+    listed = [item.id for item in batch.sections if item.id is not None]
+    deleted = list(dict.fromkeys(batch.delete))
     
-    if not section:
+    if len(set(listed)) != len(listed) or set(listed) & set(deleted):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Each section may appear only once in a batch"
+        )
+    unknown = [sid for sid in listed + deleted if sid not in existing]
+    if unknown:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
-            detail="Section not found"
+            detail=f"Section not found: {unknown[0]}"
+        )
+    if len(listed) + len(deleted) != len(existing):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Batch must list or delete every existing section"
         )
+    if any(item.id is None and not item.title for item in batch.sections):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="New sections need a title"
+        )
+    
+    section_type = SectionType.SECTION if project.doc_type.value == "docx" else SectionType.SLIDE
+    inserts, updates = [], []
+    for order_index, item in enumerate(batch.sections):
+        if item.id is None:
+            inserts.append({
+                "id": uuid.uuid4(),
+                "project_id": project_id,
+                "type": section_type,
+                "order_index": order_index,
+                "title": item.title,
+                "content": item.content,
+            })
+            continue
+        
+        # Only rows that actually change are written
+        current_order, current_title = existing[item.id]
+        values = {}
+        if current_order != order_index:
+            values["order_index"] = order_index
+        if item.title is not None and item.title != current_title:
+            values["title"] = item.title
+        if item.content is not None:
+            values["content"] = item.content
+        if values:
+            updates.append(dict(values, id=item.id))
+    
+    if deleted:
+        # Bulk deletes bypass ORM cascades, so history goes first
+        for model in (Revision, Comment, Feedback):
+            await db.execute(delete(model).where(model.section_id.in_(deleted)))
+        await db.execute(delete(Section).where(Section.id.in_(deleted)))
+    if updates:
+        await db.execute(update(Section), updates)
+    if inserts:
+        await db.execute(insert(Section), inserts)
+    if deleted or updates or inserts:
+        # Flushed with the reload below
+        project.touch()
+    
+    result = await db.execute(select(Section).where(
+        Section.project_id == project_id
+    ).order_by(Section.order_index))
+    sections = result.scalars().all()
+    await db.commit()
+    return sections
+
+@router.put("/{project_id}/sections/{section_id}", response_model=SectionResponse)
+async def update_section(
+    section_data: SectionUpdate,
+    owned: OwnedSection = Depends(get_owned_section),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Update a section."""
+    section = owned.section
     
     if section_data.title is not None:
         section.title = section_data.title
@@ -83,43 +173,19 @@ async def update_section(
         section.content = section_data.content
     if section_data.order_index is not None:
         section.order_index = section_data.order_index
+    owned.project.touch()
     
-    db.commit()
-    db.refresh(section)
+    await db.commit()
+    await db.refresh(section)
     return section
 
 @router.delete("/{project_id}/sections/{section_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_section(
-    project_id: UUID,
-    section_id: UUID,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    owned: OwnedSection = Depends(get_owned_section),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Delete a section."""
-    # Verify project belongs to user
-    project = db.query(Project).filter(
-        Project.id == project_id,
-        Project.user_id == current_user.id
-    ).first()
-    
-    if not project:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Project not found"
-        )
-    
-    section = db.query(Section).filter(
-        Section.id == section_id,
-        Section.project_id == project_id
-    ).first()
-    
-    if not section:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Section not found"
-        )
-    
-    db.delete(section)
-    db.commit()
+    await db.delete(owned.section)
+    owned.project.touch()
+    await db.commit()
     return None
-
@@ -0,0 +1,48 @@
+import json
+from typing import AsyncIterator, Awaitable, Callable
+from fastapi import Request
+from fastapi.responses import StreamingResponse
+
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    # Stop reverse proxies (nginx, Render) from buffering the stream
+    "X-Accel-Buffering": "no",
+}
+
+def sse_event(event: str, data: dict) -> str:
+    """Format one Server-Sent Event frame."""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+def stream_completion(
+    http_request: Request,
+    chunks: AsyncIterator[str],
+    on_complete: Callable[[str], Awaitable[dict]],
+    error_message: str
+) -> StreamingResponse:
+    """Relay LLM chunks to the client as SSE ``token`` events.
+
+    When the provider finishes, ``on_complete`` receives the full text and
+    its result is sent as the ``done`` event. If the client goes away the
+    chunk iterator is closed, which cancels the upstream provider call.
+    """
+    async def event_stream():
+        parts = []
+        try:
+            async for chunk in chunks:
+                if await http_request.is_disconnected():
+                    return
+                parts.append(chunk)
+                yield sse_event("token", {"text": chunk})
+            payload = await on_complete("".join(parts).strip())
+        except Exception as e:
+            yield sse_event("error", {"detail": f"{error_message}: {str(e)}"})
+            return
+        finally:
+            await chunks.aclose()
+        yield sse_event("done", payload)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS
+    )
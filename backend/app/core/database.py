@@ -1,11 +1,114 @@
-from sqlalchemy import create_engine
+import time
+from sqlalchemy import create_engine, event, exc
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool, QueuePool
 from app.core.config import settings
+from app.core.metrics import metrics
 
-engine = create_engine(settings.DATABASE_URL)
+# Upper bounds (seconds) of the pool wait histogram; most checkouts are instant
+POOL_WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0)
+
+def async_database_url(url: str) -> str:
+    """The asyncpg form of a PostgreSQL URL (``postgresql+asyncpg://``)."""
+    scheme, sep, rest = url.partition("://")
+    if scheme.split("+")[0] in ("postgresql", "postgres"):
+        return f"postgresql+asyncpg{sep}{rest}"
+    return url
+
+class _TimedPoolMixin:
+    """Records how long each checkout waited for a connection.
+
+    The pool's ``logging_name`` names its metrics: ``db.pool.<name>.*``.
+    """
+
+    def connect(self):
+        prefix = f"db.pool.{self.logging_name}"
+        started = time.perf_counter()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            metrics.incr(f"{prefix}.timeouts")
+            raise
+        finally:
+            metrics.observe(f"{prefix}.wait_seconds", time.perf_counter() - started, POOL_WAIT_BUCKETS)
+
+class TimedQueuePool(_TimedPoolMixin, QueuePool):
+    pass
+
+class TimedAsyncAdaptedQueuePool(_TimedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+def pool_options() -> dict:
+    """Engine keyword arguments for the configured pool."""
+    return {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
+def instrument_pool(pool: Pool, name: str) -> None:
+    """Publish checkout and connection churn metrics for ``pool``."""
+    prefix = f"db.pool.{name}"
+    checked_out = 0
+
+    def publish_usage() -> None:
+        # Tracked here: during "checkin" the pool still counts the connection as out
+        metrics.set_gauge(f"{prefix}.checked_out", checked_out)
+        metrics.set_gauge(f"{prefix}.overflow", max(0, pool.overflow()))
+
+    @event.listens_for(pool, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        metrics.incr(f"{prefix}.connects")
+
+    @event.listens_for(pool, "close")
+    def on_close(dbapi_connection, connection_record):
+        metrics.incr(f"{prefix}.disconnects")
+
+    @event.listens_for(pool, "invalidate")
+    def on_invalidate(dbapi_connection, connection_record, exception):
+        metrics.incr(f"{prefix}.invalidated")
+
+    @event.listens_for(pool, "checkout")
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        nonlocal checked_out
+        checked_out += 1
+        metrics.incr(f"{prefix}.checkouts")
+        publish_usage()
+
+    @event.listens_for(pool, "checkin")
+    def on_checkin(dbapi_connection, connection_record):
+        nonlocal checked_out
+        checked_out = max(0, checked_out - 1)
+        publish_usage()
+
+    metrics.set_gauge(f"{prefix}.size", pool.size())
+    publish_usage()
+
+engine = create_engine(
+    settings.DATABASE_URL,
+    poolclass=TimedQueuePool,
+    pool_logging_name="sync",
+    **pool_options()
+)
+instrument_pool(engine.pool, "sync")
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine for request handlers: queries suspend the coroutine instead of
+# blocking the event loop. Objects stay loaded after commit so responses can
+# be serialized without another round trip.
+async_engine = create_async_engine(
+    async_database_url(settings.DATABASE_URL),
+    poolclass=TimedAsyncAdaptedQueuePool,
+    pool_logging_name="async",
+    **pool_options()
+)
+instrument_pool(async_engine.sync_engine.pool, "async")
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 Base = declarative_base()
 
 def get_db():
@@ -15,3 +118,8 @@ def get_db():
         yield db
     finally:
         db.close()
+
+async def get_async_db():
+    """Dependency for getting an async database session."""
+    async with AsyncSessionLocal() as db:
+        yield db
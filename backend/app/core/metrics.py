@@ -0,0 +1,77 @@
+import bisect
+import threading
+from collections import defaultdict
+from typing import Dict, Sequence
+
+# Upper bounds (seconds) of latency histogram buckets; the last bucket is open-ended
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+class MetricsRegistry:
+    """Process-local counters, gauges and histograms exposed on ``/metrics``."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, float] = defaultdict(float)
+        self._gauges: Dict[str, float] = {}
+        self._histograms: Dict[str, dict] = {}
+
+    def incr(self, name: str, value: float = 1) -> None:
+        """Increment a monotonic counter."""
+        with self._lock:
+            self._counters[name] += value
+
+    def set_gauge(self, name: str, value: float) -> None:
+        """Record the current value of a gauge."""
+        with self._lock:
+            self._gauges[name] = value
+
+    def observe(self, name: str, value: float, buckets: Sequence[float] = LATENCY_BUCKETS) -> None:
+        """Record one observation in a fixed-bucket histogram."""
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = {
+                    "buckets": list(buckets),
+                    "counts": [0] * (len(buckets) + 1),
+                    "count": 0,
+                    "sum": 0.0,
+                }
+                self._histograms[name] = histogram
+            histogram["counts"][bisect.bisect_left(histogram["buckets"], value)] += 1
+            histogram["count"] += 1
+            histogram["sum"] += value
+
+    def get(self, name: str) -> float:
+        """Current value of a counter or gauge (0 if never recorded)."""
+        with self._lock:
+            if name in self._gauges:
+                return self._gauges[name]
+            return self._counters.get(name, 0)
+
+    def snapshot(self) -> dict:
+        """Point-in-time copy of every metric."""
+        with self._lock:
+            return {
+                "counters": dict(self._counters),
+                "gauges": dict(self._gauges),
+                "histograms": {
+                    name: {
+                        "buckets": dict(zip(
+                            [str(b) for b in h["buckets"]] + ["+Inf"],
+                            h["counts"]
+                        )),
+                        "count": h["count"],
+                        "sum": h["sum"],
+                    }
+                    for name, h in self._histograms.items()
+                },
+            }
+
+    def reset(self) -> None:
+        """Clear all metrics (used by tests)."""
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+            self._histograms.clear()
+
+metrics = MetricsRegistry()
@@ -1,14 +1,29 @@
-from fastapi import FastAPI
+import math
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from app.core.config import settings
+from app.core.metrics import metrics
 from app.api.v1.api import api_router
+from app.services.export_jobs import export_jobs
+from app.services.export_pool import ExportPoolSaturatedError, export_pool
+from app.services.llm_resilience import LLMUnavailableError
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    # Jobs live in this process, so their artifacts go with it
+    export_jobs.shutdown()
+    export_pool.shutdown()
 
 app = FastAPI(
     title="AI Document Authoring Platform",
     description="AI-powered document generation and refinement platform",
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    lifespan=lifespan
 )
 
 # CORS middleware
@@ -19,8 +34,28 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Project listing pagination cursor
+    expose_headers=["X-Next-Cursor"],
 )
 
+@app.exception_handler(LLMUnavailableError)
+async def llm_unavailable_handler(request: Request, exc: LLMUnavailableError):
+    """Shed load with 503 + Retry-After while an LLM provider is unhealthy."""
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(max(1, math.ceil(exc.retry_after)))}
+    )
+
+@app.exception_handler(ExportPoolSaturatedError)
+async def export_pool_saturated_handler(request: Request, exc: ExportPoolSaturatedError):
+    """Back-pressure: 429 + Retry-After while every export worker and queue slot is taken."""
+    return JSONResponse(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(max(1, math.ceil(exc.retry_after)))}
+    )
+
 # Include API router
 app.include_router(api_router, prefix="/api/v1")
 
@@ -32,3 +67,6 @@ async def root():
 async def health():
     return {"status": "healthy"}
 
+@app.get("/metrics")
+async def get_metrics():
+    return metrics.snapshot()
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Boolean, DateTime, ForeignKey
+from sqlalchemy import Column, Boolean, DateTime, ForeignKey, Index, UniqueConstraint
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 import uuid
@@ -7,6 +7,12 @@ from app.core.database import Base
 
 class Feedback(Base):
     __tablename__ = "feedbacks"
+    __table_args__ = (
+        Index("ix_feedbacks_section_id_created_at", "section_id", "created_at"),
+        Index("ix_feedbacks_project_id_created_at", "project_id", "created_at"),
+        # One vote per user and section; submitting again replaces it
+        UniqueConstraint("section_id", "user_id", name="uq_feedbacks_section_id_user_id"),
+    )
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     section_id = Column(UUID(as_uuid=True), ForeignKey("sections.id"), nullable=False)
@@ -14,6 +20,7 @@ class Feedback(Base):
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
     liked = Column(Boolean, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Relationships
     section = relationship("Section", back_populates="feedbacks")
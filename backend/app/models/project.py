@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime, ForeignKey, Enum as SQLEnum
+from sqlalchemy import Column, String, DateTime, ForeignKey, Index, Enum as SQLEnum
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 import uuid
@@ -12,6 +12,10 @@ class DocumentType(str, enum.Enum):
 
 class Project(Base):
     __tablename__ = "projects"
+    __table_args__ = (
+        # Per-user listing, newest first
+        Index("ix_projects_user_id_updated_at", "user_id", "updated_at", "id"),
+    )
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
@@ -24,4 +28,12 @@ class Project(Base):
     # Relationships
     user = relationship("User", back_populates="projects")
     sections = relationship("Section", back_populates="project", cascade="all, delete-orphan", order_by="Section.order_index")
+    
+    def touch(self) -> None:
+        """Mark the project changed when one of its sections is written.
+        
+        The listing pages on updated_at, so without this a project whose
+        sections were just edited would stay where it was.
+        """
+        self.updated_at = datetime.utcnow()
 
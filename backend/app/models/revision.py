@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Text, DateTime, ForeignKey
+from sqlalchemy import Column, Text, Integer, DateTime, ForeignKey, Index, UniqueConstraint
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 import uuid
@@ -7,18 +7,46 @@ from app.core.database import Base
 
 class Revision(Base):
     __tablename__ = "revisions"
+    __table_args__ = (
+        Index("ix_revisions_section_id_created_at", "section_id", "created_at"),
+        Index("ix_revisions_project_id_created_at", "project_id", "created_at"),
+        UniqueConstraint("section_id", "version", name="uq_revisions_section_id_version"),
+    )
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     section_id = Column(UUID(as_uuid=True), ForeignKey("sections.id"), nullable=False)
     project_id = Column(UUID(as_uuid=True), ForeignKey("projects.id"), nullable=False)
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
     prompt = Column(Text, nullable=False)  # Refinement prompt sent to LLM
-    old_content = Column(Text, nullable=True)
-    new_content = Column(Text, nullable=False)
+    # Content is delta-compressed per section; see app.services.revision_store
+    version = Column(Integer, nullable=False)  # 1, 2, ... per section
+    snapshot = Column(Text, nullable=True)     # Full new content
+    delta = Column(Text, nullable=True)        # New content as an edit of the previous version
+    old_delta = Column(Text, nullable=True)    # Old content as an edit of the new one, if not the previous version
     created_at = Column(DateTime, default=datetime.utcnow)
     
     # Relationships
     section = relationship("Section", back_populates="revisions")
     project = relationship("Project")
     user = relationship("User")
-
+    
+    # (old_content, new_content) once built or rebuilt
+    _contents = None
+    
+    @property
+    def old_content(self):
+        return self._loaded_contents()[0]
+    
+    @property
+    def new_content(self):
+        return self._loaded_contents()[1]
+    
+    def _loaded_contents(self):
+        # Rebuilding needs queries, which an AsyncSession cannot run from
+        # an attribute access
+        if self._contents is None:
+            raise RuntimeError(
+                "Revision contents are not loaded; "
+                "await app.services.revision_store.load_contents(db, revision) first"
+            )
+        return self._contents
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Text, Integer, DateTime, ForeignKey, Enum as SQLEnum
+from sqlalchemy import Column, String, Text, Integer, DateTime, ForeignKey, Index, Enum as SQLEnum
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 import uuid
@@ -12,6 +12,9 @@ class SectionType(str, enum.Enum):
 
 class Section(Base):
     __tablename__ = "sections"
+    __table_args__ = (
+        Index("ix_sections_project_id_order_index", "project_id", "order_index"),
+    )
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     project_id = Column(UUID(as_uuid=True), ForeignKey("projects.id"), nullable=False)
@@ -20,6 +23,10 @@ class Section(Base):
     title = Column(String, nullable=False)  # Section header or slide title
     content = Column(Text, nullable=True)   # Latest refined content
     llm_raw = Column(Text, nullable=True)   # Raw LLM response
+    summary = Column(Text, nullable=True)   # Compact summary used as neighbor context
+    summary_hash = Column(String(64), nullable=True)  # Hash of the content the summary was built from
+    like_count = Column(Integer, nullable=False, default=0, server_default="0")     # Maintained by submit_feedback
+    dislike_count = Column(Integer, nullable=False, default=0, server_default="0")
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
@@ -1,18 +1,24 @@
 from app.schemas.auth import Token, TokenData, UserCreate, UserLogin, UserResponse
-from app.schemas.project import ProjectCreate, ProjectUpdate, ProjectResponse
-from app.schemas.section import SectionCreate, SectionUpdate, SectionResponse
-from app.schemas.generation import GenerateRequest, GenerateResponse
+from app.schemas.project import ProjectCreate, ProjectUpdate, ProjectResponse, ProjectSummary
+from app.schemas.section import SectionCreate, SectionUpdate, SectionBatchItem, SectionBatch, SectionResponse
+from app.schemas.generation import (
+    GenerateRequest, GenerateResponse,
+    GenerateProjectRequest, GenerateProjectResponse, SectionGenerationResult,
+)
 from app.schemas.refinement import RefineRequest, RefineResponse
-from app.schemas.feedback import FeedbackCreate, FeedbackResponse
+from app.schemas.feedback import FeedbackCreate, FeedbackResponse, FeedbackTotals
 from app.schemas.comment import CommentCreate, CommentResponse
+from app.schemas.export import ExportJobResponse
 
 __all__ = [
     "Token", "TokenData", "UserCreate", "UserLogin", "UserResponse",
-    "ProjectCreate", "ProjectUpdate", "ProjectResponse",
-    "SectionCreate", "SectionUpdate", "SectionResponse",
+    "ProjectCreate", "ProjectUpdate", "ProjectResponse", "ProjectSummary",
+    "SectionCreate", "SectionUpdate", "SectionBatchItem", "SectionBatch", "SectionResponse",
     "GenerateRequest", "GenerateResponse",
+    "GenerateProjectRequest", "GenerateProjectResponse", "SectionGenerationResult",
     "RefineRequest", "RefineResponse",
-    "FeedbackCreate", "FeedbackResponse",
+    "FeedbackCreate", "FeedbackResponse", "FeedbackTotals",
     "CommentCreate", "CommentResponse",
+    "ExportJobResponse",
 ]
 
@@ -0,0 +1,22 @@
+from pydantic import BaseModel
+from typing import Optional
+from uuid import UUID
+from datetime import datetime
+from app.models.project import DocumentType
+from app.services.export_jobs import ExportJobStatus
+
+class ExportJobResponse(BaseModel):
+    id: UUID
+    project_id: UUID
+    doc_type: DocumentType
+    status: ExportJobStatus
+    sections_done: int
+    sections_total: int
+    size: Optional[int] = None
+    error: Optional[str] = None
+    created_at: datetime
+    finished_at: Optional[datetime] = None
+    expires_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
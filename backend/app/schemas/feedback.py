@@ -1,4 +1,5 @@
 from pydantic import BaseModel
+from typing import Optional
 from uuid import UUID
 from datetime import datetime
 
@@ -14,7 +15,12 @@ class FeedbackResponse(BaseModel):
     user_id: UUID
     liked: bool
     created_at: datetime
+    updated_at: Optional[datetime] = None
     
     class Config:
         from_attributes = True
 
+class FeedbackTotals(BaseModel):
+    section_id: UUID
+    likes: int
+    dislikes: int
@@ -1,9 +1,11 @@
 from pydantic import BaseModel
+from typing import List, Optional
 from uuid import UUID
 
 class GenerateRequest(BaseModel):
     project_id: UUID
     section_id: UUID
+    bypass_cache: bool = False
 
 class GenerateResponse(BaseModel):
     section_id: UUID
@@ -11,3 +13,21 @@ class GenerateResponse(BaseModel):
     llm_raw: str
     message: str
 
+
+class GenerateProjectRequest(BaseModel):
+    section_ids: Optional[List[UUID]] = None  # Defaults to every section without content
+    batch: bool = False  # Pack several sections into each LLM call
+    bypass_cache: bool = False
+
+class SectionGenerationResult(BaseModel):
+    section_id: UUID
+    success: bool
+    content: Optional[str] = None
+    error: Optional[str] = None
+
+class GenerateProjectResponse(BaseModel):
+    project_id: UUID
+    results: List[SectionGenerationResult]
+    succeeded: int
+    failed: int
+    message: str
@@ -38,3 +38,15 @@ class ProjectResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class ProjectSummary(BaseModel):
+    """Listing card for a project: section counts and titles, no section bodies."""
+    id: UUID
+    user_id: UUID
+    title: str
+    doc_type: DocumentType
+    topic: str
+    created_at: datetime
+    updated_at: datetime
+    section_count: int
+    last_updated_at: datetime  # Latest change to the project or any of its sections
+    section_titles: List[str] = []  # First titles in document order
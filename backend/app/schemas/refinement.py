@@ -5,6 +5,7 @@ class RefineRequest(BaseModel):
     project_id: UUID
     section_id: UUID
     prompt: str
+    bypass_cache: bool = False
 
 class RefineResponse(BaseModel):
     section_id: UUID
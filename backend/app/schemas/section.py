@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 from uuid import UUID
 from datetime import datetime
 
@@ -12,6 +12,16 @@ class SectionUpdate(BaseModel):
     content: Optional[str] = None
     order_index: Optional[int] = None
 
+class SectionBatchItem(BaseModel):
+    id: Optional[UUID] = None  # Omit to create a new section
+    title: Optional[str] = None
+    content: Optional[str] = None
+
+class SectionBatch(BaseModel):
+    # Every surviving section in its new order; list position becomes order_index
+    sections: List[SectionBatchItem]
+    delete: List[UUID] = []
+
 class SectionResponse(BaseModel):
     id: UUID
     project_id: UUID
@@ -0,0 +1,81 @@
+"""Caches of rendered exports and their per-section fragments, keyed by content."""
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Optional
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.services.export_renderer import TEMPLATE_VERSION, ExportDocument
+
+def export_key(document: ExportDocument) -> str:
+    """Content hash of everything that affects the rendered file.
+
+    Also used as the export's strong ETag, so it changes whenever the
+    bytes could: document fields, section order and text, template version.
+    """
+    payload = json.dumps([
+        TEMPLATE_VERSION,
+        document.doc_type.value,
+        document.title,
+        document.topic,
+        [[s.title, s.content] for s in document.sections],
+    ], ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+class ExportCache:
+    """In-process LRU of rendered bytes, bounded by total bytes.
+
+    ``name`` prefixes its metrics.
+    """
+
+    def __init__(self, max_bytes: int, name: str = "export_cache"):
+        self.max_bytes = max_bytes
+        self.name = name
+        self.current_bytes = 0
+        self._entries: "OrderedDict[str, bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def fits(self, size: int) -> bool:
+        return 0 < size <= self.max_bytes
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            data = self._entries.get(key)
+            if data is None:
+                metrics.incr(f"{self.name}.misses")
+                return None
+            self._entries.move_to_end(key)
+        metrics.incr(f"{self.name}.hits")
+        return data
+
+    def set(self, key: str, data: bytes) -> None:
+        if not self.fits(len(data)):
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.current_bytes -= len(old)
+            self._entries[key] = data
+            self.current_bytes += len(data)
+            while self.current_bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.current_bytes -= len(evicted)
+                metrics.incr(f"{self.name}.evictions")
+            metrics.set_gauge(f"{self.name}.bytes", self.current_bytes)
+            metrics.set_gauge(f"{self.name}.entries", len(self._entries))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+            metrics.set_gauge(f"{self.name}.bytes", 0)
+            metrics.set_gauge(f"{self.name}.entries", 0)
+
+export_cache = ExportCache(max_bytes=settings.EXPORT_CACHE_MAX_BYTES)
+
+# Rendered sections shared by all render workers (see export_renderer)
+fragment_cache = ExportCache(max_bytes=settings.EXPORT_FRAGMENT_CACHE_MAX_BYTES, name="export_fragments")
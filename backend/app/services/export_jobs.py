@@ -0,0 +1,193 @@
+"""Background export jobs with polling and download.
+
+Large exports can take longer than a proxy allows for one request, so a
+job renders in the export process pool while the client polls its status
+and then downloads the file. The store is in-process: jobs are asyncio
+tasks, artifacts are files under EXPORT_TMP_DIR/jobs, and nothing
+survives a restart -- enough for a single-process deployment without a
+broker. A job for a project snapshot that is already queued, running or done is
+returned instead of rendering it again.
+"""
+import asyncio
+import enum
+import logging
+import os
+import shutil
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Tuple
+from uuid import UUID, uuid4
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.models.project import DocumentType
+from app.services.export_cache import export_key
+from app.services.export_pool import ExportPoolSaturatedError, export_pool
+from app.services.export_renderer import ExportDocument
+
+logger = logging.getLogger(__name__)
+
+class ExportJobStatus(str, enum.Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+@dataclass
+class ExportJob:
+    id: UUID
+    key: str  # export_key of the snapshot, also the download's ETag
+    user_id: UUID
+    project_id: UUID
+    doc_type: DocumentType
+    filename: str
+    path: str
+    sections_total: int
+    status: ExportJobStatus = ExportJobStatus.QUEUED
+    sections_done: int = 0
+    size: Optional[int] = None
+    error: Optional[str] = None
+    created_at: datetime = field(default_factory=datetime.utcnow)
+    finished_at: Optional[datetime] = None
+    expires_at: Optional[datetime] = None
+
+    @property
+    def snapshot(self) -> Tuple[UUID, UUID, str]:
+        """What a job is deduplicated on."""
+        return self.user_id, self.project_id, self.key
+
+    def progress(self, done: int) -> None:
+        # Called from the pool's progress thread; a report of 0 means a
+        # worker has picked the job up
+        if self.status == ExportJobStatus.QUEUED:
+            self.status = ExportJobStatus.RUNNING
+        self.sections_done = max(self.sections_done, done)
+
+class ExportJobStore:
+    """In-process registry of export jobs and their artifacts."""
+
+    def __init__(self, directory: str, ttl_seconds: float, max_pending: int):
+        self.directory = directory
+        self.ttl_seconds = ttl_seconds
+        self.max_pending = max_pending
+        self._jobs: Dict[UUID, ExportJob] = {}
+        # (user_id, project_id, export_key) -> job; identical content in
+        # another project still gets its own job, filename and project_id
+        self._by_snapshot: Dict[Tuple[UUID, UUID, str], UUID] = {}
+        self._tasks: Dict[UUID, asyncio.Task] = {}
+
+    def __len__(self) -> int:
+        return len(self._jobs)
+
+    @property
+    def pending(self) -> int:
+        return len(self._tasks)
+
+    def _publish(self) -> None:
+        metrics.set_gauge("export_jobs.pending", self.pending)
+        metrics.set_gauge("export_jobs.stored", len(self._jobs))
+
+    def get(self, job_id: UUID, user_id: UUID) -> Optional[ExportJob]:
+        """The caller's job, or None if unknown, someone else's or expired."""
+        self.purge_expired()
+        job = self._jobs.get(job_id)
+        if job is None or job.user_id != user_id:
+            return None
+        return job
+
+    def submit(self, document: ExportDocument, user_id: UUID, project_id: UUID, filename: str) -> ExportJob:
+        """Start rendering ``document``, or return the job already doing so.
+
+        Raises :class:`ExportPoolSaturatedError` when too many jobs are pending.
+        """
+        self.purge_expired()
+        key = export_key(document)
+        existing = self._by_snapshot.get((user_id, project_id, key))
+        if existing is not None:
+            metrics.incr("export_jobs.deduplicated")
+            return self._jobs[existing]
+        if self.pending >= self.max_pending:
+            metrics.incr("export_jobs.rejected")
+            raise ExportPoolSaturatedError()
+
+        job_id = uuid4()
+        job = ExportJob(
+            id=job_id,
+            key=key,
+            user_id=user_id,
+            project_id=project_id,
+            doc_type=document.doc_type,
+            filename=filename,
+            path=os.path.join(self.directory, f"{job_id}.{document.doc_type.value}"),
+            sections_total=len(document.sections)
+        )
+        self._jobs[job_id] = job
+        self._by_snapshot[(user_id, project_id, key)] = job_id
+        task = asyncio.create_task(self._run(job, document))
+        self._tasks[job_id] = task
+        task.add_done_callback(lambda _: self._finished(job_id))
+        metrics.incr("export_jobs.submitted")
+        self._publish()
+        return job
+
+    async def _run(self, job: ExportJob, document: ExportDocument) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        while True:
+            try:
+                result = await export_pool.render_to(document, job.path, on_section=job.progress)
+                break
+            except ExportPoolSaturatedError as exc:
+                # Interactive exports hold the pool; wait for a free slot
+                await asyncio.sleep(exc.retry_after)
+            except Exception:
+                logger.exception("Export job %s failed", job.id)
+                job.status = ExportJobStatus.FAILED
+                job.error = "Export failed"
+                self._by_snapshot.pop(job.snapshot, None)
+                self._expire_later(job)
+                metrics.incr("export_jobs.failed")
+                return
+        job.size = result.size
+        job.sections_done = job.sections_total
+        job.status = ExportJobStatus.DONE
+        self._expire_later(job)
+        metrics.incr("export_jobs.completed")
+
+    def _expire_later(self, job: ExportJob) -> None:
+        job.finished_at = datetime.utcnow()
+        job.expires_at = job.finished_at + timedelta(seconds=self.ttl_seconds)
+
+    def _finished(self, job_id: UUID) -> None:
+        self._tasks.pop(job_id, None)
+        self._publish()
+
+    def _remove(self, job: ExportJob) -> None:
+        self._jobs.pop(job.id, None)
+        if self._by_snapshot.get(job.snapshot) == job.id:
+            del self._by_snapshot[job.snapshot]
+        # Downloads in progress keep their open handle
+        if os.path.exists(job.path):
+            os.unlink(job.path)
+
+    def purge_expired(self) -> None:
+        now = datetime.utcnow()
+        expired = [job for job in self._jobs.values() if job.expires_at and job.expires_at <= now]
+        for job in expired:
+            self._remove(job)
+            metrics.incr("export_jobs.expired")
+        if expired:
+            self._publish()
+
+    def shutdown(self) -> None:
+        """Cancel running jobs and delete every artifact."""
+        for task in list(self._tasks.values()):
+            task.cancel()
+        self._jobs.clear()
+        self._by_snapshot.clear()
+        shutil.rmtree(self.directory, ignore_errors=True)
+        self._publish()
+
+export_jobs = ExportJobStore(
+    directory=os.path.join(settings.EXPORT_TMP_DIR, "jobs"),
+    ttl_seconds=settings.EXPORT_JOB_TTL_SECONDS,
+    max_pending=settings.EXPORT_JOB_MAX_PENDING
+)
@@ -0,0 +1,297 @@
+"""Bounded process pool for rendering exports off the event loop.
+
+Rendering a large document is seconds of CPU-bound Python; on the event
+loop it would stall every other request on the worker. Jobs receive an
+:class:`ExportDocument` (plain picklable data) and return the file bytes,
+or -- above EXPORT_SPOOL_MAX_BYTES -- the path of a temp file the caller
+unlinks as soon as it has opened it.
+
+At most ``max_workers`` renders run at once and ``max_queue`` more may
+wait; beyond that :class:`ExportPoolSaturatedError` is raised at once
+(mapped to 429) instead of letting latency grow without bound.
+
+Workers report sections rendered over a queue handed to them at start-up;
+a thread in the parent passes each report to the caller's callback.
+
+Section fragments live in the parent's ``fragment_cache``: each job is
+sent the cached fragments of its document and returns the ones it had to
+render, so any worker can reuse sections another one rendered.
+"""
+import asyncio
+import io
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from typing import Callable, Dict, Mapping, Optional
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.services.export_cache import fragment_cache
+from app.services.export_renderer import ExportDocument, fragment_keys, render
+
+# Upper bounds (seconds) of the queue wait and render time histograms
+EXPORT_TIME_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+class ExportPoolSaturatedError(Exception):
+    """Every worker is busy and the queue is full."""
+
+    def __init__(self, retry_after: float = 1.0):
+        super().__init__("Export capacity exhausted, please retry shortly")
+        self.retry_after = retry_after
+
+@dataclass(frozen=True)
+class RenderedExport:
+    size: int
+    data: Optional[bytes] = None  # The file, when small enough to return inline
+    path: Optional[str] = None    # Otherwise a temp file owned by the caller
+    started_at: float = 0.0       # Wall clock when a worker picked the job up
+    fragments: Optional[Dict[str, bytes]] = None  # Fragments the worker rendered
+
+# Set in each worker process by _init_worker
+_progress_queue = None
+
+def _init_worker(queue) -> None:
+    global _progress_queue
+    _progress_queue = queue
+
+def _reporter(task_id: Optional[str]):
+    if task_id is None or _progress_queue is None:
+        return None
+    return lambda done: _progress_queue.put((task_id, done))
+
+def render_export(
+    document: ExportDocument,
+    spool_max_bytes: int,
+    spool_dir: str,
+    fragments: Optional[Mapping[str, bytes]] = None
+) -> RenderedExport:
+    """Worker entry point: render ``document`` in this process."""
+    started_at = time.time()
+    buffer = io.BytesIO()
+    rendered = render(document, buffer, fragments=fragments)
+    size = buffer.tell()
+    if size <= spool_max_bytes:
+        return RenderedExport(size=size, data=buffer.getvalue(), started_at=started_at, fragments=rendered)
+    os.makedirs(spool_dir, exist_ok=True)
+    with tempfile.NamedTemporaryFile(dir=spool_dir, suffix=".export", delete=False) as f:
+        f.write(buffer.getbuffer())
+    return RenderedExport(size=size, path=f.name, started_at=started_at, fragments=rendered)
+
+def render_export_to(
+    document: ExportDocument,
+    path: str,
+    task_id: Optional[str] = None,
+    fragments: Optional[Mapping[str, bytes]] = None
+) -> RenderedExport:
+    """Worker entry point: render ``document`` into the file ``path``.
+
+    The file only appears once complete, so a reader never sees a partial one.
+    """
+    started_at = time.time()
+    report = _reporter(task_id)
+    if report:
+        report(0)
+    partial = f"{path}.part"
+    try:
+        with open(partial, "wb") as f:
+            rendered = render(document, f, on_section=report, fragments=fragments)
+            size = f.tell()
+        os.replace(partial, path)
+    except BaseException:
+        if os.path.exists(partial):
+            os.unlink(partial)
+        raise
+    return RenderedExport(size=size, path=path, started_at=started_at, fragments=rendered)
+
+@dataclass
+class _Slot:
+    """One admitted job; guarded by ``ExportPool._lock``."""
+    released: bool = False   # The worker is done with it
+    abandoned: bool = False  # Its caller was cancelled
+
+def _discard_result(future: Future) -> None:
+    """Delete the file of a result nobody will read."""
+    if future.cancelled() or future.exception() is not None:
+        return
+    path = getattr(future.result(), "path", None)
+    if path is not None:
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+
+def _cached_fragments(document: ExportDocument) -> Dict[str, bytes]:
+    cached = {}
+    for key in fragment_keys(document):
+        fragment = fragment_cache.get(key)
+        if fragment is not None:
+            cached[key] = fragment
+    return cached
+
+class ExportPool:
+    """Process pool with a hard cap on admitted jobs."""
+
+    def __init__(self, max_workers: int, max_queue: int):
+        self.max_workers = max(1, max_workers)
+        self.max_queue = max(0, max_queue)
+        self.in_flight = 0
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._progress_queue = None
+        self._listeners: Dict[str, Callable[[int], None]] = {}
+        self._lock = threading.Lock()
+        self._publish()
+
+    @property
+    def capacity(self) -> int:
+        return self.max_workers + self.max_queue
+
+    def _publish(self) -> None:
+        busy = min(self.in_flight, self.max_workers)
+        metrics.set_gauge("export_pool.workers", self.max_workers)
+        metrics.set_gauge("export_pool.busy", busy)
+        metrics.set_gauge("export_pool.queued", self.in_flight - busy)
+        metrics.set_gauge("export_pool.utilization", busy / self.max_workers)
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # Fresh interpreters: forking a process that runs an event
+                # loop and connection pools is not safe
+                context = multiprocessing.get_context("spawn")
+                self._progress_queue = context.Queue()
+                threading.Thread(
+                    target=self._dispatch_progress,
+                    args=(self._progress_queue,),
+                    name="export-progress",
+                    daemon=True
+                ).start()
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=context,
+                    initializer=_init_worker,
+                    initargs=(self._progress_queue,)
+                )
+            return self._executor
+
+    def _dispatch_progress(self, queue) -> None:
+        # Runs until _discard sends None
+        while (report := queue.get()) is not None:
+            task_id, done = report
+            listener = self._listeners.get(task_id)
+            if listener is not None:
+                listener(done)
+
+    def _discard(self, executor: Optional[ProcessPoolExecutor] = None) -> None:
+        """Drop the current executor (only if it is still ``executor``, when given)."""
+        with self._lock:
+            if executor is not None and self._executor is not executor:
+                return
+            old, self._executor = self._executor, None
+            queue, self._progress_queue = self._progress_queue, None
+        if old is not None:
+            old.shutdown(wait=False, cancel_futures=True)
+        if queue is not None:
+            queue.put(None)
+
+    async def run(self, fn, *args):
+        """Run ``fn(*args)`` in a worker process, or refuse when saturated.
+
+        The slot is held until the worker is done, not until the caller
+        stops waiting: a cancelled request (e.g. a client disconnect) does
+        not stop a render that has started, so it still counts as load.
+        """
+        with self._lock:
+            if self.in_flight >= self.capacity:
+                metrics.incr("export_pool.rejected")
+                raise ExportPoolSaturatedError()
+            self.in_flight += 1
+            self._publish()
+        slot = _Slot()
+        try:
+            executor = self._get_executor()
+            future = executor.submit(fn, *args)
+        except BaseException:
+            self._release(slot, None)
+            raise
+        future.add_done_callback(lambda done: self._release(slot, done))
+        try:
+            return await asyncio.wrap_future(future)
+        except BrokenProcessPool:
+            # A worker died (e.g. OOM-killed); start a fresh pool next time
+            self._discard(executor)
+            raise
+        except asyncio.CancelledError:
+            with self._lock:
+                slot.abandoned = True
+                released = slot.released
+            if released:
+                _discard_result(future)
+            raise
+
+    def _release(self, slot: "_Slot", future: Optional[Future]) -> None:
+        # Runs when the work finishes, on the executor's management thread
+        with self._lock:
+            self.in_flight -= 1
+            self._publish()
+            slot.released = True
+            abandoned = slot.abandoned
+        if abandoned and future is not None:
+            _discard_result(future)
+
+    async def render(self, document: ExportDocument) -> RenderedExport:
+        """Render to bytes, or to a temp file above EXPORT_SPOOL_MAX_BYTES."""
+        return await self._timed(
+            render_export,
+            document,
+            settings.EXPORT_SPOOL_MAX_BYTES,
+            settings.EXPORT_TMP_DIR,
+            _cached_fragments(document)
+        )
+
+    async def render_to(
+        self,
+        document: ExportDocument,
+        path: str,
+        on_section: Optional[Callable[[int], None]] = None
+    ) -> RenderedExport:
+        """Render into ``path``, calling ``on_section`` as sections complete.
+
+        The callback runs on the progress thread, not the event loop.
+        """
+        task_id = uuid.uuid4().hex
+        if on_section is not None:
+            self._listeners[task_id] = on_section
+        try:
+            return await self._timed(render_export_to, document, path, task_id, _cached_fragments(document))
+        finally:
+            self._listeners.pop(task_id, None)
+
+    async def _timed(self, fn, *args) -> RenderedExport:
+        submitted = time.time()
+        try:
+            result = await self.run(fn, *args)
+        except ExportPoolSaturatedError:
+            raise
+        except Exception:
+            metrics.incr("export_pool.failed")
+            raise
+        finished = time.time()
+        for key, fragment in (result.fragments or {}).items():
+            fragment_cache.set(key, fragment)
+        metrics.incr("export_pool.completed")
+        metrics.observe("export_pool.queue_wait_seconds", max(0.0, result.started_at - submitted), EXPORT_TIME_BUCKETS)
+        metrics.observe("export_pool.render_seconds", max(0.0, finished - result.started_at), EXPORT_TIME_BUCKETS)
+        return result
+
+    def shutdown(self) -> None:
+        self._discard()
+
+export_pool = ExportPool(
+    max_workers=settings.EXPORT_WORKERS,
+    max_queue=settings.EXPORT_QUEUE_LIMIT
+)
@@ -0,0 +1,290 @@
+"""Render projects to Word and PowerPoint files.
+
+Renderers work on an :class:`ExportDocument` -- plain, immutable data
+copied out of the ORM -- so they need no database session and can run
+away from the request that asked for them.
+
+The title and each section are rendered on their own into an OOXML
+fragment -- the paragraphs of a Word section, or a whole slide -- and the
+file is assembled from the fragments and a blank package of the template.
+Fragments are keyed by :func:`fragment_keys` (content hash plus
+TEMPLATE_VERSION), so a caller holding the fragments of an earlier export
+only pays python-docx/python-pptx for the sections that changed.
+"""
+import hashlib
+import io
+import json
+import re
+import zipfile
+from dataclasses import dataclass
+from typing import BinaryIO, Callable, Dict, Iterable, List, Mapping, Optional, Tuple
+from docx import Document
+from lxml import etree
+from pptx import Presentation
+from pptx.util import Inches, Pt
+from app.models.project import DocumentType
+
+MEDIA_TYPES = {
+    DocumentType.DOCX: "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    DocumentType.PPTX: "application/vnd.openxmlformats-officedocument.presentationml.presentation",
+}
+
+MISSING_CONTENT = "[Content not generated]"
+
+# Called with the number of sections rendered so far
+ProgressCallback = Optional[Callable[[int], None]]
+
+# Bump whenever rendering output changes, so cached artifacts are not reused
+TEMPLATE_VERSION = 2
+
+@dataclass(frozen=True)
+class ExportSection:
+    title: str
+    content: Optional[str] = None
+
+@dataclass(frozen=True)
+class ExportDocument:
+    doc_type: DocumentType
+    title: str
+    topic: str
+    sections: Tuple[ExportSection, ...]
+
+    @classmethod
+    def from_project(cls, project, sections: Iterable) -> "ExportDocument":
+        """Snapshot a project and its ordered sections."""
+        return cls(
+            doc_type=project.doc_type,
+            title=project.title,
+            topic=project.topic,
+            sections=tuple(ExportSection(s.title, s.content) for s in sections)
+        )
+
+def fragment_keys(document: ExportDocument) -> List[str]:
+    """Cache keys of the document's fragments: the title, then each section."""
+    parts = [["title", document.title, document.topic]]
+    parts.extend(["section", s.title, s.content] for s in document.sections)
+    return [
+        hashlib.sha256(json.dumps(
+            [TEMPLATE_VERSION, document.doc_type.value] + part,
+            ensure_ascii=False, separators=(",", ":")
+        ).encode("utf-8")).hexdigest()
+        for part in parts
+    ]
+
+# Word
+
+def _add_docx_title(doc, document: ExportDocument) -> None:
+    doc.add_heading(document.title, 0)
+
+def _add_docx_section(doc, section: ExportSection) -> None:
+    doc.add_heading(section.title, level=1)
+
+    if section.content:
+        # Blank lines separate paragraphs
+        for para in section.content.split('\n\n'):
+            if para.strip():
+                doc.add_paragraph(para.strip())
+    else:
+        doc.add_paragraph(MISSING_CONTENT)
+
+# lxml repeats every namespace of the document root on a serialized child;
+# the root of the assembled document declares them all already
+_XMLNS = re.compile(rb'\s+xmlns:\w+="[^"]*"')
+
+def _body_fragment(elements) -> bytes:
+    parts = []
+    for element in elements:
+        xml = etree.tostring(element)
+        end = xml.index(b">")
+        parts.append(_XMLNS.sub(b"", xml[:end]) + xml[end:])
+    return b"".join(parts)
+
+class _DocxFragments:
+    """Renders fragments into one scratch document, created on first use."""
+
+    def __init__(self):
+        self._doc = None
+
+    def _render(self, add) -> bytes:
+        if self._doc is None:
+            self._doc = Document()
+        body = self._doc.element.body
+        start = len(body) - 1  # New paragraphs go before the final sectPr
+        add(self._doc)
+        added = list(body)[start:-1]
+        fragment = _body_fragment(added)
+        for element in added:
+            body.remove(element)
+        return fragment
+
+    def title(self, document: ExportDocument) -> bytes:
+        return self._render(lambda doc: _add_docx_title(doc, document))
+
+    def section(self, section: ExportSection) -> bytes:
+        return self._render(lambda doc: _add_docx_section(doc, section))
+
+def _blank_docx():
+    return Document()
+
+def _assemble_docx(skeleton: "_Skeleton", fragments: List[bytes], package: zipfile.ZipFile) -> None:
+    xml = skeleton.parts["word/document.xml"]
+    body = xml.index(b"<w:body>") + len(b"<w:body>")
+    package.writestr("word/document.xml", b"".join([xml[:body]] + fragments + [xml[body:]]))
+
+# PowerPoint
+
+def _add_pptx_title(prs, document: ExportDocument):
+    slide = prs.slides.add_slide(prs.slide_layouts[0])
+    slide.shapes.title.text = document.title
+    slide.placeholders[1].text = document.topic
+    return slide
+
+def _add_pptx_section(prs, section: ExportSection):
+    slide = prs.slides.add_slide(prs.slide_layouts[1])
+    slide.shapes.title.text = section.title
+
+    tf = slide.shapes.placeholders[1].text_frame
+    tf.text = section.content or MISSING_CONTENT
+    for paragraph in tf.paragraphs:
+        paragraph.font.size = Pt(14)
+    return slide
+
+def _blank_pptx():
+    prs = Presentation()
+    prs.slide_width = Inches(10)
+    prs.slide_height = Inches(7.5)
+    return prs
+
+class _PptxFragments:
+    """Renders slides into one scratch presentation, created on first use."""
+
+    def __init__(self):
+        self._prs = None
+
+    def _render(self, add) -> bytes:
+        if self._prs is None:
+            self._prs = _blank_pptx()
+        return add(self._prs).part.blob
+
+    def title(self, document: ExportDocument) -> bytes:
+        return self._render(lambda prs: _add_pptx_title(prs, document))
+
+    def section(self, section: ExportSection) -> bytes:
+        return self._render(lambda prs: _add_pptx_section(prs, section))
+
+# A slide's only relationship is its layout: 1 for the title, 2 for sections
+_SLIDE_RELS = (
+    "<?xml version='1.0' encoding='UTF-8' standalone='yes'?>\n"
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/slideLayout"'
+    ' Target="../slideLayouts/slideLayout{layout}.xml"/></Relationships>'
+)
+_SLIDE_TYPE = "application/vnd.openxmlformats-officedocument.presentationml.slide+xml"
+_SLIDE_REL_TYPE = "http://schemas.openxmlformats.org/officeDocument/2006/relationships/slide"
+_RID = re.compile(rb'Id="rId(\d+)"')
+
+def _assemble_pptx(skeleton: "_Skeleton", fragments: List[bytes], package: zipfile.ZipFile) -> None:
+    rels = skeleton.parts["ppt/_rels/presentation.xml.rels"]
+    first_rid = max(int(n) for n in _RID.findall(rels)) + 1
+    overrides, relationships, slide_ids = [], [], []
+    for number, fragment in enumerate(fragments, start=1):
+        package.writestr(f"ppt/slides/slide{number}.xml", fragment)
+        package.writestr(
+            f"ppt/slides/_rels/slide{number}.xml.rels",
+            _SLIDE_RELS.format(layout=1 if number == 1 else 2)
+        )
+        rid = f"rId{first_rid + number - 1}"
+        overrides.append(f'<Override PartName="/ppt/slides/slide{number}.xml" ContentType="{_SLIDE_TYPE}"/>')
+        relationships.append(f'<Relationship Id="{rid}" Type="{_SLIDE_REL_TYPE}" Target="slides/slide{number}.xml"/>')
+        slide_ids.append(f'<p:sldId id="{255 + number}" r:id="{rid}"/>')
+
+    content_types = skeleton.parts["[Content_Types].xml"]
+    package.writestr("[Content_Types].xml", content_types.replace(
+        b"</Types>", "".join(overrides).encode() + b"</Types>"
+    ))
+    package.writestr("ppt/_rels/presentation.xml.rels", rels.replace(
+        b"</Relationships>", "".join(relationships).encode() + b"</Relationships>"
+    ))
+    presentation = skeleton.parts["ppt/presentation.xml"]
+    package.writestr("ppt/presentation.xml", presentation.replace(
+        b"</p:sldMasterIdLst>",
+        b"</p:sldMasterIdLst><p:sldIdLst>" + "".join(slide_ids).encode() + b"</p:sldIdLst>"
+    ))
+
+# Packages
+
+@dataclass(frozen=True)
+class _Format:
+    blank: Callable
+    fragments: Callable
+    assemble: Callable
+    parts: Tuple[str, ...]  # Parts rewritten for every document
+
+FORMATS = {
+    DocumentType.DOCX: _Format(_blank_docx, _DocxFragments, _assemble_docx, ("word/document.xml",)),
+    DocumentType.PPTX: _Format(_blank_pptx, _PptxFragments, _assemble_pptx, (
+        "[Content_Types].xml", "ppt/presentation.xml", "ppt/_rels/presentation.xml.rels"
+    )),
+}
+
+@dataclass(frozen=True)
+class _Skeleton:
+    package: bytes            # Every unchanging part, already compressed
+    parts: Dict[str, bytes]   # The blank versions of the parts rewritten per document
+
+_skeletons: Dict[DocumentType, _Skeleton] = {}
+
+def _skeleton(doc_type: DocumentType) -> _Skeleton:
+    """The blank template package, built once per process."""
+    if doc_type not in _skeletons:
+        fmt = FORMATS[doc_type]
+        blank = io.BytesIO()
+        fmt.blank().save(blank)
+        parts = {}
+        package = io.BytesIO()
+        with zipfile.ZipFile(blank) as source, zipfile.ZipFile(package, "w", zipfile.ZIP_DEFLATED) as target:
+            for info in source.infolist():
+                if info.filename in fmt.parts:
+                    parts[info.filename] = source.read(info)
+                else:
+                    target.writestr(info.filename, source.read(info))
+        _skeletons[doc_type] = _Skeleton(package=package.getvalue(), parts=parts)
+    return _skeletons[doc_type]
+
+def render(
+    document: ExportDocument,
+    out: BinaryIO,
+    on_section: ProgressCallback = None,
+    fragments: Optional[Mapping[str, bytes]] = None
+) -> Dict[str, bytes]:
+    """Write ``document`` to the binary stream ``out``.
+
+    ``fragments`` maps :func:`fragment_keys` to fragments of earlier
+    renders; only the others are rendered, and those are returned.
+    """
+    fmt = FORMATS[document.doc_type]
+    fragments = fragments or {}
+    renderer = fmt.fragments()
+    keys = fragment_keys(document)
+    rendered: Dict[str, bytes] = {}
+
+    def fragment(key: str, make) -> bytes:
+        if key in fragments:
+            return fragments[key]
+        if key not in rendered:
+            rendered[key] = make()
+        return rendered[key]
+
+    parts = [fragment(keys[0], lambda: renderer.title(document))]
+    for done, (key, section) in enumerate(zip(keys[1:], document.sections), start=1):
+        parts.append(fragment(key, lambda: renderer.section(section)))
+        if on_section:
+            on_section(done)
+
+    # Appending to a copy of the skeleton reuses its compressed parts as-is
+    skeleton = _skeleton(document.doc_type)
+    buffer = io.BytesIO(skeleton.package)
+    with zipfile.ZipFile(buffer, "a", zipfile.ZIP_DEFLATED) as package:
+        fmt.assemble(skeleton, parts, package)
+    out.write(buffer.getbuffer())
+    return rendered
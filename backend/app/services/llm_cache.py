@@ -0,0 +1,160 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional, Tuple
+from app.core.config import settings
+from app.core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+def make_cache_key(
+    provider: str,
+    model: str,
+    temperature: float,
+    max_tokens: int,
+    prompt: str
+) -> str:
+    """Content-addressed key for a completion request."""
+    prompt_hash = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+    raw = f"{provider}|{model}|{temperature!r}|{max_tokens}|{prompt_hash}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+class MemoryCacheTier:
+    """In-process LRU tier bounded by total bytes, with per-entry TTL."""
+
+    def __init__(self, max_bytes: int, ttl_seconds: float):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.current_bytes = 0
+        self._entries: "OrderedDict[str, Tuple[str, float, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at, size = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                self.current_bytes -= size
+                metrics.incr("llm_cache.expired")
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str) -> None:
+        size = len(value.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.current_bytes -= old[2]
+            self._entries[key] = (value, time.monotonic() + self.ttl_seconds, size)
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes:
+                _, (_, _, evicted_size) = self._entries.popitem(last=False)
+                self.current_bytes -= evicted_size
+                metrics.incr("llm_cache.evictions")
+            metrics.set_gauge("llm_cache.memory_bytes", self.current_bytes)
+            metrics.set_gauge("llm_cache.memory_entries", len(self._entries))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+class DiskCacheTier:
+    """Shared tier on local disk, visible to every worker on the host."""
+
+    def __init__(self, directory: str, ttl_seconds: float):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.ttl_seconds = ttl_seconds
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.json"
+
+    def get(self, key: str) -> Optional[str]:
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if entry.get("expires_at", 0) <= time.time():
+            try:
+                path.unlink()
+            except OSError:
+                pass
+            metrics.incr("llm_cache.expired")
+            return None
+        return entry.get("value")
+
+    def set(self, key: str, value: str) -> None:
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"value": value, "expires_at": time.time() + self.ttl_seconds}, f)
+        # Atomic rename so concurrent readers never see a partial entry
+        os.replace(tmp_path, path)
+
+class LLMResponseCache:
+    """Two-tier completion cache: in-process LRU, then optional disk tier."""
+
+    def __init__(
+        self,
+        max_bytes: int,
+        ttl_seconds: float,
+        directory: Optional[str] = None
+    ):
+        self.memory = MemoryCacheTier(max_bytes, ttl_seconds)
+        self.disk = DiskCacheTier(directory, ttl_seconds) if directory else None
+
+    async def get(self, key: str) -> Optional[str]:
+        value = self.memory.get(key)
+        if value is not None:
+            metrics.incr("llm_cache.hits")
+            return value
+        if self.disk is not None:
+            try:
+                value = await asyncio.to_thread(self.disk.get, key)
+            except Exception as e:
+                logger.warning(f"LLM disk cache read failed: {str(e)}")
+                value = None
+            if value is not None:
+                self.memory.set(key, value)
+                metrics.incr("llm_cache.hits")
+                metrics.incr("llm_cache.disk_hits")
+                return value
+        metrics.incr("llm_cache.misses")
+        return None
+
+    async def set(self, key: str, value: str) -> None:
+        self.memory.set(key, value)
+        if self.disk is not None:
+            try:
+                await asyncio.to_thread(self.disk.set, key, value)
+            except Exception as e:
+                logger.warning(f"LLM disk cache write failed: {str(e)}")
+
+def build_response_cache() -> Optional[LLMResponseCache]:
+    """Create the response cache from settings, or None when disabled."""
+    if not settings.LLM_CACHE_ENABLED:
+        return None
+    return LLMResponseCache(
+        max_bytes=settings.LLM_CACHE_MAX_BYTES,
+        ttl_seconds=settings.LLM_CACHE_TTL_SECONDS,
+        directory=settings.LLM_CACHE_DIR or None,
+    )
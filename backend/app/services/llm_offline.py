@@ -0,0 +1,299 @@
+import asyncio
+import hashlib
+import json
+import logging
+import math
+import os
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from typing import AsyncIterator, Dict, List, Optional
+from app.core.config import settings
+from app.services.llm_providers import LLMProvider
+
+logger = logging.getLogger(__name__)
+
+# Vocabulary for synthetic completions; only the length and timing matter
+SYNTHETIC_WORDS = (
+    "the platform delivers measurable value across teams by aligning strategy "
+    "with execution while data driven insights improve planning quality and "
+    "reduce operational risk for every stakeholder involved in the program"
+).split()
+
+# Words per streamed chunk for synthetic and replayed streams
+STREAM_CHUNK_WORDS = 8
+
+class SyntheticProviderError(Exception):
+    """Injected provider failure; carries a status code like the SDK errors."""
+
+    def __init__(self, status_code: int = 503):
+        super().__init__(f"Synthetic provider error (HTTP {status_code})")
+        self.status_code = status_code
+
+class CassetteMissError(Exception):
+    """A replayed prompt has no recorded completion."""
+
+    status_code = 404
+
+def cassette_key(prompt: str, temperature: float, max_tokens: Optional[int]) -> str:
+    """Identity of a recorded request."""
+    payload = json.dumps([prompt, temperature, max_tokens], separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def _chunks(text: str) -> List[str]:
+    """Split text into word groups that concatenate back to ``text``."""
+    words = text.split(" ")
+    return [
+        " ".join(words[i:i + STREAM_CHUNK_WORDS]) + (" " if i + STREAM_CHUNK_WORDS < len(words) else "")
+        for i in range(0, len(words), STREAM_CHUNK_WORDS)
+    ]
+
+class Cassette:
+    """Prompt -> completion recordings stored as JSON lines.
+
+    Each line holds the request, the completion and how long the live call
+    took. A prompt recorded several times replays its completions in turn.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._entries: Dict[str, List[dict]] = {}
+        self._cursor: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            self._load()
+
+    def _load(self) -> None:
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line_number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    logger.warning(f"Skipping malformed cassette line {line_number} in {self.path}")
+                    continue
+                self._entries.setdefault(entry["key"], []).append(entry)
+
+    def __len__(self) -> int:
+        return sum(len(entries) for entries in self._entries.values())
+
+    def lookup(self, key: str) -> Optional[dict]:
+        with self._lock:
+            entries = self._entries.get(key)
+            if not entries:
+                return None
+            index = self._cursor.get(key, 0)
+            self._cursor[key] = index + 1
+            return entries[index % len(entries)]
+
+    def append(self, entry: dict) -> None:
+        with self._lock:
+            self._entries.setdefault(entry["key"], []).append(entry)
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry) + "\n")
+
+class SyntheticProvider(LLMProvider):
+    """Generates filler completions with configurable size, latency and errors.
+
+    Latency is drawn from a log-normal distribution around the configured
+    median, so runs show a realistic tail. Completion text depends only on
+    the prompt, which keeps cache and single-flight behaviour the same as
+    with a real model.
+    """
+
+    name = "synthetic"
+    model = "synthetic"
+    default_max_tokens = 1000
+
+    def __init__(
+        self,
+        completion_tokens: int,
+        latency_ms: float,
+        latency_sigma: float,
+        error_rate: float,
+        seed: Optional[int] = None
+    ):
+        self.completion_tokens = completion_tokens
+        self.latency_ms = latency_ms
+        self.latency_sigma = latency_sigma
+        self.error_rate = error_rate
+        self._random = random.Random(seed)
+
+    def sample_latency(self) -> float:
+        """Seconds the next call should take."""
+        if self.latency_ms <= 0:
+            return 0.0
+        median = self.latency_ms / 1000
+        if self.latency_sigma <= 0:
+            return median
+        return self._random.lognormvariate(math.log(median), self.latency_sigma)
+
+    def completion_for(self, prompt: str, max_tokens: Optional[int]) -> str:
+        length = min(self.completion_tokens, max_tokens or self.default_max_tokens)
+        offset = int(hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:8], 16)
+        return " ".join(
+            SYNTHETIC_WORDS[(offset + i) % len(SYNTHETIC_WORDS)]
+            for i in range(max(1, length))
+        )
+
+    def _maybe_fail(self) -> None:
+        if self.error_rate > 0 and self._random.random() < self.error_rate:
+            raise SyntheticProviderError(503)
+
+    async def generate(
+        self,
+        prompt: str,
+        temperature: float = 0.7,
+        max_tokens: Optional[int] = None
+    ) -> str:
+        await asyncio.sleep(self.sample_latency())
+        self._maybe_fail()
+        return self.completion_for(prompt, max_tokens)
+
+    async def stream(
+        self,
+        prompt: str,
+        temperature: float = 0.7,
+        max_tokens: Optional[int] = None
+    ) -> AsyncIterator[str]:
+        chunks = _chunks(self.completion_for(prompt, max_tokens))
+        delay = self.sample_latency() / len(chunks)
+        self._maybe_fail()
+        for chunk in chunks:
+            await asyncio.sleep(delay)
+            yield chunk
+
+class ReplayProvider(LLMProvider):
+    """Answers from a cassette without touching the network.
+
+    A prompt missing from the cassette raises CassetteMissError, or is
+    answered by ``fallback`` when one is given. With ``realtime`` set, each
+    answer takes as long as the recorded live call did.
+    """
+
+    name = "replay"
+    model = "cassette"
+    default_max_tokens = 1000
+
+    def __init__(self, cassette: Cassette, fallback: Optional[LLMProvider] = None, realtime: bool = False):
+        self.cassette = cassette
+        self.fallback = fallback
+        self.realtime = realtime
+
+    def _lookup(self, prompt: str, temperature: float, max_tokens: Optional[int]) -> Optional[dict]:
+        entry = self.cassette.lookup(cassette_key(prompt, temperature, max_tokens))
+        if entry is None and self.fallback is None:
+            raise CassetteMissError(f"No recorded completion for prompt {prompt[:60]!r}")
+        return entry
+
+    async def generate(
+        self,
+        prompt: str,
+        temperature: float = 0.7,
+        max_tokens: Optional[int] = None
+    ) -> str:
+        entry = self._lookup(prompt, temperature, max_tokens)
+        if entry is None:
+            return await self.fallback.generate(prompt, temperature=temperature, max_tokens=max_tokens)
+        if self.realtime:
+            await asyncio.sleep(entry.get("latency_ms", 0) / 1000)
+        return entry["completion"]
+
+    async def stream(
+        self,
+        prompt: str,
+        temperature: float = 0.7,
+        max_tokens: Optional[int] = None
+    ) -> AsyncIterator[str]:
+        entry = self._lookup(prompt, temperature, max_tokens)
+        if entry is None:
+            upstream = self.fallback.stream(prompt, temperature=temperature, max_tokens=max_tokens)
+            try:
+                async for chunk in upstream:
+                    yield chunk
+            finally:
+                await upstream.aclose()
+            return
+        chunks = _chunks(entry["completion"])
+        delay = entry.get("latency_ms", 0) / 1000 / len(chunks) if self.realtime else 0
+        for chunk in chunks:
+            await asyncio.sleep(delay)
+            yield chunk
+
+class RecordingProvider(LLMProvider):
+    """Passes calls through to a live provider and records them to a cassette.
+
+    Takes the wrapped provider's name and model so rate limits, breakers
+    and cache keys behave exactly as they would without recording. Only
+    successful, complete answers are recorded.
+    """
+
+    def __init__(self, inner: LLMProvider, cassette: Cassette):
+        self.inner = inner
+        self.cassette = cassette
+        self.name = inner.name
+        self.model = inner.model
+        self.default_max_tokens = inner.default_max_tokens
+        self.api_key = getattr(inner, "api_key", "")
+
+    def _record(
+        self,
+        prompt: str,
+        temperature: float,
+        max_tokens: Optional[int],
+        completion: str,
+        started: float
+    ) -> None:
+        self.cassette.append({
+            "key": cassette_key(prompt, temperature, max_tokens),
+            "provider": self.inner.name,
+            "model": self.inner.model,
+            "prompt": prompt,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+            "completion": completion,
+            "latency_ms": round((time.monotonic() - started) * 1000, 1),
+            "recorded_at": datetime.now(timezone.utc).isoformat(),
+        })
+
+    async def generate(
+        self,
+        prompt: str,
+        temperature: float = 0.7,
+        max_tokens: Optional[int] = None
+    ) -> str:
+        started = time.monotonic()
+        completion = await self.inner.generate(prompt, temperature=temperature, max_tokens=max_tokens)
+        self._record(prompt, temperature, max_tokens, completion, started)
+        return completion
+
+    async def stream(
+        self,
+        prompt: str,
+        temperature: float = 0.7,
+        max_tokens: Optional[int] = None
+    ) -> AsyncIterator[str]:
+        started = time.monotonic()
+        chunks = []
+        upstream = self.inner.stream(prompt, temperature=temperature, max_tokens=max_tokens)
+        try:
+            async for chunk in upstream:
+                chunks.append(chunk)
+                yield chunk
+        finally:
+            await upstream.aclose()
+        self._record(prompt, temperature, max_tokens, "".join(chunks).strip(), started)
+
+def create_synthetic_provider() -> SyntheticProvider:
+    return SyntheticProvider(
+        completion_tokens=settings.LLM_SYNTHETIC_TOKENS,
+        latency_ms=settings.LLM_SYNTHETIC_LATENCY_MS,
+        latency_sigma=settings.LLM_SYNTHETIC_LATENCY_SIGMA,
+        error_rate=settings.LLM_SYNTHETIC_ERROR_RATE,
+        seed=settings.LLM_SYNTHETIC_SEED or None
+    )
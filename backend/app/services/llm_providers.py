@@ -0,0 +1,182 @@
+import logging
+from typing import AsyncIterator, Optional
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+class LLMProvider:
+    """Base class for asynchronous LLM provider adapters."""
+
+    name: str = ""
+    model: str = ""
+    default_max_tokens: int = 1000
+
+    async def generate(
+        self,
+        prompt: str,
+        temperature: float = 0.7,
+        max_tokens: Optional[int] = None
+    ) -> str:
+        """Return the completion for a prompt without blocking the event loop."""
+        raise NotImplementedError
+    
+    async def stream(
+        self,
+        prompt: str,
+        temperature: float = 0.7,
+        max_tokens: Optional[int] = None
+    ) -> AsyncIterator[str]:
+        """Yield completion text chunks as the provider produces them.
+        
+        Closing the generator early must release the upstream call.
+        """
+        raise NotImplementedError
+        yield
+
+class GeminiProvider(LLMProvider):
+    """Gemini adapter using the SDK's native async transport."""
+
+    name = "gemini"
+    model = "models/gemini-2.0-flash"
+    default_max_tokens = 2048
+
+    def __init__(self, api_key: str):
+        self.api_key = api_key
+        self._model = None
+
+    def _get_model(self):
+        """Lazy initialization of Gemini model."""
+        if self._model is None:
+            import google.generativeai as genai
+            genai.configure(api_key=self.api_key)
+            # Use the correct model name - models/gemini-2.0-flash is confirmed working
+            self._model = genai.GenerativeModel(self.model)
+            logger.info(f"Using Gemini model: {self.model}")
+        return self._model
+
+    async def generate(
+        self,
+        prompt: str,
+        temperature: float = 0.7,
+        max_tokens: Optional[int] = None
+    ) -> str:
+        model = self._get_model()
+        response = await model.generate_content_async(
+            prompt,
+            generation_config={
+                "temperature": temperature,
+                "max_output_tokens": max_tokens or self.default_max_tokens,
+            },
+            request_options={"timeout": settings.LLM_REQUEST_TIMEOUT},
+        )
+        return response.text.strip()
+    
+    async def stream(
+        self,
+        prompt: str,
+        temperature: float = 0.7,
+        max_tokens: Optional[int] = None
+    ) -> AsyncIterator[str]:
+        model = self._get_model()
+        response = await model.generate_content_async(
+            prompt,
+            generation_config={
+                "temperature": temperature,
+                "max_output_tokens": max_tokens or self.default_max_tokens,
+            },
+            request_options={"timeout": settings.LLM_REQUEST_TIMEOUT},
+            stream=True,
+        )
+        try:
+            async for chunk in response:
+                # Trailing chunks may only carry finish metadata
+                if chunk.parts:
+                    yield chunk.text
+        finally:
+            # Drop the gRPC stream so an abandoned generation stops upstream
+            iterator = getattr(response, "_iterator", None)
+            cancel = getattr(iterator, "cancel", None)
+            if cancel is not None:
+                cancel()
+
+class OpenAIProvider(LLMProvider):
+    """OpenAI adapter using ``openai.AsyncOpenAI``."""
+
+    name = "openai"
+    model = "gpt-3.5-turbo"
+    default_max_tokens = 1000
+
+    def __init__(self, api_key: str):
+        self.api_key = api_key
+        self._client = None
+
+    def _get_client(self):
+        """Lazy initialization of OpenAI client."""
+        if self._client is None:
+            import openai
+            self._client = openai.AsyncOpenAI(
+                api_key=self.api_key,
+                timeout=settings.LLM_REQUEST_TIMEOUT,
+            )
+        return self._client
+
+    async def generate(
+        self,
+        prompt: str,
+        temperature: float = 0.7,
+        max_tokens: Optional[int] = None
+    ) -> str:
+        client = self._get_client()
+        response = await client.chat.completions.create(
+            model=self.model,
+            messages=[{"role": "user", "content": prompt}],
+            temperature=temperature,
+            max_tokens=max_tokens or self.default_max_tokens
+        )
+        return response.choices[0].message.content.strip()
+    
+    async def stream(
+        self,
+        prompt: str,
+        temperature: float = 0.7,
+        max_tokens: Optional[int] = None
+    ) -> AsyncIterator[str]:
+        client = self._get_client()
+        response = await client.chat.completions.create(
+            model=self.model,
+            messages=[{"role": "user", "content": prompt}],
+            temperature=temperature,
+            max_tokens=max_tokens or self.default_max_tokens,
+            stream=True
+        )
+        # Leaving the context closes the HTTP response, aborting the completion
+        async with response:
+            async for chunk in response:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+
+def create_provider(name: str) -> LLMProvider:
+    """Build the provider adapter registered under ``name``."""
+    name = name.lower()
+    if name == "gemini":
+        # Use Gemini-specific key if provided, otherwise fallback to LLM_API_KEY
+        return GeminiProvider(settings.GEMINI_API_KEY or settings.LLM_API_KEY)
+    if name == "openai":
+        return OpenAIProvider(settings.OPENAI_API_KEY or settings.LLM_API_KEY)
+    # Offline providers for load tests and CI
+    if name in ("synthetic", "replay", "record"):
+        from app.services import llm_offline
+        if name == "synthetic":
+            return llm_offline.create_synthetic_provider()
+        cassette = llm_offline.Cassette(settings.LLM_CASSETTE_PATH)
+        if name == "replay":
+            fallback = None
+            if settings.LLM_REPLAY_FALLBACK:
+                fallback = create_provider(settings.LLM_REPLAY_FALLBACK)
+            return llm_offline.ReplayProvider(
+                cassette,
+                fallback=fallback,
+                realtime=settings.LLM_REPLAY_REALTIME
+            )
+        return llm_offline.RecordingProvider(create_provider(settings.LLM_RECORD_PROVIDER), cassette)
+    raise ValueError(f"Unsupported LLM provider: {name}")
@@ -0,0 +1,240 @@
+import asyncio
+import logging
+import random
+import time
+from typing import Awaitable, Callable, Optional, TypeVar
+from app.core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+RETRYABLE_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+
+# SDK exception types that carry no status code but are transient
+RETRYABLE_EXCEPTION_NAMES = {
+    "APIConnectionError",
+    "APITimeoutError",
+    "ResourceExhausted",
+    "ServiceUnavailable",
+    "DeadlineExceeded",
+    "InternalServerError",
+    "TooManyRequests",
+    "TimeoutError",
+}
+
+class LLMServiceError(Exception):
+    """An LLM request failed."""
+
+class LLMUnavailableError(LLMServiceError):
+    """The provider is unhealthy or throttled; retry after ``retry_after`` seconds."""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+def error_status_code(exc: BaseException) -> Optional[int]:
+    """HTTP status carried by an OpenAI or Google API exception, if any."""
+    for attr in ("status_code", "code"):
+        value = getattr(exc, attr, None)
+        if isinstance(value, int):
+            return value
+    return None
+
+def is_retryable(exc: BaseException) -> bool:
+    """Whether a provider error is transient (throttling, overload, network)."""
+    status_code = error_status_code(exc)
+    if status_code is not None:
+        return status_code in RETRYABLE_STATUS_CODES
+    return type(exc).__name__ in RETRYABLE_EXCEPTION_NAMES or isinstance(exc, asyncio.TimeoutError)
+
+def provider_retry_after(exc: BaseException) -> Optional[float]:
+    """Retry-After hint from a provider response, in seconds."""
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+class TokenBucket:
+    """Token bucket refilled continuously at ``rate_per_minute``."""
+
+    def __init__(self, rate_per_minute: float, name: str):
+        self.capacity = float(rate_per_minute)
+        self.rate = rate_per_minute / 60.0
+        self.tokens = self.capacity
+        self.name = name
+        self.updated_at = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    async def acquire(self, amount: float = 1) -> float:
+        """Take ``amount`` tokens, sleeping until they are available.
+
+        Returns the time spent waiting, in seconds.
+        """
+        amount = min(amount, self.capacity)
+        waited = 0.0
+        while True:
+            self._refill()
+            if self.tokens >= amount:
+                self.tokens -= amount
+                if waited:
+                    metrics.incr(f"llm.ratelimit.{self.name}.waits")
+                    metrics.incr(f"llm.ratelimit.{self.name}.wait_seconds", waited)
+                return waited
+            delay = (amount - self.tokens) / self.rate
+            waited += delay
+            await asyncio.sleep(delay)
+
+class ProviderRateLimiter:
+    """Requests-per-minute and tokens-per-minute limits for one provider key.
+
+    A limit of 0 disables that bucket.
+    """
+
+    def __init__(self, name: str, requests_per_minute: int, tokens_per_minute: int):
+        self.requests = TokenBucket(requests_per_minute, f"{name}.requests") if requests_per_minute > 0 else None
+        self.tokens = TokenBucket(tokens_per_minute, f"{name}.tokens") if tokens_per_minute > 0 else None
+
+    async def acquire(self, estimated_tokens: int) -> None:
+        if self.requests is not None:
+            await self.requests.acquire(1)
+        if self.tokens is not None:
+            await self.tokens.acquire(estimated_tokens)
+
+class CircuitBreaker:
+    """Fail fast while a provider is unhealthy.
+
+    ``closed``: calls flow normally. After ``failure_threshold`` consecutive
+    failures the breaker goes ``open`` and rejects calls for
+    ``reset_timeout`` seconds, then lets a single ``half_open`` probe
+    through; its outcome closes or re-opens the breaker.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int, reset_timeout: float):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+        self._publish_state()
+
+    def _publish_state(self) -> None:
+        value = {self.CLOSED: 0, self.HALF_OPEN: 1, self.OPEN: 2}[self.state]
+        metrics.set_gauge(f"llm.circuit.{self.name}.state", value)
+
+    def _transition(self, state: str) -> None:
+        if state != self.state:
+            logger.warning(f"LLM circuit {self.name}: {self.state} -> {state}")
+            self.state = state
+            metrics.incr(f"llm.circuit.{self.name}.{state}")
+            self._publish_state()
+
+    def retry_after(self) -> float:
+        """Seconds until the breaker will admit a probe."""
+        return max(0.0, self.opened_at + self.reset_timeout - time.monotonic())
+
+    def is_open(self) -> bool:
+        """True while the breaker is rejecting calls."""
+        return self.state == self.OPEN and self.retry_after() > 0
+
+    def raise_if_open(self) -> None:
+        """Raise LLMUnavailableError while the breaker is rejecting calls."""
+        if self.is_open():
+            raise LLMUnavailableError(
+                f"LLM provider {self.name} is temporarily unavailable",
+                retry_after=self.retry_after()
+            )
+
+    def before_call(self) -> None:
+        """Raise LLMUnavailableError unless a call may proceed now."""
+        if self.state == self.OPEN:
+            try:
+                self.raise_if_open()
+            except LLMUnavailableError:
+                metrics.incr(f"llm.circuit.{self.name}.rejected")
+                raise
+            self._transition(self.HALF_OPEN)
+        if self.state == self.HALF_OPEN:
+            if self._probe_in_flight:
+                metrics.incr(f"llm.circuit.{self.name}.rejected")
+                raise LLMUnavailableError(
+                    f"LLM provider {self.name} is recovering",
+                    retry_after=1.0
+                )
+            self._probe_in_flight = True
+
+    def record_success(self) -> None:
+        self._probe_in_flight = False
+        self.failures = 0
+        self._transition(self.CLOSED)
+
+    def record_failure(self) -> None:
+        self._probe_in_flight = False
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+            self._transition(self.OPEN)
+
+    def release(self) -> None:
+        """Forget an abandoned call without counting it either way."""
+        self._probe_in_flight = False
+
+async def call_with_retry(
+    call: Callable[[], Awaitable[T]],
+    breaker: CircuitBreaker,
+    max_attempts: int,
+    base_delay: float,
+    max_delay: float
+) -> T:
+    """Run ``call`` behind ``breaker``, retrying transient errors.
+
+    Delays use full jitter over an exponential backoff, stretched to any
+    Retry-After hint the provider sent. Non-retryable errors (bad request,
+    auth) are raised at once and do not trip the breaker.
+    """
+    attempt = 0
+    while True:
+        attempt += 1
+        breaker.before_call()
+        try:
+            result = await call()
+        except asyncio.CancelledError:
+            breaker.release()
+            raise
+        except Exception as e:
+            if not is_retryable(e):
+                breaker.release()
+                raise
+            breaker.record_failure()
+            if attempt >= max_attempts:
+                metrics.incr(f"llm.retry.{breaker.name}.exhausted")
+                if breaker.state == CircuitBreaker.OPEN:
+                    raise LLMUnavailableError(
+                        f"LLM provider {breaker.name} is temporarily unavailable: {str(e)}",
+                        retry_after=breaker.retry_after()
+                    )
+                raise
+            delay = random.uniform(0, min(max_delay, base_delay * (2 ** (attempt - 1))))
+            hint = provider_retry_after(e)
+            if hint is not None:
+                delay = max(delay, min(hint, max_delay))
+            metrics.incr(f"llm.retry.{breaker.name}.attempts")
+            logger.warning(f"LLM call to {breaker.name} failed ({str(e)}); retrying in {delay:.2f}s")
+            await asyncio.sleep(delay)
+        else:
+            breaker.record_success()
+            return result
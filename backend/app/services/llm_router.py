@@ -0,0 +1,132 @@
+import asyncio
+import logging
+import math
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, List
+from app.core.metrics import metrics
+from app.services.llm_providers import LLMProvider
+
+logger = logging.getLogger(__name__)
+
+class LatencyTracker:
+    """Rolling window of call latencies per provider."""
+
+    def __init__(self, window: int = 200):
+        self.window = window
+        self._samples: Dict[str, Deque[float]] = {}
+
+    def record(self, provider: str, seconds: float) -> None:
+        samples = self._samples.setdefault(provider, deque(maxlen=self.window))
+        samples.append(seconds)
+        metrics.observe(f"llm.latency.{provider}", seconds)
+
+    def record_censored(self, provider: str, seconds: float) -> None:
+        """A call cut off after ``seconds``, e.g. a primary that lost a hedge.
+
+        It took at least that long. Leaving it out would keep only the fast
+        calls, so the percentile would drift down and hedge ever sooner.
+        """
+        samples = self._samples.setdefault(provider, deque(maxlen=self.window))
+        samples.append(seconds)
+
+    def count(self, provider: str) -> int:
+        return len(self._samples.get(provider, ()))
+
+    def percentile(self, provider: str, percentile: float) -> float:
+        """Nearest-rank percentile of recent latencies (0 with no samples)."""
+        samples = sorted(self._samples.get(provider, ()))
+        if not samples:
+            return 0.0
+        rank = max(1, math.ceil(percentile / 100 * len(samples)))
+        return samples[rank - 1]
+
+class ProviderRouter:
+    """Send a request to one of several providers.
+
+    Providers are tried in order. Without hedging, an error moves on to the
+    next provider (failover). With hedging, a backup request is also
+    started when the current attempt has run longer than the primary's
+    latency percentile, and whichever answers first wins; the loser is
+    cancelled.
+    """
+
+    def __init__(
+        self,
+        latency: LatencyTracker,
+        hedge: bool,
+        hedge_percentile: float,
+        hedge_min_delay: float,
+        hedge_min_samples: int
+    ):
+        self.latency = latency
+        self.hedge = hedge
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_delay = hedge_min_delay
+        self.hedge_min_samples = hedge_min_samples
+
+    def hedge_delay(self, provider: LLMProvider) -> float:
+        """How long to wait on ``provider`` before starting a backup request."""
+        if self.latency.count(provider.name) < self.hedge_min_samples:
+            return self.hedge_min_delay
+        return max(self.hedge_min_delay, self.latency.percentile(provider.name, self.hedge_percentile))
+
+    async def route(
+        self,
+        providers: List[LLMProvider],
+        call: Callable[[LLMProvider], Awaitable[str]]
+    ) -> str:
+        if len(providers) == 1:
+            return await call(providers[0])
+
+        backups = iter(providers[1:])
+        tasks: Dict[asyncio.Task, LLMProvider] = {}
+        errors = []
+
+        def start(provider: LLMProvider, reason: str) -> None:
+            tasks[asyncio.ensure_future(call(provider))] = provider
+            if reason != "primary":
+                metrics.incr(f"llm.route.{reason}")
+                logger.info(f"LLM router: {reason} to {provider.name}")
+
+        start(providers[0], "primary")
+        pending = set(tasks)
+        try:
+            while pending:
+                timeout = self.hedge_delay(providers[0]) if self.hedge else None
+                done, pending = await asyncio.wait(
+                    pending,
+                    timeout=timeout,
+                    return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    backup = next(backups, None)
+                    if backup is not None:
+                        start(backup, "hedges")
+                        pending = {t for t in tasks if not t.done()}
+                    continue
+
+                for task in done:
+                    provider = tasks[task]
+                    # exception() raises on a cancelled task; only this
+                    # provider's call was cancelled, not the route
+                    if task.cancelled():
+                        errors.append(RuntimeError(f"{provider.name} call was cancelled"))
+                    elif task.exception() is None:
+                        winner = "primary" if provider is providers[0] else "backup"
+                        metrics.incr(f"llm.route.{provider.name}.{winner}_wins")
+                        return task.result()
+                    else:
+                        errors.append(task.exception())
+                    metrics.incr(f"llm.route.{provider.name}.errors")
+
+                # Nothing succeeded yet: fail over if nothing else is still running
+                if not pending:
+                    backup = next(backups, None)
+                    if backup is not None:
+                        start(backup, "failovers")
+                        pending = {t for t in tasks if not t.done()}
+            raise errors[-1]
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
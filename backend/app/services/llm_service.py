@@ -1,76 +1,331 @@
+import asyncio
+import hashlib
 import logging
-from typing import Optional
+import re
+import time
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional
 from app.core.config import settings
-import google.generativeai as genai
+from app.core.metrics import metrics
+from app.services.llm_cache import LLMResponseCache, build_response_cache, make_cache_key
+from app.services.llm_providers import LLMProvider, create_provider
+from app.services.llm_router import LatencyTracker, ProviderRouter
+from app.services.llm_resilience import (
+    CircuitBreaker,
+    LLMServiceError,
+    LLMUnavailableError,
+    ProviderRateLimiter,
+    call_with_retry,
+    is_retryable,
+)
+from app.services.prompt_budget import (
+    allocate,
+    count_tokens,
+    prompt_token_budget,
+    summarize,
+    truncate_to_tokens,
+)
 
 logger = logging.getLogger(__name__)
 
+BATCH_MARKER = "=== ITEM {index} ==="
+# Models sometimes echo the title after the marker; the rest of that line is ignored
+BATCH_MARKER_PATTERN = re.compile(r"^[ \t]*=+[ \t]*ITEM[ \t]+(\d+)[ \t]*=+[^\n]*$", re.MULTILINE)
+
+class _Flight:
+    """An upstream LLM call shared by every caller awaiting the same prompt."""
+    
+    def __init__(self, task: "asyncio.Future[str]"):
+        self.task = task
+        self.waiters = 0
+
 class LLMService:
     """LLM service adapter supporting OpenAI and Gemini."""
     
     def __init__(self):
         self.provider = settings.LLM_PROVIDER.lower()
         self.api_key = settings.LLM_API_KEY
-        self._model = None
-        self._client = None
-    
-    def _get_model(self):
-        """Lazy initialization of Gemini model."""
-        if self.provider == "gemini":
-            if self._model is None:
-                # Use Gemini-specific key if provided, otherwise fallback to LLM_API_KEY
-                api_key = settings.GEMINI_API_KEY if settings.GEMINI_API_KEY else self.api_key
-                genai.configure(api_key=api_key)
-                # Use the correct model name - models/gemini-2.0-flash is confirmed working
-                self._model = genai.GenerativeModel('models/gemini-2.0-flash')
-                logger.info("Using Gemini model: models/gemini-2.0-flash")
-            return self._model
-        return None
-    
-    def _get_client(self):
-        """Lazy initialization of OpenAI client."""
-        if self.provider == "openai":
-            if self._client is None:
-                import openai
-                api_key = settings.OPENAI_API_KEY if settings.OPENAI_API_KEY else self.api_key
-                self._client = openai.OpenAI(api_key=api_key)
-            return self._client
-        return None
+        self._provider: Optional[LLMProvider] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._semaphore_loop = None
+        self.cache: Optional[LLMResponseCache] = build_response_cache()
+        self._inflight: Dict[str, _Flight] = {}
+        self._limiters: Dict[str, ProviderRateLimiter] = {}
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._fallbacks: Optional[List[LLMProvider]] = None
+        self.latency = LatencyTracker()
+        self.router = ProviderRouter(
+            self.latency,
+            hedge=settings.LLM_HEDGE_ENABLED,
+            hedge_percentile=settings.LLM_HEDGE_PERCENTILE,
+            hedge_min_delay=settings.LLM_HEDGE_MIN_DELAY,
+            hedge_min_samples=settings.LLM_HEDGE_MIN_SAMPLES
+        )
+    
+    def _get_provider(self) -> LLMProvider:
+        """Lazy initialization of the configured provider adapter."""
+        if self._provider is None:
+            self._provider = create_provider(self.provider)
+        return self._provider
+    
+    def _get_providers(self) -> List[LLMProvider]:
+        """The primary provider followed by the configured fallbacks."""
+        primary = self._get_provider()
+        if self._fallbacks is None:
+            names = [
+                name.strip().lower()
+                for name in settings.LLM_FALLBACK_PROVIDERS.split(",")
+                if name.strip()
+            ]
+            self._fallbacks = [
+                create_provider(name)
+                for name in dict.fromkeys(names)
+                if name != self.provider
+            ]
+        return [primary] + [p for p in self._fallbacks if p.name != primary.name]
+    
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        """Semaphore bounding in-flight provider calls on the running loop."""
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._semaphore_loop is not loop:
+            self._semaphore = asyncio.Semaphore(settings.LLM_MAX_CONCURRENCY)
+            self._semaphore_loop = loop
+        return self._semaphore
+    
+    def _guard_key(self, provider: LLMProvider) -> str:
+        """Rate limits and health are tracked per provider and API key."""
+        key_hash = hashlib.sha256((getattr(provider, "api_key", "") or "").encode("utf-8")).hexdigest()
+        return f"{provider.name}:{key_hash[:8]}"
+    
+    def _get_limiter(self, provider: LLMProvider) -> ProviderRateLimiter:
+        key = self._guard_key(provider)
+        if key not in self._limiters:
+            self._limiters[key] = ProviderRateLimiter(
+                provider.name,
+                requests_per_minute=settings.LLM_RATE_LIMIT_RPM,
+                tokens_per_minute=settings.LLM_RATE_LIMIT_TPM
+            )
+        return self._limiters[key]
+    
+    def _get_breaker(self, provider: LLMProvider) -> CircuitBreaker:
+        key = self._guard_key(provider)
+        if key not in self._breakers:
+            self._breakers[key] = CircuitBreaker(
+                provider.name,
+                failure_threshold=settings.LLM_CIRCUIT_FAILURE_THRESHOLD,
+                reset_timeout=settings.LLM_CIRCUIT_RESET_SECONDS
+            )
+        return self._breakers[key]
+    
+    def ensure_available(self) -> None:
+        """Raise LLMUnavailableError if every provider's circuit is open."""
+        self._select_stream_provider()
+    
+    def _select_stream_provider(self) -> LLMProvider:
+        """First provider whose circuit is not open."""
+        providers = self._get_providers()
+        for provider in providers[:-1]:
+            if not self._get_breaker(provider).is_open():
+                return provider
+        self._get_breaker(providers[-1]).raise_if_open()
+        return providers[-1]
+    
+    def _estimate_tokens(self, provider: LLMProvider, prompt: str, max_tokens: Optional[int]) -> int:
+        """Rough prompt + completion token count for tokens-per-minute limiting."""
+        return count_tokens(prompt) + (max_tokens or provider.default_max_tokens)
+    
+    def _fingerprint(
+        self,
+        provider: LLMProvider,
+        prompt: str,
+        temperature: float,
+        max_tokens: Optional[int]
+    ) -> str:
+        """Identity of a completion request, shared by the cache and single-flight."""
+        return make_cache_key(
+            provider.name,
+            provider.model,
+            temperature,
+            max_tokens or provider.default_max_tokens,
+            prompt
+        )
     
     async def generate_content(
         self,
         prompt: str,
         temperature: float = 0.7,
-        max_tokens: Optional[int] = None
+        max_tokens: Optional[int] = None,
+        use_cache: bool = True
     ) -> str:
-        """Generate content using the configured LLM provider."""
+        """Generate content using the configured LLM provider.
+        
+        Provider calls are awaited on native async clients, so a slow
+        completion only suspends this coroutine and never the event loop.
+        Identical requests are answered from the response cache unless
+        ``use_cache`` is False.
+        """
         try:
-            if self.provider == "gemini":
-                model = self._get_model()
-                response = model.generate_content(
-                    prompt,
-                    generation_config={
-                        "temperature": temperature,
-                        "max_output_tokens": max_tokens or 2048,
-                    }
-                )
-                return response.text.strip()
+            provider = self._get_provider()
+            fingerprint = self._fingerprint(provider, prompt, temperature, max_tokens)
+            if self.cache is not None:
+                if use_cache:
+                    cached = await self.cache.get(fingerprint)
+                    if cached is not None:
+                        return cached
+                else:
+                    metrics.incr("llm_cache.bypassed")
             
-            elif self.provider == "openai":
-                client = self._get_client()
-                response = client.chat.completions.create(
-                    model="gpt-3.5-turbo",
-                    messages=[{"role": "user", "content": prompt}],
-                    temperature=temperature,
-                    max_tokens=max_tokens or 1000
+            async def call_provider() -> str:
+                content = await self.router.route(
+                    self._get_providers(),
+                    lambda p: self._call_provider(p, prompt, temperature, max_tokens)
                 )
-                return response.choices[0].message.content.strip()
-            else:
-                raise ValueError(f"Unsupported LLM provider: {self.provider}")
+                if self.cache is not None:
+                    await self.cache.set(fingerprint, content)
+                return content
             
+            return await self._single_flight(fingerprint, call_provider)
+        except LLMUnavailableError:
+            raise
         except Exception as e:
             logger.error(f"LLM generation error: {str(e)}")
-            raise Exception(f"Failed to generate content: {str(e)}")
+            raise LLMServiceError(f"Failed to generate content: {str(e)}")
+    
+    async def _call_provider(
+        self,
+        provider: LLMProvider,
+        prompt: str,
+        temperature: float,
+        max_tokens: Optional[int]
+    ) -> str:
+        """One provider's answer, behind its rate limiter, retries and breaker."""
+        limiter = self._get_limiter(provider)
+        estimated_tokens = self._estimate_tokens(provider, prompt, max_tokens)
+        
+        async def attempt() -> str:
+            await limiter.acquire(estimated_tokens)
+            async with self._get_semaphore():
+                started = time.monotonic()
+                try:
+                    content = await provider.generate(
+                        prompt,
+                        temperature=temperature,
+                        max_tokens=max_tokens
+                    )
+                except asyncio.CancelledError:
+                    self.latency.record_censored(provider.name, time.monotonic() - started)
+                    raise
+                self.latency.record(provider.name, time.monotonic() - started)
+                return content
+        
+        return await call_with_retry(
+            attempt,
+            self._get_breaker(provider),
+            max_attempts=settings.LLM_RETRY_MAX_ATTEMPTS,
+            base_delay=settings.LLM_RETRY_BASE_DELAY,
+            max_delay=settings.LLM_RETRY_MAX_DELAY
+        )
+    
+    async def _single_flight(self, fingerprint: str, call: Callable[[], Awaitable[str]]) -> str:
+        """Run ``call`` once for all concurrent callers with the same fingerprint.
+        
+        The first caller starts the upstream request as a task; later callers
+        await the same task. A waiter that is cancelled (client went away)
+        only detaches itself; the upstream call is cancelled once no waiters
+        remain.
+        """
+        flight = self._inflight.get(fingerprint)
+        if flight is None:
+            flight = _Flight(asyncio.ensure_future(call()))
+            self._inflight[fingerprint] = flight
+            flight.task.add_done_callback(
+                lambda _: self._forget_flight(fingerprint, flight)
+            )
+            metrics.incr("llm.singleflight.leaders")
+        else:
+            metrics.incr("llm.singleflight.coalesced")
+        metrics.set_gauge("llm.singleflight.in_flight", len(self._inflight))
+        
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                # Nobody is left to read the result: stop paying for it
+                self._forget_flight(fingerprint, flight)
+                flight.task.cancel()
+                metrics.incr("llm.singleflight.cancelled")
+    
+    def _forget_flight(self, fingerprint: str, flight: "_Flight") -> None:
+        if self._inflight.get(fingerprint) is flight:
+            del self._inflight[fingerprint]
+        metrics.set_gauge("llm.singleflight.in_flight", len(self._inflight))
+    
+    async def stream_content(
+        self,
+        prompt: str,
+        temperature: float = 0.7,
+        max_tokens: Optional[int] = None,
+        use_cache: bool = True
+    ) -> AsyncIterator[str]:
+        """Yield generated text chunks as the provider streams them.
+        
+        Closing the generator (e.g. on client disconnect) closes the provider
+        stream, which cancels the upstream completion. Only completions that
+        ran to the end are written to the response cache.
+        """
+        try:
+            provider = self._get_provider()
+            fingerprint = self._fingerprint(provider, prompt, temperature, max_tokens)
+            if self.cache is not None:
+                if use_cache:
+                    cached = await self.cache.get(fingerprint)
+                    if cached is not None:
+                        yield cached
+                        return
+                else:
+                    metrics.incr("llm_cache.bypassed")
+            
+            # Streams are not retried or hedged once started: tokens may already be
+            # on the wire. Failover only applies when choosing where to start.
+            provider = self._select_stream_provider()
+            breaker = self._get_breaker(provider)
+            breaker.before_call()
+            chunks = []
+            try:
+                await self._get_limiter(provider).acquire(
+                    self._estimate_tokens(provider, prompt, max_tokens)
+                )
+                async with self._get_semaphore():
+                    upstream = provider.stream(
+                        prompt,
+                        temperature=temperature,
+                        max_tokens=max_tokens
+                    )
+                    try:
+                        async for chunk in upstream:
+                            chunks.append(chunk)
+                            yield chunk
+                    finally:
+                        await upstream.aclose()
+            except Exception as e:
+                if is_retryable(e):
+                    breaker.record_failure()
+                else:
+                    breaker.release()
+                raise
+            except BaseException:
+                breaker.release()
+                raise
+            breaker.record_success()
+            
+            if self.cache is not None:
+                await self.cache.set(fingerprint, "".join(chunks).strip())
+        except LLMUnavailableError:
+            raise
+        except Exception as e:
+            logger.error(f"LLM streaming error: {str(e)}")
+            raise LLMServiceError(f"Failed to generate content: {str(e)}")
     
     def build_generation_prompt(
         self,
@@ -78,39 +333,154 @@ class LLMService:
         section_title: str,
         section_type: str,
         previous_content: Optional[str] = None,
+        neighboring_sections: Optional[list] = None,
+        token_budget: Optional[int] = None
+    ) -> str:
+        """Build a context-aware prompt for section generation.
+        
+        The topic, neighbor summaries and previous content are fitted into
+        ``token_budget`` tokens (default: the provider's configured budget)
+        on top of the fixed instructions. Neighbors may carry a precomputed
+        ``summary``; otherwise one is derived from their ``content``.
+        """
+        if section_type == "section":
+            task_parts = [
+                "\nTask: Generate well-structured content for this Word document section.",
+                "Requirements:",
+                "- Write 150-250 words of professional, informative content",
+                "- Use clear paragraphs",
+                "- Ensure content is relevant to the project topic and section title",
+                "- Output plain text only (no markdown formatting)",
+            ]
+        else:  # slide
+            task_parts = [
+                "\nTask: Generate content for this PowerPoint slide.",
+                "Requirements:",
+                "- Write 3-5 bullet points or 2-3 short paragraphs",
+                "- Keep content concise and suitable for presentation",
+                "- Ensure content is relevant to the project topic and slide title",
+                "- Output plain text only (no markdown formatting)",
+            ]
+        
+        neighbors = (neighboring_sections or [])[:3]  # Limit to 3 neighbors
+        neighbor_titles = [neighbor.get("title", "") for neighbor in neighbors]
+        neighbor_texts = [self._neighbor_summary(neighbor) for neighbor in neighbors]
+        
+        # Tokens left for variable context once the fixed scaffolding is paid for
+        scaffolding = task_parts + [
+            f"Section/Slide Title: {section_title}\n",
+            "Project Topic: \n",
+            "\nContext from other sections:" if neighbors else "",
+            "\nPrevious content (for context):\n" if previous_content else "",
+        ] + [f"- {title}: " for title in neighbor_titles]
+        budget = token_budget or prompt_token_budget(self.provider)
+        available = budget - count_tokens("\n".join(scaffolding))
+        
+        texts = [project_topic, previous_content or ""] + neighbor_texts
+        grants = allocate(
+            [count_tokens(text) for text in texts],
+            [3, 2] + [1] * len(neighbor_texts),
+            available
+        )
+        topic, previous, *neighbor_parts = [
+            truncate_to_tokens(text, grant) for text, grant in zip(texts, grants)
+        ]
+        
+        prompt_parts = []
+        
+        prompt_parts.append(f"Project Topic: {topic}\n")
+        prompt_parts.append(f"Section/Slide Title: {section_title}\n")
+        
+        if neighbors:
+            prompt_parts.append("\nContext from other sections:")
+            for title, text in zip(neighbor_titles, neighbor_parts):
+                prompt_parts.append(f"- {title}: {text}" if text else f"- {title}")
+        
+        prompt_parts.extend(task_parts)
+        
+        if previous:
+            prompt_parts.append(f"\nPrevious content (for context):\n{previous}")
+        
+        return "\n".join(prompt_parts)
+    
+    def _neighbor_summary(self, neighbor: dict) -> str:
+        """Stored summary of a neighboring section, or one derived from its content."""
+        if neighbor.get("summary") is not None:
+            return neighbor["summary"]
+        return summarize(neighbor.get("content", ""), settings.LLM_SECTION_SUMMARY_TOKENS)
+    
+    def build_batch_generation_prompt(
+        self,
+        project_topic: str,
+        section_type: str,
+        sections: list,
         neighboring_sections: Optional[list] = None
     ) -> str:
-        """Build a context-aware prompt for section generation."""
+        """Build one prompt that generates several sections of a project.
+        
+        The topic, neighbor context and instructions are stated once for the
+        whole batch; each section is introduced by a numbered marker that
+        ``parse_batch_generation_response`` splits the answer on.
+        """
         prompt_parts = []
         
         prompt_parts.append(f"Project Topic: {project_topic}\n")
-        prompt_parts.append(f"Section/Slide Title: {section_title}\n")
         
         if neighboring_sections:
-            prompt_parts.append("\nContext from other sections:")
+            prompt_parts.append("Context from other sections:")
             for neighbor in neighboring_sections[:3]:  # Limit to 3 neighbors
-                prompt_parts.append(f"- {neighbor.get('title', '')}: {neighbor.get('content', '')[:200]}...")
+                prompt_parts.append(f"- {neighbor.get('title', '')}: {self._neighbor_summary(neighbor)}")
+            prompt_parts.append("")
         
         if section_type == "section":
-            prompt_parts.append("\nTask: Generate well-structured content for this Word document section.")
-            prompt_parts.append("Requirements:")
+            prompt_parts.append(f"Task: Generate well-structured content for each of the {len(sections)} Word document sections listed below.")
+            prompt_parts.append("Requirements for each section:")
             prompt_parts.append("- Write 150-250 words of professional, informative content")
             prompt_parts.append("- Use clear paragraphs")
             prompt_parts.append("- Ensure content is relevant to the project topic and section title")
             prompt_parts.append("- Output plain text only (no markdown formatting)")
         else:  # slide
-            prompt_parts.append("\nTask: Generate content for this PowerPoint slide.")
-            prompt_parts.append("Requirements:")
+            prompt_parts.append(f"Task: Generate content for each of the {len(sections)} PowerPoint slides listed below.")
+            prompt_parts.append("Requirements for each slide:")
             prompt_parts.append("- Write 3-5 bullet points or 2-3 short paragraphs")
             prompt_parts.append("- Keep content concise and suitable for presentation")
             prompt_parts.append("- Ensure content is relevant to the project topic and slide title")
             prompt_parts.append("- Output plain text only (no markdown formatting)")
         
-        if previous_content:
-            prompt_parts.append(f"\nPrevious content (for context):\n{previous_content[:300]}...")
+        prompt_parts.append("\nOutput format:")
+        prompt_parts.append(f"For each item, write its marker line exactly as given (for example {BATCH_MARKER.format(index=1)}),")
+        prompt_parts.append("then its content on the following lines. Do not repeat the title. Write nothing before the first marker.")
+        
+        prompt_parts.append("\nItems:")
+        for index, section in enumerate(sections, start=1):
+            prompt_parts.append(f"{BATCH_MARKER.format(index=index)} {section.get('title', '')}")
+            if section.get("previous_content"):
+                previous = truncate_to_tokens(section["previous_content"], settings.LLM_SECTION_SUMMARY_TOKENS)
+                prompt_parts.append(f"Previous content (for context):\n{previous}")
         
         return "\n".join(prompt_parts)
     
+    def parse_batch_generation_response(self, response_text: str, count: int) -> Optional[List[str]]:
+        """Split a batched completion into per-section content.
+        
+        Returns None unless every marker from 1 to ``count`` appears exactly
+        once with non-empty content, so callers can fall back to one call
+        per section.
+        """
+        matches = list(BATCH_MARKER_PATTERN.finditer(response_text))
+        contents = {}
+        for position, match in enumerate(matches):
+            index = int(match.group(1))
+            end = matches[position + 1].start() if position + 1 < len(matches) else len(response_text)
+            if index in contents:
+                return None
+            contents[index] = response_text[match.end():end].strip()
+        if sorted(contents) != list(range(1, count + 1)):
+            return None
+        if not all(contents.values()):
+            return None
+        return [contents[index] for index in range(1, count + 1)]
+    
     def build_refinement_prompt(
         self,
         current_content: str,
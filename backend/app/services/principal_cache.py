@@ -0,0 +1,85 @@
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional, Tuple
+from uuid import UUID
+from sqlalchemy import event
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.models.user import User
+
+@dataclass(frozen=True)
+class Principal:
+    """The authenticated caller, detached from any database session."""
+    id: UUID
+    email: Optional[str] = None
+    created_at: Optional[datetime] = None
+
+    @classmethod
+    def from_user(cls, user: User) -> "Principal":
+        return cls(id=user.id, email=user.email, created_at=user.created_at)
+
+class PrincipalCache:
+    """Short-TTL LRU of principals keyed by user id.
+
+    Entries are dropped as soon as the user row is updated or deleted
+    through the ORM in this process; the TTL bounds staleness for changes
+    made elsewhere (other workers, raw SQL).
+    """
+
+    def __init__(self, ttl_seconds: float, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[UUID, Tuple[float, Principal]]" = OrderedDict()
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0 and self.max_entries > 0
+
+    def get(self, user_id: UUID) -> Optional[Principal]:
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[user_id]
+                metrics.incr("auth.principal_cache.misses")
+                return None
+            self._entries.move_to_end(user_id)
+        metrics.incr("auth.principal_cache.hits")
+        return entry[1]
+
+    def set(self, principal: Principal) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            self._entries[principal.id] = (time.monotonic() + self.ttl_seconds, principal)
+            self._entries.move_to_end(principal.id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            metrics.set_gauge("auth.principal_cache.entries", len(self._entries))
+
+    def invalidate(self, user_id: UUID) -> None:
+        with self._lock:
+            if self._entries.pop(user_id, None) is not None:
+                metrics.incr("auth.principal_cache.invalidations")
+            metrics.set_gauge("auth.principal_cache.entries", len(self._entries))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            metrics.set_gauge("auth.principal_cache.entries", 0)
+
+principal_cache = PrincipalCache(
+    ttl_seconds=settings.AUTH_PRINCIPAL_CACHE_TTL_SECONDS,
+    max_entries=settings.AUTH_PRINCIPAL_CACHE_MAX_ENTRIES
+)
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_principal(mapper, connection, target: User) -> None:
+    principal_cache.invalidate(target.id)
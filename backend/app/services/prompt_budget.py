@@ -0,0 +1,111 @@
+import hashlib
+import logging
+import re
+from functools import lru_cache
+from typing import List, Optional, Sequence, Tuple
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Rough characters-per-token ratio for English prose when no tokenizer is installed
+CHARS_PER_TOKEN = 4
+
+SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])\s+")
+
+@lru_cache(maxsize=1)
+def _get_encoding():
+    """tiktoken's cl100k_base encoding, or None if tiktoken is unavailable."""
+    try:
+        import tiktoken
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        # Optional dependency; fall back to the character heuristic
+        logger.info(f"tiktoken unavailable, estimating tokens from length: {str(e)}")
+        return None
+
+def count_tokens(text: str) -> int:
+    """Number of tokens in ``text``."""
+    if not text:
+        return 0
+    encoding = _get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text))
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Cut ``text`` to at most ``max_tokens`` tokens, preferring a word boundary.
+
+    An ellipsis marks text that was shortened.
+    """
+    if max_tokens <= 0 or not text:
+        return ""
+    if count_tokens(text) <= max_tokens:
+        return text
+    encoding = _get_encoding()
+    if encoding is not None:
+        cut = encoding.decode(encoding.encode(text)[:max_tokens])
+    else:
+        cut = text[:max_tokens * CHARS_PER_TOKEN]
+    if " " in cut:
+        cut = cut.rsplit(" ", 1)[0]
+    return cut.rstrip(" ,;:") + "..."
+
+def summarize(text: str, max_tokens: int) -> str:
+    """Extractive summary: the leading sentences of ``text`` that fit ``max_tokens``."""
+    text = " ".join((text or "").split())
+    summary = []
+    used = 0
+    for sentence in SENTENCE_BOUNDARY.split(text):
+        tokens = count_tokens(sentence)
+        if used + tokens > max_tokens:
+            break
+        summary.append(sentence)
+        used += tokens
+    if not summary:
+        return truncate_to_tokens(text, max_tokens)
+    return " ".join(summary)
+
+def content_hash(text: Optional[str]) -> str:
+    """Stable fingerprint of section content, used to detect stale summaries."""
+    return hashlib.sha256((text or "").encode("utf-8")).hexdigest()
+
+def stale_summary(section) -> Optional[Tuple[str, str]]:
+    """``(summary, content_hash)`` to store when the section's summary is
+    missing or was made from older content; None while it is current."""
+    digest = content_hash(section.content)
+    if section.summary is not None and section.summary_hash == digest:
+        return None
+    return summarize(section.content or "", settings.LLM_SECTION_SUMMARY_TOKENS), digest
+
+def allocate(needs: Sequence[int], weights: Sequence[float], budget: int) -> List[int]:
+    """Split ``budget`` tokens across items by weight, never giving more than needed.
+
+    Budget an item does not need (e.g. a short section) is redistributed
+    to the others, so short context never wastes the allowance.
+    """
+    grants = [0] * len(needs)
+    open_items = [i for i, need in enumerate(needs) if need > 0]
+    remaining = max(0, budget)
+    while open_items and remaining > 0:
+        total_weight = sum(weights[i] for i in open_items)
+        satisfied = [
+            i for i in open_items
+            if needs[i] - grants[i] <= remaining * weights[i] / total_weight
+        ]
+        if not satisfied:
+            for i in open_items:
+                grants[i] += int(remaining * weights[i] / total_weight)
+            break
+        for i in satisfied:
+            remaining -= needs[i] - grants[i]
+            grants[i] = needs[i]
+            open_items.remove(i)
+    return grants
+
+def prompt_token_budget(provider_name: str) -> int:
+    """Prompt token budget for a provider, from LLM_PROMPT_TOKEN_BUDGETS."""
+    for entry in settings.LLM_PROMPT_TOKEN_BUDGETS.split(","):
+        name, _, value = entry.partition("=")
+        if name.strip().lower() == provider_name.lower() and value.strip().isdigit():
+            return int(value)
+    return settings.LLM_PROMPT_TOKEN_BUDGET
@@ -0,0 +1,198 @@
+"""Delta-compressed revision history.
+
+A revision stores its new content either as a full snapshot or as a delta
+against the previous version of the same section. Version 1 and every
+REVISION_SNAPSHOT_INTERVAL-th version after it are snapshots, as is any
+version whose delta would not be smaller than the text, so rebuilding a
+version never replays more than one interval of rows.
+
+``old_content`` normally equals the previous version's content and then
+costs nothing; when it does not (the section was edited by hand between
+refinements) it is stored as a delta against the revision's new content.
+"""
+import json
+import re
+from difflib import SequenceMatcher
+from typing import Dict, Iterable, List, Optional, Tuple
+from uuid import UUID
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.models.project import Project
+from app.models.revision import Revision
+from app.models.section import Section
+
+# Words with their trailing whitespace; deltas copy whole tokens. Keeping
+# whitespace attached stops SequenceMatcher matching every lone space.
+_TOKENS = re.compile(r"\s*\S+\s*|\s+")
+
+Contents = Tuple[Optional[str], str]
+
+def _tokenize(text: str) -> List[str]:
+    return _TOKENS.findall(text)
+
+def encode_delta(source: str, target: Optional[str]) -> str:
+    """A JSON edit script turning ``source`` into ``target``.
+
+    Non-negative integers copy that many source tokens, negative integers
+    skip that many, and strings are inserted as-is. ``None`` encodes as
+    ``null``.
+    """
+    if target is None:
+        return "null"
+    a, b = _tokenize(source), _tokenize(target)
+    ops = []
+    for tag, i1, i2, j1, j2 in SequenceMatcher(None, a, b, autojunk=False).get_opcodes():
+        if tag == "equal":
+            ops.append(i2 - i1)
+            continue
+        if i2 > i1:
+            ops.append(i1 - i2)
+        if j2 > j1:
+            ops.append("".join(b[j1:j2]))
+    return json.dumps(ops, ensure_ascii=False, separators=(",", ":"))
+
+def apply_delta(source: str, delta: str) -> Optional[str]:
+    """Inverse of :func:`encode_delta`."""
+    ops = json.loads(delta)
+    if ops is None:
+        return None
+    tokens = _tokenize(source)
+    out, pos = [], 0
+    for op in ops:
+        if isinstance(op, str):
+            out.append(op)
+        elif op >= 0:
+            out.extend(tokens[pos:pos + op])
+            pos += op
+        else:
+            pos -= op
+    return "".join(out)
+
+def pack(
+    version: int,
+    previous: Optional[str],
+    old_content: Optional[str],
+    new_content: str,
+    interval: Optional[int] = None
+) -> Dict[str, object]:
+    """Storage columns for ``version``, given the previous version's content."""
+    interval = max(1, interval or settings.REVISION_SNAPSHOT_INTERVAL)
+    row = {"version": version, "snapshot": None, "delta": None, "old_delta": None}
+    delta = None
+    if previous is not None and (version - 1) % interval:
+        delta = encode_delta(previous, new_content)
+    if delta is not None and len(delta) < len(new_content):
+        row["delta"] = delta
+    else:
+        row["snapshot"] = new_content
+    if old_content != previous:
+        row["old_delta"] = encode_delta(new_content, old_content)
+    return row
+
+def rebuild(rows: Iterable) -> Dict[int, str]:
+    """New content per version for rows ordered by version from a snapshot."""
+    contents: Dict[int, str] = {}
+    for row in rows:
+        if row.snapshot is not None:
+            contents[row.version] = row.snapshot
+        else:
+            contents[row.version] = apply_delta(contents[row.version - 1], row.delta)
+    return contents
+
+def old_content_of(row, contents: Dict[int, str]) -> Optional[str]:
+    """A row's old content, given :func:`rebuild` output covering its predecessor."""
+    if row.old_delta is not None:
+        return apply_delta(contents[row.version], row.old_delta)
+    return contents.get(row.version - 1)
+
+def _chain(section_id: UUID, through: Optional[int] = None):
+    """Rows needed to rebuild ``through`` (default: the latest version).
+
+    For a given version the chain starts at the last snapshot before it,
+    so the previous version -- and with it ``old_content`` -- is included.
+    """
+    start = select(func.max(Revision.version)).where(
+        Revision.section_id == section_id,
+        Revision.snapshot.isnot(None)
+    )
+    chain = select(
+        Revision.version, Revision.snapshot, Revision.delta, Revision.old_delta
+    ).where(Revision.section_id == section_id)
+    if through is not None:
+        start = start.where(Revision.version <= max(through - 1, 1))
+        chain = chain.where(Revision.version <= through)
+    return chain.where(Revision.version >= start.scalar_subquery()).order_by(Revision.version)
+
+def _contents_from(rows: List, version: int) -> Contents:
+    contents = rebuild(rows)
+    target = next(row for row in rows if row.version == version)
+    return old_content_of(target, contents), contents[version]
+
+async def record_revision(
+    db: AsyncSession,
+    section_id: UUID,
+    project_id: UUID,
+    user_id: UUID,
+    prompt: str,
+    old_content: Optional[str],
+    new_content: str
+) -> Revision:
+    """Add the next revision of a section to ``db`` (the caller commits).
+
+    The section row stays locked until then, so concurrent refinements of
+    one section take consecutive versions instead of colliding.
+    """
+    await db.execute(select(Section.id).where(Section.id == section_id).with_for_update())
+    result = await db.execute(_chain(section_id))
+    contents = rebuild(result.all())
+    latest = max(contents, default=0)
+    revision = Revision(
+        section_id=section_id,
+        project_id=project_id,
+        user_id=user_id,
+        prompt=prompt,
+        **pack(latest + 1, contents.get(latest), old_content, new_content)
+    )
+    revision._contents = (old_content, new_content)
+    db.add(revision)
+    return revision
+
+async def save_llm_content(
+    db: AsyncSession,
+    project: Project,
+    section: Section,
+    user_id: UUID,
+    prompt: str,
+    content: str
+) -> Revision:
+    """Make LLM output the section's content, record its revision and commit.
+
+    The JSON and streaming endpoints both save through here, so the
+    transport never changes what is stored.
+    """
+    revision = await record_revision(
+        db,
+        section_id=section.id,
+        project_id=project.id,
+        user_id=user_id,
+        prompt=prompt,
+        old_content=section.content,
+        new_content=content
+    )
+    section.llm_raw = content
+    section.content = content
+    project.touch()
+    await db.commit()
+    return revision
+
+async def load_version(db: AsyncSession, section_id: UUID, version: int) -> Contents:
+    """``(old_content, new_content)`` of one version of a section."""
+    result = await db.execute(_chain(section_id, version))
+    return _contents_from(result.all(), version)
+
+async def load_contents(db: AsyncSession, revision: Revision) -> Contents:
+    """Rebuild a revision's contents with an async session and cache them."""
+    if revision._contents is None:
+        revision._contents = await load_version(db, revision.section_id, revision.version)
+    return revision._contents
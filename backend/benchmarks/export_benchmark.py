@@ -0,0 +1,84 @@
+"""Export re-render benchmark: full render vs cached section fragments.
+
+    python benchmarks/export_benchmark.py --type pptx --sections 10 30 60 120 --edits 1 5
+
+For each document size it times a cold export, where every section is
+rendered (what every export cost before fragments were cached), and a
+re-export after editing ``--edits`` sections, given the fragments of the
+previous export as ``app.services.export_pool`` passes them from the
+fragment cache. Cold time grows with the number of sections; re-export
+time should grow with the number of edits, plus a small per-section cost
+to assemble and compress the package.
+"""
+import argparse
+import io
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.models.project import DocumentType  # noqa: E402
+from app.services.export_renderer import ExportDocument, ExportSection, render  # noqa: E402
+
+VOCABULARY = (
+    "solar wind grid storage demand supply cost policy market carbon energy "
+    "battery panel turbine output capacity growth region forecast investment "
+    "efficiency network transition emissions utility customer price peak"
+).split()
+
+def paragraph(rng: random.Random) -> str:
+    words = [rng.choice(VOCABULARY) for _ in range(rng.randint(40, 80))]
+    return " ".join(words).capitalize() + "."
+
+def document(doc_type: DocumentType, sections: int, rng: random.Random) -> ExportDocument:
+    return ExportDocument(doc_type, "Benchmark", "Energy", tuple(
+        ExportSection(f"Section {i}", "\n\n".join(paragraph(rng) for _ in range(3)))
+        for i in range(sections)
+    ))
+
+def edit(doc: ExportDocument, count: int, rng: random.Random) -> ExportDocument:
+    sections = list(doc.sections)
+    for index in rng.sample(range(len(sections)), min(count, len(sections))):
+        sections[index] = ExportSection(sections[index].title, paragraph(rng))
+    return ExportDocument(doc.doc_type, doc.title, doc.topic, tuple(sections))
+
+def timed(doc: ExportDocument, fragments, repeat: int) -> float:
+    """Median milliseconds to render ``doc``."""
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        render(doc, io.BytesIO(), fragments=fragments)
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--type", choices=[t.value for t in DocumentType], default="pptx")
+    parser.add_argument("--sections", type=int, nargs="+", default=[10, 30, 60, 120])
+    parser.add_argument("--edits", type=int, nargs="+", default=[1, 5])
+    parser.add_argument("--repeat", type=int, default=5, help="renders per timing (median)")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    doc_type = DocumentType(args.type)
+    # Builds the blank template package, which each worker does once
+    render(document(doc_type, 1, rng), io.BytesIO())
+
+    header = f"{'sections':>8}  {'full ms':>9}" + "".join(f"  {f'{n} edited ms':>13}" for n in args.edits)
+    print(f"{doc_type.value}: median of {args.repeat} renders")
+    print(header)
+    for count in args.sections:
+        doc = document(doc_type, count, rng)
+        full = timed(doc, None, args.repeat)
+        fragments = render(doc, io.BytesIO())
+        row = f"{count:>8}  {full:>9.1f}"
+        for edits in args.edits:
+            row += f"  {timed(edit(doc, edits, rng), fragments, args.repeat):>13.1f}"
+        print(row)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""End-to-end generation load test.
+
+Start the backend with an offline provider, e.g.
+
+    LLM_PROVIDER=synthetic LLM_SYNTHETIC_LATENCY_MS=800 LLM_CACHE_ENABLED=false uvicorn app.main:app
+
+then run
+
+    python benchmarks/generation_benchmark.py --sections 50 --concurrency 16
+
+The script registers a throwaway user, creates a project with the requested
+number of sections and generates each one through the public API,
+reporting throughput and latency percentiles.
+"""
+import argparse
+import asyncio
+import math
+import time
+import uuid
+import httpx
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    return ordered[max(1, math.ceil(pct / 100 * len(ordered))) - 1]
+
+async def setup(client: httpx.AsyncClient, sections: int):
+    email = f"bench-{uuid.uuid4().hex[:12]}@example.com"
+    response = await client.post("/api/v1/auth/register", json={"email": email, "password": "benchmark-password"})
+    response.raise_for_status()
+    client.headers["Authorization"] = f"Bearer {response.json()['access_token']}"
+
+    response = await client.post("/api/v1/projects", json={
+        "title": "Benchmark deck",
+        "doc_type": "pptx",
+        "topic": "Load testing a document generation service",
+    })
+    response.raise_for_status()
+    project_id = response.json()["id"]
+
+    section_ids = []
+    for i in range(sections):
+        response = await client.post(f"/api/v1/projects/{project_id}/sections", json={
+            "title": f"Slide {i + 1}",
+            "order_index": i,
+        })
+        response.raise_for_status()
+        section_ids.append(response.json()["id"])
+    return project_id, section_ids
+
+async def run(args):
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.url, timeout=args.timeout, limits=limits) as client:
+        project_id, section_ids = await setup(client, args.sections)
+        semaphore = asyncio.Semaphore(args.concurrency)
+        latencies, failures = [], 0
+
+        async def generate(section_id):
+            nonlocal failures
+            async with semaphore:
+                started = time.perf_counter()
+                try:
+                    response = await client.post("/api/v1/generate/section", json={
+                        "project_id": project_id,
+                        "section_id": section_id,
+                        "bypass_cache": args.bypass_cache,
+                    })
+                    ok = response.status_code == 200
+                except httpx.HTTPError:
+                    ok = False
+                if ok:
+                    latencies.append(time.perf_counter() - started)
+                else:
+                    failures += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(generate(sid) for sid in section_ids for _ in range(args.rounds)))
+        elapsed = time.perf_counter() - started
+
+    total = len(section_ids) * args.rounds
+    print(f"requests:    {total} ({failures} failed) at concurrency {args.concurrency}")
+    print(f"elapsed:     {elapsed:.2f}s")
+    print(f"throughput:  {len(latencies) / elapsed:.1f} req/s")
+    for pct in (50, 90, 95, 99):
+        print(f"p{pct}:         {percentile(latencies, pct) * 1000:.0f} ms")
+    if latencies:
+        print(f"max:         {max(latencies) * 1000:.0f} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--sections", type=int, default=20)
+    parser.add_argument("--rounds", type=int, default=1, help="generations per section")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--bypass-cache", action="store_true")
+    asyncio.run(run(parser.parse_args()))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""Revision storage benchmark: full-text rows vs snapshots plus deltas.
+
+    python benchmarks/revision_benchmark.py --versions 60 --words 400
+
+Simulates a section refined ``--versions`` times, each refinement rewording
+a few sentences and occasionally adding or dropping one, and stores the
+history both ways: the old layout (full ``old_content`` and ``new_content``
+per row) and the delta layout written by ``app.services.revision_store``.
+It reports bytes stored and the time to rebuild the latest, a recent, a
+middle and the oldest version. Rebuilding a version with the delta layout
+reads at most REVISION_SNAPSHOT_INTERVAL + 1 rows from one index range,
+which the read timings below replay in memory.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.revision_store import old_content_of, pack, rebuild  # noqa: E402
+
+VOCABULARY = (
+    "solar wind grid storage demand supply cost policy market carbon energy "
+    "battery panel turbine output capacity growth region forecast investment "
+    "efficiency network transition emissions utility customer price peak"
+).split()
+
+def sentence(rng: random.Random) -> str:
+    words = [rng.choice(VOCABULARY) for _ in range(rng.randint(8, 18))]
+    return " ".join(words).capitalize() + "."
+
+def history(versions: int, words: int, seed: int):
+    """Successive contents of one section."""
+    rng = random.Random(seed)
+    sentences = [sentence(rng) for _ in range(max(1, words // 12))]
+    contents = []
+    for _ in range(versions):
+        for _ in range(rng.randint(1, 3)):
+            sentences[rng.randrange(len(sentences))] = sentence(rng)
+        if rng.random() < 0.2:
+            sentences.insert(rng.randrange(len(sentences) + 1), sentence(rng))
+        if rng.random() < 0.1 and len(sentences) > 1:
+            sentences.pop(rng.randrange(len(sentences)))
+        contents.append(" ".join(sentences))
+    return contents
+
+def size(*values) -> int:
+    return sum(len(value.encode()) for value in values if value is not None)
+
+def delta_rows(contents, interval: int):
+    rows, previous = [], None
+    for version, content in enumerate(contents, start=1):
+        rows.append(SimpleNamespace(**pack(version, previous, previous, content, interval)))
+        previous = content
+    return rows
+
+def chain(rows, version: int):
+    """The rows revision_store reads to rebuild ``version``."""
+    start = max(row.version for row in rows if row.snapshot is not None and row.version <= max(version - 1, 1))
+    return [row for row in rows if start <= row.version <= version]
+
+def read_latency(rows, version: int, repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        needed = chain(rows, version)
+        contents = rebuild(needed)
+        old_content_of(needed[-1], contents)
+    return (time.perf_counter() - started) / repeat
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--versions", type=int, default=60)
+    parser.add_argument("--words", type=int, default=400, help="approximate words per version")
+    parser.add_argument("--interval", type=int, default=10, help="snapshot interval")
+    parser.add_argument("--repeat", type=int, default=200, help="reads per timing")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    contents = history(args.versions, args.words, args.seed)
+    full_bytes = size(*contents) + size(*contents[:-1])
+
+    started = time.perf_counter()
+    rows = delta_rows(contents, args.interval)
+    write_ms = (time.perf_counter() - started) * 1000 / len(rows)
+    delta_bytes = sum(size(row.snapshot, row.delta, row.old_delta) for row in rows)
+
+    # Correctness check before timing anything
+    rebuilt = rebuild(rows)
+    assert [rebuilt[v] for v in range(1, len(contents) + 1)] == contents
+
+    print(f"versions: {len(contents)}   avg content: {size(*contents) // len(contents)} bytes")
+    print(f"full-text rows:  {full_bytes:>10} bytes")
+    print(f"snapshot+delta:  {delta_bytes:>10} bytes  ({delta_bytes / full_bytes:.1%}, {write_ms:.2f} ms/write)")
+    print("rebuild latency (rows read, ms per read):")
+    latest = len(contents)
+    for label, version in (("latest", latest), ("recent", max(1, latest - 3)),
+                           ("middle", max(1, latest // 2)), ("oldest", 1)):
+        print(f"  {label:<7} v{version:<4} {len(chain(rows, version)):>3} rows  "
+              f"{read_latency(rows, version, args.repeat) * 1000:.3f}")
+
+if __name__ == "__main__":
+    main()
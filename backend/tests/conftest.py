@@ -1,9 +1,18 @@
+import asyncio
 import pytest
+from typing import NamedTuple
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
-from app.core.database import Base, get_db
+from sqlalchemy.pool import NullPool
+from app.core.database import Base, async_database_url, get_async_db, get_db
 from app.main import app
+from app.services import llm_service as llm_service_module
+from app.services.export_cache import export_cache, fragment_cache
+from app.services.llm_providers import LLMProvider
+from app.services.llm_service import LLMService
+from app.services.principal_cache import principal_cache
 from app.core.config import settings
 import os
 
@@ -12,6 +21,10 @@ TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL", "postgresql://user:password@l
 
 engine = create_engine(TEST_DATABASE_URL)
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# TestClient runs each request on its own event loop; NullPool keeps asyncpg
+# connections from outliving the loop they were opened on
+async_engine = create_async_engine(async_database_url(TEST_DATABASE_URL), poolclass=NullPool)
+TestingAsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
 
 @pytest.fixture(scope="function")
 def db_session():
@@ -33,11 +46,65 @@ def client(db_session):
         finally:
             pass
     
+    async def override_get_async_db():
+        async with TestingAsyncSessionLocal() as db:
+            yield db
+    
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    principal_cache.clear()
+    export_cache.clear()
+    fragment_cache.clear()
     with TestClient(app) as test_client:
         yield test_client
     app.dependency_overrides.clear()
 
+class CapturedSQL(list):
+    """Statements recorded by ``capture_sql``; ``parameters`` lines up with them."""
+
+    def __init__(self, keep):
+        super().__init__()
+        self.parameters = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            if keep(statement):
+                self.append(statement)
+                self.parameters.append(parameters)
+
+        self._record = record
+        event.listen(async_engine.sync_engine, "before_cursor_execute", record)
+
+    def clear(self) -> None:
+        super().clear()
+        self.parameters.clear()
+
+    def stop(self) -> None:
+        if event.contains(async_engine.sync_engine, "before_cursor_execute", self._record):
+            event.remove(async_engine.sync_engine, "before_cursor_execute", self._record)
+
+    def __enter__(self) -> "CapturedSQL":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+@pytest.fixture
+def capture_sql():
+    """Record statements sent through the async engine.
+
+    ``capture_sql(keep)`` starts recording every statement for which
+    ``keep`` is true. Recording stops when the returned list is used as a
+    context manager and the block exits, or when the test ends.
+    """
+    started = []
+    def start(keep=lambda statement: True) -> CapturedSQL:
+        captured = CapturedSQL(keep)
+        started.append(captured)
+        return captured
+    yield start
+    for captured in started:
+        captured.stop()
+
 @pytest.fixture
 def test_user_data():
     return {
@@ -56,3 +123,89 @@ def auth_token(client, test_user_data):
     response = client.post("/api/v1/auth/login", json=test_user_data)
     return response.json()["access_token"]
 
+
+class FakeProvider(LLMProvider):
+    """Answers every prompt with ``reply``, a string or a function of the prompt.
+
+    Records the prompts it was sent and the peak number of concurrent
+    calls; ``stream`` yields the reply word by word.
+    """
+
+    name = "fake"
+    model = "fake-model"
+
+    def __init__(self, reply="Generated content.", delay: float = 0.0):
+        self.reply = reply
+        self.delay = delay
+        self.prompts = []
+        self.in_flight = 0
+        self.peak = 0
+        self.closed = False
+
+    @property
+    def calls(self) -> int:
+        return len(self.prompts)
+
+    def answer(self, prompt: str) -> str:
+        return self.reply(prompt) if callable(self.reply) else self.reply
+
+    async def generate(self, prompt, temperature=0.7, max_tokens=None):
+        self.prompts.append(prompt)
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+            return self.answer(prompt)
+        finally:
+            self.in_flight -= 1
+
+    async def stream(self, prompt, temperature=0.7, max_tokens=None):
+        self.prompts.append(prompt)
+        try:
+            for word in self.answer(prompt).split(" "):
+                await asyncio.sleep(self.delay)
+                yield word + " "
+        finally:
+            self.closed = True
+
+@pytest.fixture
+def use_llm():
+    """Install a provider, or a whole LLMService, as the app's LLM service."""
+    def install(provider):
+        service = provider
+        if not isinstance(provider, LLMService):
+            service = LLMService()
+            service._provider = provider
+            service.cache = None
+        llm_service_module._llm_service_instance = service
+        return provider
+    yield install
+    llm_service_module._llm_service_instance = None
+
+@pytest.fixture
+def provider(request, use_llm):
+    """An installed FakeProvider; parametrize indirectly with its arguments."""
+    return use_llm(FakeProvider(**getattr(request, "param", {})))
+
+class Deck(NamedTuple):
+    headers: dict
+    project: dict
+    sections: list
+
+@pytest.fixture
+def deck(client, auth_token):
+    """A presentation owned by the test user, with eight empty slides."""
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    project = client.post("/api/v1/projects", json={
+        "title": "Deck",
+        "doc_type": "pptx",
+        "topic": "Electric vehicles"
+    }, headers=headers).json()
+    sections = [
+        client.post(f"/api/v1/projects/{project['id']}/sections", json={
+            "title": f"Slide {i}",
+            "order_index": i
+        }, headers=headers).json()
+        for i in range(8)
+    ]
+    return Deck(headers, project, sections)
@@ -1,5 +1,12 @@
 import pytest
 from fastapi import status
+from app.core.config import settings
+from app.models.user import User
+
+@pytest.fixture
+def user_queries(capture_sql):
+    """SELECTs against users issued by request handlers."""
+    return capture_sql(lambda statement: "FROM users" in statement)
 
 def test_register(client, test_user_data):
     """Test user registration."""
@@ -44,3 +51,42 @@ def test_get_current_user(client, auth_token):
     assert "email" in data
     assert "id" in data
 
+def test_principal_is_cached_between_requests(client, auth_token, user_queries):
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    for _ in range(3):
+        assert client.post("/api/v1/projects", json={
+            "title": "Cached",
+            "doc_type": "docx",
+            "topic": "Test topic"
+        }, headers=headers).status_code == status.HTTP_201_CREATED
+    assert len(user_queries) <= 1
+
+def test_deleted_user_is_evicted_from_cache(client, auth_token, test_user_data, db_session):
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    assert client.post("/api/v1/projects", json={
+        "title": "Before",
+        "doc_type": "docx",
+        "topic": "Test topic"
+    }, headers=headers).status_code == status.HTTP_201_CREATED
+    
+    user = db_session.query(User).filter(User.email == test_user_data["email"]).first()
+    db_session.delete(user)
+    db_session.commit()
+    
+    response = client.post("/api/v1/projects", json={
+        "title": "After",
+        "doc_type": "docx",
+        "topic": "Test topic"
+    }, headers=headers)
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+def test_claims_only_reads_skip_user_lookup(client, auth_token, user_queries, monkeypatch):
+    monkeypatch.setattr(settings, "AUTH_CLAIMS_ONLY_READS", True)
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    user_queries.clear()
+    assert client.get("/api/v1/projects", headers=headers).status_code == status.HTTP_200_OK
+    assert user_queries == []
+    
+    # Tampered tokens are still rejected
+    response = client.get("/api/v1/projects", headers={"Authorization": f"Bearer {auth_token}x"})
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
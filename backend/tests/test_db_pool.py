@@ -0,0 +1,52 @@
+import pytest
+from sqlalchemy import create_engine, exc, text
+from app.core.config import settings
+from app.core.database import TimedQueuePool, instrument_pool, pool_options
+from app.core.metrics import metrics
+from tests.conftest import TEST_DATABASE_URL
+
+@pytest.fixture
+def small_engine():
+    metrics.reset()
+    engine = create_engine(
+        TEST_DATABASE_URL,
+        poolclass=TimedQueuePool,
+        pool_logging_name="test",
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.1
+    )
+    instrument_pool(engine.pool, "test")
+    yield engine
+    engine.dispose()
+
+def test_pool_options_follow_settings(monkeypatch):
+    monkeypatch.setattr(settings, "DB_POOL_SIZE", 12)
+    monkeypatch.setattr(settings, "DB_POOL_PRE_PING", False)
+    options = pool_options()
+    assert options["pool_size"] == 12
+    assert options["pool_pre_ping"] is False
+
+def test_pool_publishes_usage_and_churn(small_engine):
+    with small_engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+        assert metrics.get("db.pool.test.checked_out") == 1
+    assert metrics.get("db.pool.test.checked_out") == 0
+
+    with small_engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+    # The second checkout reuses the pooled connection
+    assert metrics.get("db.pool.test.connects") == 1
+    assert metrics.get("db.pool.test.checkouts") == 2
+    assert metrics.snapshot()["histograms"]["db.pool.test.wait_seconds"]["count"] == 2
+
+    small_engine.dispose()
+    assert metrics.get("db.pool.test.disconnects") == 1
+
+def test_pool_exhaustion_is_counted(small_engine):
+    with small_engine.connect():
+        with pytest.raises(exc.TimeoutError):
+            small_engine.connect()
+    assert metrics.get("db.pool.test.timeouts") == 1
+    wait = metrics.snapshot()["histograms"]["db.pool.test.wait_seconds"]
+    assert wait["sum"] >= 0.1
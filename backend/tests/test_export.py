@@ -0,0 +1,358 @@
+import asyncio
+import io
+import time
+import zipfile
+import pytest
+from datetime import datetime
+from uuid import UUID
+from docx import Document
+from fastapi import status
+from pptx import Presentation
+from app.api.v1.endpoints import export as export_module
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.models.project import DocumentType
+from app.services.export_cache import ExportCache, export_cache
+from app.services import export_jobs as export_jobs_module
+from app.services.export_jobs import export_jobs
+from app.services.export_pool import ExportPool, ExportPoolSaturatedError, export_pool, render_export
+from app.services.export_renderer import ExportDocument, ExportSection, fragment_keys, render
+from app.services.principal_cache import principal_cache
+
+@pytest.fixture
+def make_project(client, auth_token):
+    headers = {"Authorization": f"Bearer {auth_token}"}
+
+    def make(doc_type, sections=3, title="Export Test"):
+        project = client.post("/api/v1/projects", json={
+            "title": title, "doc_type": doc_type, "topic": "Exports"
+        }, headers=headers).json()
+        for i in range(sections):
+            section = client.post(f"/api/v1/projects/{project['id']}/sections", json={
+                "title": f"Part {i}", "order_index": i
+            }, headers=headers).json()
+            client.put(f"/api/v1/projects/{project['id']}/sections/{section['id']}", json={
+                "content": f"Paragraph one of part {i}.\n\nParagraph two of part {i}."
+            }, headers=headers)
+        return project
+
+    make.headers = headers
+    return make
+
+def export(client, make_project, project, doc_type):
+    return client.get(
+        f"/api/v1/export/project/{project['id']}",
+        params={"type": doc_type},
+        headers=make_project.headers
+    )
+
+def test_export_docx_streams_document(client, make_project):
+    project = make_project("docx")
+    response = export(client, make_project, project, "docx")
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"].startswith("application/vnd.openxmlformats-officedocument.wordprocessingml")
+    assert response.headers["content-disposition"] == f'attachment; filename="Export_Test_{project["id"]}.docx"'
+    assert int(response.headers["content-length"]) == len(response.content)
+
+    texts = [p.text for p in Document(io.BytesIO(response.content)).paragraphs]
+    assert texts[:4] == ["Export Test", "Part 0", "Paragraph one of part 0.", "Paragraph two of part 0."]
+
+def test_export_pptx_streams_presentation(client, make_project):
+    project = make_project("pptx", title="Déjà vu")
+    response = export(client, make_project, project, "pptx")
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-disposition"].startswith("attachment; filename*=utf-8''D%C3%A9j%C3%A0_vu_")
+
+    slides = Presentation(io.BytesIO(response.content)).slides
+    assert len(slides) == 4
+    assert slides[1].shapes.title.text == "Part 0"
+
+def test_large_exports_spill_without_leaving_files(client, make_project, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "EXPORT_TMP_DIR", str(tmp_path))
+    monkeypatch.setattr(settings, "EXPORT_SPOOL_MAX_BYTES", 1024)
+    # Too large to cache, so the spilled buffer is streamed
+    monkeypatch.setattr(export_cache, "max_bytes", 1024)
+    project = make_project("pptx", sections=20)
+    response = export(client, make_project, project, "pptx")
+    assert response.status_code == status.HTTP_200_OK
+    assert len(Presentation(io.BytesIO(response.content)).slides) == 21
+    assert list(tmp_path.iterdir()) == []
+
+def test_export_rejects_mismatched_or_unknown_type(client, make_project):
+    project = make_project("docx", sections=1)
+    assert export(client, make_project, project, "pptx").status_code == status.HTTP_400_BAD_REQUEST
+    assert export(client, make_project, project, "pdf").status_code == status.HTTP_400_BAD_REQUEST
+    empty = make_project("docx", sections=0)
+    assert export(client, make_project, empty, "docx").status_code == status.HTTP_400_BAD_REQUEST
+
+@pytest.fixture
+def render_calls(monkeypatch):
+    calls = []
+    render = export_pool.render
+    async def counting_render(document):
+        calls.append(document)
+        return await render(document)
+    monkeypatch.setattr(export_module.export_pool, "render", counting_render)
+    return calls
+
+def test_unchanged_exports_are_cached_and_revalidated(client, make_project, render_calls):
+    project = make_project("docx")
+    first = export(client, make_project, project, "docx")
+    etag = first.headers["etag"]
+    assert etag.startswith('"') and not etag.startswith('W/')
+    assert first.headers["cache-control"] == "private, no-cache"
+
+    second = export(client, make_project, project, "docx")
+    assert second.content == first.content
+    assert second.headers["etag"] == etag
+    assert len(render_calls) == 1
+
+    not_modified = client.get(
+        f"/api/v1/export/project/{project['id']}",
+        params={"type": "docx"},
+        headers=dict(make_project.headers, **{"If-None-Match": f'"stale", W/{etag}'})
+    )
+    assert not_modified.status_code == status.HTTP_304_NOT_MODIFIED
+    assert not_modified.content == b""
+    assert not_modified.headers["etag"] == etag
+    assert len(render_calls) == 1
+
+def test_editing_a_section_changes_the_etag(client, make_project, render_calls):
+    project = make_project("pptx")
+    etag = export(client, make_project, project, "pptx").headers["etag"]
+    section = client.get(f"/api/v1/projects/{project['id']}", headers=make_project.headers).json()["sections"][0]
+    client.put(f"/api/v1/projects/{project['id']}/sections/{section['id']}", json={
+        "content": "Edited."
+    }, headers=make_project.headers)
+
+    response = client.get(
+        f"/api/v1/export/project/{project['id']}",
+        params={"type": "pptx"},
+        headers=dict(make_project.headers, **{"If-None-Match": etag})
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["etag"] != etag
+    assert len(render_calls) == 2
+
+def test_export_cache_evicts_least_recently_used():
+    metrics.reset()
+    cache = ExportCache(max_bytes=10)
+    cache.set("a", b"1234")
+    cache.set("b", b"1234")
+    assert cache.get("a") == b"1234"
+    cache.set("c", b"1234")
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+    assert cache.current_bytes == 8
+    cache.set("huge", b"x" * 11)
+    assert cache.get("huge") is None
+    assert metrics.get("export_cache.evictions") == 1
+
+async def test_export_pool_rejects_beyond_capacity():
+    metrics.reset()
+    pool = ExportPool(max_workers=1, max_queue=0)
+    try:
+        running = asyncio.ensure_future(pool.run(time.sleep, 0.5))
+        await asyncio.sleep(0)
+        assert metrics.snapshot()["gauges"]["export_pool.utilization"] == 1.0
+        with pytest.raises(ExportPoolSaturatedError):
+            await pool.run(time.sleep, 0)
+        await running
+        assert pool.in_flight == 0
+        assert metrics.get("export_pool.rejected") == 1
+    finally:
+        pool.shutdown()
+
+async def wait_for_idle(pool):
+    deadline = time.monotonic() + 60
+    while pool.in_flight and time.monotonic() < deadline:
+        await asyncio.sleep(0.05)
+
+async def test_cancelled_caller_holds_slot_until_worker_finishes():
+    pool = ExportPool(max_workers=1, max_queue=0)
+    try:
+        waiting = asyncio.ensure_future(pool.run(time.sleep, 0.5))
+        await asyncio.sleep(0.05)
+        waiting.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiting
+        assert pool.in_flight == 1
+        with pytest.raises(ExportPoolSaturatedError):
+            await pool.run(time.sleep, 0)
+        await wait_for_idle(pool)
+        assert pool.in_flight == 0
+    finally:
+        pool.shutdown()
+
+async def test_cancelled_caller_leaves_no_spilled_file(tmp_path):
+    document = ExportDocument(DocumentType.DOCX, "Deck", "Topic", (ExportSection("Part", "Text."),))
+    pool = ExportPool(max_workers=1, max_queue=0)
+    try:
+        waiting = asyncio.ensure_future(pool.run(render_export, document, 0, str(tmp_path)))
+        await asyncio.sleep(0.05)
+        waiting.cancel()
+        await wait_for_idle(pool)
+        assert list(tmp_path.iterdir()) == []
+    finally:
+        pool.shutdown()
+
+def test_saturated_export_pool_returns_429(client, make_project, monkeypatch):
+    project = make_project("docx", sections=1)
+    monkeypatch.setattr(export_pool, "in_flight", export_pool.capacity)
+    response = export(client, make_project, project, "docx")
+    assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+    assert response.headers["retry-after"] == "1"
+
+def test_export_pool_publishes_render_metrics(client, make_project):
+    metrics.reset()
+    project = make_project("docx", sections=1)
+    assert export(client, make_project, project, "docx").status_code == status.HTTP_200_OK
+    snapshot = metrics.snapshot()
+    assert metrics.get("export_pool.completed") == 1
+    assert snapshot["gauges"]["export_pool.busy"] == 0
+    assert "export_pool.render_seconds" in snapshot["histograms"]
+
+@pytest.fixture
+def job_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(export_jobs, "directory", str(tmp_path / "jobs"))
+    return tmp_path / "jobs"
+
+def submit_job(client, make_project, project, doc_type):
+    return client.post(
+        f"/api/v1/export/project/{project['id']}/jobs",
+        params={"type": doc_type},
+        headers=make_project.headers
+    )
+
+def wait_for_job(client, make_project, job_id, *statuses):
+    deadline = time.monotonic() + 60
+    while True:
+        job = client.get(f"/api/v1/export/jobs/{job_id}", headers=make_project.headers).json()
+        if job["status"] in statuses or time.monotonic() > deadline:
+            return job
+        time.sleep(0.05)
+
+def test_export_job_renders_in_background_and_downloads(client, make_project, job_dir):
+    project = make_project("pptx", sections=5)
+    response = submit_job(client, make_project, project, "pptx")
+    assert response.status_code == status.HTTP_202_ACCEPTED
+    job = response.json()
+    assert job["status"] in ("queued", "running")
+    assert response.headers["location"].endswith(f"/api/v1/export/jobs/{job['id']}")
+
+    # Same snapshot while it renders: same job
+    assert submit_job(client, make_project, project, "pptx").json()["id"] == job["id"]
+
+    done = wait_for_job(client, make_project, job["id"], "done", "failed")
+    assert done["status"] == "done"
+    assert done["sections_done"] == done["sections_total"] == 5
+    assert done["expires_at"] is not None
+
+    download = client.get(f"/api/v1/export/jobs/{job['id']}/download", headers=make_project.headers)
+    assert download.status_code == status.HTTP_200_OK
+    assert download.headers["content-disposition"] == f'attachment; filename="Export_Test_{project["id"]}.pptx"'
+    assert int(download.headers["content-length"]) == len(download.content) == done["size"]
+    assert len(Presentation(io.BytesIO(download.content)).slides) == 6
+    assert submit_job(client, make_project, project, "pptx").json()["id"] == job["id"]
+
+    # Expired: status and file are gone
+    export_jobs._jobs[UUID(job["id"])].expires_at = datetime.utcnow()
+    assert client.get(f"/api/v1/export/jobs/{job['id']}", headers=make_project.headers).status_code == status.HTTP_404_NOT_FOUND
+    assert list(job_dir.iterdir()) == []
+
+def test_identical_projects_get_their_own_jobs(client, make_project, job_dir):
+    first, second = make_project("docx"), make_project("docx")
+    jobs = [submit_job(client, make_project, project, "docx").json() for project in (first, second)]
+    assert jobs[0]["id"] != jobs[1]["id"]
+
+    for project, job in zip((first, second), jobs):
+        assert job["project_id"] == project["id"]
+        assert wait_for_job(client, make_project, job["id"], "done", "failed")["status"] == "done"
+        download = client.get(f"/api/v1/export/jobs/{job['id']}/download", headers=make_project.headers)
+        assert download.headers["content-disposition"] == f'attachment; filename="Export_Test_{project["id"]}.docx"'
+
+def test_claims_only_mode_still_checks_the_user_before_submitting(client, make_project, job_dir, capture_sql, monkeypatch):
+    monkeypatch.setattr(settings, "AUTH_CLAIMS_ONLY_READS", True)
+    project = make_project("docx", sections=1)
+    principal_cache.clear()
+    with capture_sql(lambda statement: "FROM users" in statement) as user_queries:
+        response = submit_job(client, make_project, project, "docx")
+    assert response.status_code == status.HTTP_202_ACCEPTED
+    assert user_queries
+
+def test_export_job_reports_progress_and_refuses_early_download(client, make_project, job_dir, monkeypatch):
+    async def slow_render(document, path, on_section=None):
+        on_section(0)
+        on_section(2)
+        await asyncio.sleep(3600)
+    monkeypatch.setattr(export_jobs_module.export_pool, "render_to", slow_render)
+
+    project = make_project("docx")
+    job = submit_job(client, make_project, project, "docx").json()
+    running = wait_for_job(client, make_project, job["id"], "running")
+    assert running["status"] == "running"
+    assert (running["sections_done"], running["sections_total"]) == (2, 3)
+
+    download = client.get(f"/api/v1/export/jobs/{job['id']}/download", headers=make_project.headers)
+    assert download.status_code == status.HTTP_409_CONFLICT
+
+    other = client.post("/api/v1/auth/register", json={
+        "email": "intruder@example.com",
+        "password": "intruderpassword123"
+    }).json()
+    response = client.get(
+        f"/api/v1/export/jobs/{job['id']}",
+        headers={"Authorization": f"Bearer {other['access_token']}"}
+    )
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+def test_failed_export_job_is_not_reused(client, make_project, job_dir, monkeypatch):
+    async def broken_render(document, path, on_section=None):
+        raise RuntimeError("renderer crashed")
+    monkeypatch.setattr(export_jobs_module.export_pool, "render_to", broken_render)
+
+    project = make_project("docx", sections=1)
+    job = submit_job(client, make_project, project, "docx").json()
+    failed = wait_for_job(client, make_project, job["id"], "failed")
+    assert failed["status"] == "failed"
+    assert failed["error"] == "Export failed"
+    assert submit_job(client, make_project, project, "docx").json()["id"] != job["id"]
+
+@pytest.mark.parametrize("doc_type, part", [
+    (DocumentType.DOCX, "word/document.xml"),
+    (DocumentType.PPTX, "ppt/slides/slide4.xml"),  # After the title slide
+])
+def test_rerender_only_renders_changed_sections(doc_type, part):
+    sections = [ExportSection(f"Part {i}", f"Text of part {i}.") for i in range(5)]
+    original = ExportDocument(doc_type, "Deck", "Topic", tuple(sections))
+    fragments = render(original, io.BytesIO())
+    assert set(fragments) == set(fragment_keys(original))
+
+    sections[2] = ExportSection("Part 2", "Edited <text> & more.")
+    edited = ExportDocument(doc_type, "Deck", "Topic", tuple(sections))
+    incremental, full = io.BytesIO(), io.BytesIO()
+    rendered = render(edited, incremental, fragments=fragments)
+    assert list(rendered) == [fragment_keys(edited)[3]]
+
+    render(edited, full)
+    parts = [zipfile.ZipFile(buffer).read(part) for buffer in (incremental, full)]
+    assert parts[0] == parts[1]
+    assert b"Edited &lt;text&gt; &amp; more." in parts[0]
+
+def test_reexport_reuses_unchanged_section_fragments(client, make_project):
+    project = make_project("pptx")
+    export(client, make_project, project, "pptx")
+    section = client.get(f"/api/v1/projects/{project['id']}", headers=make_project.headers).json()["sections"][1]
+    client.put(f"/api/v1/projects/{project['id']}/sections/{section['id']}", json={
+        "content": "Only this slide changed."
+    }, headers=make_project.headers)
+
+    metrics.reset()
+    response = export(client, make_project, project, "pptx")
+    assert response.status_code == status.HTTP_200_OK
+    # Title slide and two unchanged sections come from the cache
+    assert metrics.get("export_fragments.hits") == 3
+    assert metrics.get("export_fragments.misses") == 1
+    slides = Presentation(io.BytesIO(response.content)).slides
+    assert [slide.shapes.title.text for slide in slides] == ["Export Test", "Part 0", "Part 1", "Part 2"]
+    assert slides[2].placeholders[1].text_frame.text == "Only this slide changed."
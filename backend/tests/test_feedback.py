@@ -0,0 +1,57 @@
+import pytest
+from fastapi import status
+from app.models.feedback import Feedback
+
+@pytest.fixture
+def section(client, auth_token):
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    project = client.post("/api/v1/projects", json={
+        "title": "Votes", "doc_type": "pptx", "topic": "Feedback"
+    }, headers=headers).json()
+    section = client.post(f"/api/v1/projects/{project['id']}/sections", json={
+        "title": "Slide", "order_index": 0
+    }, headers=headers).json()
+    return {"headers": headers, "project_id": project["id"], "section_id": section["id"], "section": section}
+
+def vote(client, section, liked):
+    response = client.post("/api/v1/feedback", json={
+        "project_id": section["project_id"],
+        "section_id": section["section_id"],
+        "liked": liked
+    }, headers=section["headers"])
+    assert response.status_code == status.HTTP_201_CREATED, response.text
+    return response.json()
+
+def totals(client, section):
+    response = client.get(
+        f"/api/v1/feedback/projects/{section['project_id']}/sections/{section['section_id']}",
+        headers=section["headers"]
+    )
+    assert response.status_code == status.HTTP_200_OK
+    return response.json()
+
+def test_repeat_votes_replace_the_users_row(client, section, db_session):
+    first = vote(client, section, True)
+    again = vote(client, section, True)
+    assert again["id"] == first["id"]
+    assert totals(client, section) == {"section_id": section["section_id"], "likes": 1, "dislikes": 0}
+
+    flipped = vote(client, section, False)
+    assert flipped["id"] == first["id"]
+    assert flipped["liked"] is False
+    assert totals(client, section)["likes"] == 0
+    assert totals(client, section)["dislikes"] == 1
+
+    assert db_session.query(Feedback).filter(Feedback.section_id == section["section_id"]).count() == 1
+
+def test_votes_do_not_touch_section_updated_at(client, section):
+    vote(client, section, True)
+    project = client.get(f"/api/v1/projects/{section['project_id']}", headers=section["headers"]).json()
+    assert project["sections"][0]["updated_at"] == section["section"]["updated_at"]
+
+def test_totals_are_read_in_one_statement(client, section, capture_sql):
+    vote(client, section, True)
+    with capture_sql(lambda statement: "FROM users" not in statement) as statements:
+        totals(client, section)
+    assert len([s for s in statements if s.lstrip().upper().startswith("SELECT")]) == 1
+    assert not any("feedbacks" in s for s in statements)
@@ -0,0 +1,177 @@
+import pytest
+from fastapi import status
+from sqlalchemy import text
+from app.core.config import settings
+from app.models.section import Section
+from tests.conftest import FakeProvider, engine
+
+def content_for(prompt: str, fail_on: str = None) -> str:
+    """Content naming the prompt's section title; raises for ``fail_on``."""
+    title = prompt.split("Section/Slide Title: ", 1)[1].split("\n", 1)[0]
+    if fail_on and title == fail_on:
+        raise RuntimeError("provider exploded")
+    return f"Content for {title}"
+
+@pytest.fixture
+def provider(provider):
+    provider.reply = content_for
+    provider.delay = 0.01
+    return provider
+
+def test_generate_project_fills_empty_sections(client, deck, provider, monkeypatch):
+    headers, project, sections = deck
+    monkeypatch.setattr(settings, "LLM_BULK_CONCURRENCY", 3)
+    monkeypatch.setattr(settings, "LLM_BULK_COMMIT_BATCH", 2)
+    client.put(
+        f"/api/v1/projects/{project['id']}/sections/{sections[0]['id']}",
+        json={"content": "Already written"},
+        headers=headers
+    )
+
+    response = client.post(f"/api/v1/generate/project/{project['id']}", json={}, headers=headers)
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert data["succeeded"] == 7
+    assert data["failed"] == 0
+    assert [r["section_id"] for r in data["results"]] == [s["id"] for s in sections[1:]]
+    assert provider.calls == 7
+    assert 1 < provider.peak <= 3
+
+    stored = client.get(f"/api/v1/projects/{project['id']}", headers=headers).json()["sections"]
+    assert stored[0]["content"] == "Already written"
+    assert stored[5]["content"] == "Content for Slide 5"
+
+def test_generate_project_reports_partial_failure(client, deck, provider):
+    headers, project, sections = deck
+    provider.reply = lambda prompt: content_for(prompt, fail_on="Slide 2")
+    subset = [sections[1]["id"], sections[2]["id"], sections[3]["id"]]
+
+    response = client.post(
+        f"/api/v1/generate/project/{project['id']}",
+        json={"section_ids": subset},
+        headers=headers
+    )
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert data["succeeded"] == 2
+    assert data["failed"] == 1
+    failed = data["results"][1]
+    assert failed["section_id"] == sections[2]["id"]
+    assert not failed["success"]
+    assert "provider exploded" in failed["error"]
+
+    stored = client.get(f"/api/v1/projects/{project['id']}", headers=headers).json()["sections"]
+    assert stored[1]["content"] == "Content for Slide 1"
+    assert stored[2]["content"] is None
+
+def test_generate_project_unknown_section(client, deck, provider):
+    headers, project, _ = deck
+    response = client.post(
+        f"/api/v1/generate/project/{project['id']}",
+        json={"section_ids": [project["id"]]},
+        headers=headers
+    )
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+    assert provider.calls == 0
+
+class BatchingProvider(FakeProvider):
+    """Answers batched prompts with one marker per requested item."""
+
+    def __init__(self, malformed: bool = False):
+        super().__init__(reply=content_for)
+        self.malformed = malformed
+        self.batch_calls = 0
+
+    async def generate(self, prompt, temperature=0.7, max_tokens=None):
+        if "Items:" not in prompt:
+            return await super().generate(prompt, temperature, max_tokens)
+        self.batch_calls += 1
+        items = prompt.split("Items:\n", 1)[1].split("\n")
+        titles = [line.split("=== ", 2)[2] for line in items if line.startswith("=== ITEM")]
+        if self.malformed:
+            return "\n".join(f"Content for {title}" for title in titles)
+        return "\n".join(
+            f"=== ITEM {i} === {title}\nBatched content for {title}"
+            for i, title in enumerate(titles, start=1)
+        )
+
+@pytest.fixture
+def batching_provider(use_llm):
+    return use_llm(BatchingProvider())
+
+def test_batch_mode_packs_sections_into_fewer_calls(client, deck, batching_provider, monkeypatch):
+    headers, project, sections = deck
+    monkeypatch.setattr(settings, "LLM_BATCH_SIZE", 3)
+
+    response = client.post(
+        f"/api/v1/generate/project/{project['id']}",
+        json={"batch": True},
+        headers=headers
+    )
+    data = response.json()
+    assert data["succeeded"] == 8
+    assert batching_provider.batch_calls == 3
+    assert batching_provider.calls == 0
+    assert data["results"][4]["content"] == "Batched content for Slide 4"
+
+def test_batch_mode_falls_back_when_unparseable(client, deck, batching_provider, monkeypatch):
+    headers, project, sections = deck
+    monkeypatch.setattr(settings, "LLM_BATCH_SIZE", 4)
+    batching_provider.malformed = True
+
+    response = client.post(
+        f"/api/v1/generate/project/{project['id']}",
+        json={"batch": True},
+        headers=headers
+    )
+    data = response.json()
+    assert data["succeeded"] == 8
+    assert batching_provider.batch_calls == 2
+    assert batching_provider.calls == 8
+    assert data["results"][0]["content"] == "Content for Slide 0"
+
+def test_summarising_neighbors_does_not_mark_them_edited(client, deck, provider, db_session):
+    headers, project, sections = deck
+    for section in sections[:3]:
+        client.put(f"/api/v1/projects/{project['id']}/sections/{section['id']}", json={
+            "content": f"Facts about {section['title']}. More detail."
+        }, headers=headers)
+    db_session.expire_all()
+    before = {s.id: s.updated_at for s in db_session.query(Section).filter(Section.project_id == project["id"])}
+
+    response = client.post("/api/v1/generate/section", json={
+        "project_id": project["id"], "section_id": sections[3]["id"]
+    }, headers=headers)
+    assert response.status_code == status.HTTP_200_OK
+
+    db_session.expire_all()
+    neighbors = db_session.query(Section).filter(
+        Section.project_id == project["id"], Section.order_index < 3
+    ).order_by(Section.order_index).all()
+    assert [s.summary for s in neighbors] == [f"Facts about Slide {i}. More detail." for i in range(3)]
+    assert all(s.updated_at == before[s.id] for s in neighbors)
+
+def test_neighbor_rows_are_not_locked_during_the_llm_call(client, deck, provider):
+    headers, project, sections = deck
+    for section in sections[:3]:
+        client.put(f"/api/v1/projects/{project['id']}/sections/{section['id']}", json={
+            "content": f"Facts about {section['title']}."
+        }, headers=headers)
+
+    def reply(prompt):
+        # Raises LockNotAvailable while a summary UPDATE is uncommitted
+        with engine.connect() as conn:
+            conn.execute(text(
+                "SELECT id FROM sections WHERE project_id = :project_id FOR UPDATE NOWAIT"
+            ), {"project_id": project["id"]})
+            conn.rollback()
+        return content_for(prompt)
+    provider.reply = reply
+
+    response = client.post("/api/v1/generate/section", json={
+        "project_id": project["id"], "section_id": sections[3]["id"]
+    }, headers=headers)
+    assert response.status_code == status.HTTP_200_OK, response.text
+
+    response = client.post(f"/api/v1/generate/project/{project['id']}", json={}, headers=headers)
+    assert response.json()["failed"] == 0, response.text
@@ -0,0 +1,77 @@
+import pytest
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.services.llm_offline import (
+    Cassette,
+    CassetteMissError,
+    RecordingProvider,
+    ReplayProvider,
+    SyntheticProvider,
+    SyntheticProviderError,
+)
+from app.services.llm_providers import create_provider
+from app.services.llm_resilience import is_retryable
+from app.services.llm_service import LLMService
+
+def make_synthetic(**overrides) -> SyntheticProvider:
+    options = dict(completion_tokens=30, latency_ms=0, latency_sigma=0, error_rate=0, seed=7)
+    options.update(overrides)
+    return SyntheticProvider(**options)
+
+async def test_synthetic_completion_is_sized_and_stable():
+    provider = make_synthetic()
+    first = await provider.generate("prompt")
+    assert len(first.split()) == 30
+    assert await provider.generate("prompt") == first
+    assert len((await provider.generate("prompt", max_tokens=5)).split()) == 5
+
+    streamed = "".join([chunk async for chunk in provider.stream("prompt")])
+    assert streamed == first
+
+def test_synthetic_latency_has_a_tail():
+    provider = make_synthetic(latency_ms=100, latency_sigma=0.8)
+    samples = sorted(provider.sample_latency() for _ in range(2000))
+    median = samples[len(samples) // 2]
+    assert 0.08 < median < 0.12
+    assert samples[int(len(samples) * 0.99)] > 2 * median
+
+async def test_synthetic_errors_are_retryable():
+    provider = make_synthetic(error_rate=1.0)
+    with pytest.raises(SyntheticProviderError) as exc_info:
+        await provider.generate("prompt")
+    assert is_retryable(exc_info.value)
+
+async def test_record_then_replay(tmp_path):
+    path = str(tmp_path / "cassette.jsonl")
+    live = make_synthetic()
+    recorder = RecordingProvider(live, Cassette(path))
+    assert recorder.name == "synthetic"
+    recorded = await recorder.generate("first prompt", temperature=0.2)
+    streamed = "".join([chunk async for chunk in recorder.stream("second prompt")])
+
+    replay = ReplayProvider(Cassette(path))
+    assert len(replay.cassette) == 2
+    assert await replay.generate("first prompt", temperature=0.2) == recorded
+    assert "".join([chunk async for chunk in replay.stream("second prompt")]) == streamed
+
+    # Temperature is part of the recorded request
+    with pytest.raises(CassetteMissError):
+        await replay.generate("first prompt", temperature=0.9)
+
+async def test_replay_falls_back_for_unknown_prompts(tmp_path):
+    replay = ReplayProvider(Cassette(str(tmp_path / "empty.jsonl")), fallback=make_synthetic())
+    assert len((await replay.generate("never recorded")).split()) == 30
+
+async def test_provider_selected_through_settings(monkeypatch, tmp_path):
+    metrics.reset()
+    monkeypatch.setattr(settings, "LLM_PROVIDER", "synthetic")
+    monkeypatch.setattr(settings, "LLM_SYNTHETIC_LATENCY_MS", 1.0)
+    monkeypatch.setattr(settings, "LLM_SYNTHETIC_TOKENS", 12)
+    service = LLMService()
+    service.cache = None
+    assert len((await service.generate_content("prompt")).split()) == 12
+
+    monkeypatch.setattr(settings, "LLM_CASSETTE_PATH", str(tmp_path / "llm.jsonl"))
+    monkeypatch.setattr(settings, "LLM_RECORD_PROVIDER", "synthetic")
+    assert isinstance(create_provider("record"), RecordingProvider)
+    assert isinstance(create_provider("replay"), ReplayProvider)
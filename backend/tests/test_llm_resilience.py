@@ -0,0 +1,122 @@
+import time
+import pytest
+from fastapi import status
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.services.llm_providers import LLMProvider
+from app.services.llm_resilience import (
+    CircuitBreaker,
+    LLMServiceError,
+    LLMUnavailableError,
+    TokenBucket,
+)
+from app.services.llm_service import LLMService
+
+class ProviderStatusError(Exception):
+    """Mimics an SDK error carrying an HTTP status code."""
+
+    def __init__(self, status_code: int):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+class FlakyProvider(LLMProvider):
+    """Fails with the queued errors, then succeeds."""
+
+    name = "flaky"
+    model = "flaky-model"
+
+    def __init__(self, errors):
+        self.errors = list(errors)
+        self.calls = 0
+
+    async def generate(self, prompt, temperature=0.7, max_tokens=None):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return "recovered"
+
+@pytest.fixture(autouse=True)
+def fast_retries(monkeypatch):
+    metrics.reset()
+    monkeypatch.setattr(settings, "LLM_RETRY_BASE_DELAY", 0.001)
+    monkeypatch.setattr(settings, "LLM_RETRY_MAX_DELAY", 0.01)
+    monkeypatch.setattr(settings, "LLM_RETRY_MAX_ATTEMPTS", 3)
+    monkeypatch.setattr(settings, "LLM_CIRCUIT_FAILURE_THRESHOLD", 3)
+    monkeypatch.setattr(settings, "LLM_CIRCUIT_RESET_SECONDS", 30.0)
+
+def make_service(provider: LLMProvider) -> LLMService:
+    service = LLMService()
+    service._provider = provider
+    service.cache = None
+    return service
+
+async def test_retries_transient_errors():
+    provider = FlakyProvider([ProviderStatusError(429), ProviderStatusError(503)])
+    service = make_service(provider)
+    assert await service.generate_content("prompt") == "recovered"
+    assert provider.calls == 3
+    assert metrics.get("llm.retry.flaky.attempts") == 2
+
+async def test_does_not_retry_client_errors():
+    provider = FlakyProvider([ProviderStatusError(400)])
+    service = make_service(provider)
+    with pytest.raises(LLMServiceError):
+        await service.generate_content("prompt")
+    assert provider.calls == 1
+    assert service._get_breaker(provider).state == CircuitBreaker.CLOSED
+
+async def test_circuit_opens_and_fails_fast():
+    provider = FlakyProvider([ProviderStatusError(503)] * 10)
+    service = make_service(provider)
+    with pytest.raises(LLMUnavailableError) as exc_info:
+        await service.generate_content("prompt")
+    assert exc_info.value.retry_after > 0
+    assert provider.calls == 3
+
+    with pytest.raises(LLMUnavailableError):
+        await service.generate_content("another prompt")
+    assert provider.calls == 3
+    assert metrics.get("llm.circuit.flaky.open") == 1
+    assert metrics.get("llm.circuit.flaky.rejected") == 1
+
+def test_half_open_probe_closes_circuit(monkeypatch):
+    breaker = CircuitBreaker("probe", failure_threshold=1, reset_timeout=10)
+    now = time.monotonic()
+    monkeypatch.setattr(time, "monotonic", lambda: now)
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(LLMUnavailableError):
+        breaker.before_call()
+
+    monkeypatch.setattr(time, "monotonic", lambda: now + 11)
+    breaker.before_call()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    with pytest.raises(LLMUnavailableError):
+        breaker.before_call()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+async def test_token_bucket_throttles_after_burst():
+    bucket = TokenBucket(rate_per_minute=600, name="test")
+    for _ in range(600):
+        assert await bucket.acquire() == 0
+    started = time.perf_counter()
+    waited = await bucket.acquire()
+    assert waited > 0
+    assert time.perf_counter() - started >= 0.09
+    assert metrics.get("llm.ratelimit.test.waits") == 1
+
+def test_open_circuit_returns_503_with_retry_after(client, auth_token, use_llm):
+    provider = FlakyProvider([])
+    service = use_llm(make_service(provider))
+    breaker = service._get_breaker(provider)
+    for _ in range(3):
+        breaker.record_failure()
+    response = client.post(
+        "/api/v1/ai/suggest-outline",
+        json={"topic": "Tides", "doc_type": "docx"},
+        headers={"Authorization": f"Bearer {auth_token}"}
+    )
+    assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+    assert int(response.headers["Retry-After"]) >= 1
+    assert provider.calls == 0
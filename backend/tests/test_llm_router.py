@@ -0,0 +1,140 @@
+import asyncio
+import pytest
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.services.llm_providers import LLMProvider
+from app.services.llm_resilience import CircuitBreaker
+from app.services.llm_service import LLMService
+
+class TimedProvider(LLMProvider):
+    """Answers with its own name after ``delay`` seconds, or raises ``error``."""
+
+    model = "timed-model"
+
+    def __init__(self, name: str, delay: float = 0.0, error: Exception = None):
+        self.name = name
+        self.delay = delay
+        self.error = error
+        self.calls = 0
+        self.cancelled = 0
+
+    async def generate(self, prompt, temperature=0.7, max_tokens=None):
+        self.calls += 1
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        if self.error is not None:
+            raise self.error
+        return self.name
+
+class ProviderStatusError(Exception):
+    def __init__(self, status_code: int):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+@pytest.fixture(autouse=True)
+def router_settings(monkeypatch):
+    metrics.reset()
+    monkeypatch.setattr(settings, "LLM_RETRY_BASE_DELAY", 0.001)
+    monkeypatch.setattr(settings, "LLM_RETRY_MAX_DELAY", 0.01)
+    monkeypatch.setattr(settings, "LLM_RETRY_MAX_ATTEMPTS", 2)
+    monkeypatch.setattr(settings, "LLM_CIRCUIT_FAILURE_THRESHOLD", 2)
+    monkeypatch.setattr(settings, "LLM_HEDGE_ENABLED", False)
+    monkeypatch.setattr(settings, "LLM_HEDGE_MIN_DELAY", 0.05)
+    monkeypatch.setattr(settings, "LLM_HEDGE_MIN_SAMPLES", 3)
+
+def make_service(primary: LLMProvider, *fallbacks: LLMProvider) -> LLMService:
+    service = LLMService()
+    service._provider = primary
+    service._fallbacks = list(fallbacks)
+    service.cache = None
+    return service
+
+async def test_fails_over_to_backup_provider():
+    primary = TimedProvider("primary", error=ProviderStatusError(503))
+    backup = TimedProvider("backup")
+    service = make_service(primary, backup)
+
+    assert await service.generate_content("prompt") == "backup"
+    assert primary.calls == 2  # retried before failing over
+    assert metrics.get("llm.route.failovers") == 1
+    assert metrics.get("llm.route.backup.backup_wins") == 1
+
+async def test_fails_over_when_provider_call_is_cancelled():
+    # As when an SDK cancels its own request task
+    primary = TimedProvider("primary", error=asyncio.CancelledError())
+    backup = TimedProvider("backup")
+    service = make_service(primary, backup)
+
+    assert await service.generate_content("prompt") == "backup"
+    assert metrics.get("llm.route.primary.errors") == 1
+    assert metrics.get("llm.route.backup.backup_wins") == 1
+
+async def test_skips_provider_with_open_circuit():
+    primary = TimedProvider("primary", error=ProviderStatusError(503))
+    backup = TimedProvider("backup")
+    service = make_service(primary, backup)
+    await service.generate_content("first")
+    assert service._get_breaker(primary).state == CircuitBreaker.OPEN
+
+    assert await service.generate_content("second") == "backup"
+    assert primary.calls == 2
+    # Streaming starts on the first provider that is still healthy
+    assert service._select_stream_provider() is backup
+    service.ensure_available()
+
+async def test_hedge_wins_over_slow_primary_and_cancels_it(monkeypatch):
+    monkeypatch.setattr(settings, "LLM_HEDGE_ENABLED", True)
+    primary = TimedProvider("primary", delay=5.0)
+    backup = TimedProvider("backup", delay=0.01)
+    service = make_service(primary, backup)
+
+    started = asyncio.get_running_loop().time()
+    assert await service.generate_content("prompt") == "backup"
+    assert asyncio.get_running_loop().time() - started < 1.0
+    await asyncio.sleep(0)
+    assert primary.cancelled == 1
+    assert metrics.get("llm.route.hedges") == 1
+    assert metrics.get("llm.route.backup.backup_wins") == 1
+
+async def test_lost_hedges_raise_the_hedge_delay(monkeypatch):
+    monkeypatch.setattr(settings, "LLM_HEDGE_ENABLED", True)
+    monkeypatch.setattr(settings, "LLM_HEDGE_MIN_DELAY", 0.01)
+    primary = TimedProvider("primary", delay=5.0)
+    backup = TimedProvider("backup", delay=0.03)
+    service = make_service(primary, backup)
+
+    for i in range(3):
+        assert await service.generate_content(f"prompt {i}") == "backup"
+        await asyncio.sleep(0)
+    # Each cut-off primary call counts as at least as slow as it got
+    assert service.latency.count("primary") == 3
+    assert service.router.hedge_delay(primary) >= 0.04
+    assert "llm.latency.primary" not in metrics.snapshot()["histograms"]
+
+async def test_fast_primary_is_not_hedged(monkeypatch):
+    monkeypatch.setattr(settings, "LLM_HEDGE_ENABLED", True)
+    primary = TimedProvider("primary", delay=0.001)
+    backup = TimedProvider("backup")
+    service = make_service(primary, backup)
+
+    for i in range(5):
+        assert await service.generate_content(f"prompt {i}") == "primary"
+    assert backup.calls == 0
+    assert metrics.get("llm.route.primary.primary_wins") == 5
+
+    histogram = metrics.snapshot()["histograms"]["llm.latency.primary"]
+    assert histogram["count"] == 5
+    assert histogram["buckets"]["0.1"] == 5
+
+def test_hedge_delay_follows_latency_percentile():
+    service = make_service(TimedProvider("primary"))
+    provider = service._get_provider()
+    # Too few samples: fall back to the configured minimum
+    assert service.router.hedge_delay(provider) == 0.05
+    for seconds in (0.2, 0.3, 0.4, 2.0):
+        service.latency.record("primary", seconds)
+    service.router.hedge_percentile = 50.0
+    assert service.router.hedge_delay(provider) == 0.3
@@ -0,0 +1,159 @@
+import asyncio
+import time
+from types import SimpleNamespace
+import httpx
+import pytest
+from app.core.metrics import metrics
+from app.main import app
+from app.services.llm_cache import LLMResponseCache, MemoryCacheTier
+from app.services.llm_providers import OpenAIProvider
+from app.services.llm_service import LLMService
+
+class SlowCompletions:
+    """Stand-in for ``AsyncOpenAI().chat.completions`` with fixed latency."""
+
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.calls = 0
+
+    async def create(self, **kwargs):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        message = SimpleNamespace(content=f"completion for {kwargs['messages'][0]['content']}")
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+def make_slow_service(delay: float, cache=None) -> LLMService:
+    completions = SlowCompletions(delay)
+    provider = OpenAIProvider(api_key="test")
+    provider._client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    service = LLMService()
+    service._provider = provider
+    service.cache = cache
+    service.completions = completions
+    return service
+
+@pytest.fixture(autouse=True)
+def reset_metrics():
+    metrics.reset()
+    yield
+
+async def test_health_answers_while_generations_are_in_flight():
+    """Slow provider calls must not stall other requests on the same loop."""
+    service = make_slow_service(delay=0.5)
+    generations = [
+        asyncio.create_task(service.generate_content(f"prompt {i}"))
+        for i in range(20)
+    ]
+    await asyncio.sleep(0)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        started = time.perf_counter()
+        response = await client.get("/health")
+        elapsed = time.perf_counter() - started
+
+    assert response.status_code == 200
+    assert response.json() == {"status": "healthy"}
+    assert elapsed < 0.25
+    assert not any(task.done() for task in generations)
+
+    results = await asyncio.gather(*generations)
+    assert results[3] == "completion for prompt 3"
+
+async def test_generations_run_concurrently():
+    """Twenty 0.2s completions should finish in roughly one round trip."""
+    service = make_slow_service(delay=0.2)
+    started = time.perf_counter()
+    await asyncio.gather(*(service.generate_content(f"prompt {i}") for i in range(20)))
+    assert time.perf_counter() - started < 1.0
+
+async def test_provider_errors_are_wrapped():
+    service = LLMService()
+    service.provider = "unknown"
+    with pytest.raises(Exception, match="Failed to generate content"):
+        await service.generate_content("prompt")
+
+async def test_cache_serves_repeated_prompts():
+    service = make_slow_service(delay=0, cache=LLMResponseCache(max_bytes=1024, ttl_seconds=60))
+    first = await service.generate_content("outline for solar energy")
+    second = await service.generate_content("outline for solar energy")
+    assert first == second
+    assert service.completions.calls == 1
+    assert metrics.get("llm_cache.hits") == 1
+    assert metrics.get("llm_cache.misses") == 1
+
+async def test_cache_key_includes_generation_parameters():
+    service = make_slow_service(delay=0, cache=LLMResponseCache(max_bytes=1024, ttl_seconds=60))
+    await service.generate_content("prompt", temperature=0.7)
+    await service.generate_content("prompt", temperature=0.2)
+    await service.generate_content("prompt", temperature=0.2, max_tokens=50)
+    assert service.completions.calls == 3
+
+async def test_cache_bypass_calls_provider():
+    service = make_slow_service(delay=0, cache=LLMResponseCache(max_bytes=1024, ttl_seconds=60))
+    await service.generate_content("prompt")
+    await service.generate_content("prompt", use_cache=False)
+    assert service.completions.calls == 2
+    assert metrics.get("llm_cache.bypassed") == 1
+
+def test_memory_tier_evicts_least_recently_used_by_bytes():
+    tier = MemoryCacheTier(max_bytes=10, ttl_seconds=60)
+    tier.set("a", "aaaa")
+    tier.set("b", "bbbb")
+    assert tier.get("a") == "aaaa"
+    tier.set("c", "cccc")
+    assert tier.get("b") is None
+    assert tier.get("a") == "aaaa"
+    assert tier.current_bytes == 8
+    assert metrics.get("llm_cache.evictions") == 1
+
+def test_memory_tier_expires_entries(monkeypatch):
+    tier = MemoryCacheTier(max_bytes=100, ttl_seconds=5)
+    now = time.monotonic()
+    monkeypatch.setattr(time, "monotonic", lambda: now)
+    tier.set("a", "value")
+    monkeypatch.setattr(time, "monotonic", lambda: now + 6)
+    assert tier.get("a") is None
+    assert tier.current_bytes == 0
+
+async def test_disk_tier_is_shared_between_caches(tmp_path):
+    first = LLMResponseCache(max_bytes=1024, ttl_seconds=60, directory=str(tmp_path))
+    second = LLMResponseCache(max_bytes=1024, ttl_seconds=60, directory=str(tmp_path))
+    await first.set("key", "shared value")
+    assert await second.get("key") == "shared value"
+    assert metrics.get("llm_cache.disk_hits") == 1
+
+async def test_concurrent_identical_prompts_share_one_call():
+    service = make_slow_service(delay=0.1)
+    results = await asyncio.gather(*(service.generate_content("same prompt") for _ in range(5)))
+    assert set(results) == {"completion for same prompt"}
+    assert service.completions.calls == 1
+    assert metrics.get("llm.singleflight.leaders") == 1
+    assert metrics.get("llm.singleflight.coalesced") == 4
+    assert service._inflight == {}
+
+async def test_cancelled_waiter_does_not_cancel_shared_call():
+    service = make_slow_service(delay=0.1)
+    first = asyncio.create_task(service.generate_content("same prompt"))
+    second = asyncio.create_task(service.generate_content("same prompt"))
+    await asyncio.sleep(0.01)
+    first.cancel()
+    assert await second == "completion for same prompt"
+    assert first.cancelled()
+    assert service.completions.calls == 1
+    assert metrics.get("llm.singleflight.cancelled") == 0
+
+async def test_last_waiter_leaving_cancels_upstream_call():
+    service = make_slow_service(delay=0.5)
+    waiters = [asyncio.create_task(service.generate_content("same prompt")) for _ in range(2)]
+    await asyncio.sleep(0.01)
+    for waiter in waiters:
+        waiter.cancel()
+    await asyncio.gather(*waiters, return_exceptions=True)
+    assert metrics.get("llm.singleflight.cancelled") == 1
+    assert service._inflight == {}
+
+    # A fresh caller starts a new upstream call rather than joining the cancelled one
+    service.completions.delay = 0
+    assert await service.generate_content("same prompt") == "completion for same prompt"
+    assert service.completions.calls == 2
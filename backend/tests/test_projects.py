@@ -1,5 +1,11 @@
-import pytest
+import asyncio
+import time
+import httpx
 from fastapi import status
+from sqlalchemy import text
+from app.core.database import get_async_db
+from app.main import app
+from tests.conftest import TestingAsyncSessionLocal
 
 def test_create_project(client, auth_token):
     """Test creating a project."""
@@ -34,6 +40,85 @@ def test_list_projects(client, auth_token):
     assert isinstance(data, list)
     assert len(data) > 0
 
+def test_list_projects_returns_summaries(client, auth_token, capture_sql):
+    """Listing carries counts and titles but no section bodies, in one query."""
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    for title in ("Older", "Newer"):
+        project_id = client.post("/api/v1/projects", json={
+            "title": title,
+            "doc_type": "docx",
+            "topic": "Test topic"
+        }, headers=headers).json()["id"]
+    for i in range(3):
+        section = client.post(
+            f"/api/v1/projects/{project_id}/sections",
+            json={"title": f"Part {i}", "order_index": i},
+            headers=headers
+        ).json()
+    client.put(
+        f"/api/v1/projects/{project_id}/sections/{section['id']}",
+        json={"content": "A very long body " * 500},
+        headers=headers
+    )
+    
+    with capture_sql() as statements:
+        response = client.get("/api/v1/projects", headers=headers)
+    
+    assert response.status_code == status.HTTP_200_OK
+    # Principal lookup (when not cached) plus a single listing query
+    assert len([s for s in statements if "FROM users" not in s]) == 1
+    newer, older = response.json()
+    assert newer["title"] == "Newer"
+    assert newer["section_count"] == 3
+    assert newer["section_titles"] == ["Part 0", "Part 1", "Part 2"]
+    assert newer["last_updated_at"] >= newer["updated_at"]
+    assert "sections" not in newer
+    assert older["section_count"] == 0
+    assert older["section_titles"] == []
+    assert len(response.content) < 2000
+
+def test_list_projects_keyset_pagination(client, auth_token):
+    """Pages follow the X-Next-Cursor header without gaps or repeats."""
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    created = []
+    for i in range(7):
+        created.append(client.post("/api/v1/projects", json={
+            "title": f"Report {i}" if i % 2 else f"Deck {i}",
+            "doc_type": "docx" if i % 2 else "pptx",
+            "topic": "Test topic"
+        }, headers=headers).json()["id"])
+    
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 3}
+        if cursor:
+            params["cursor"] = cursor
+        response = client.get("/api/v1/projects", params=params, headers=headers)
+        assert response.status_code == status.HTTP_200_OK
+        page = response.json()
+        assert len(page) <= 3
+        seen.extend(p["id"] for p in page)
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    # Newest first, every project exactly once
+    assert seen == list(reversed(created))
+    
+    response = client.get("/api/v1/projects", params={"doc_type": "docx", "title_prefix": "report"}, headers=headers)
+    assert [p["title"] for p in response.json()] == ["Report 5", "Report 3", "Report 1"]
+    assert "X-Next-Cursor" not in response.headers
+    
+    response = client.get("/api/v1/projects", params={"title_prefix": "%"}, headers=headers)
+    assert response.json() == []
+
+def test_list_projects_rejects_bad_cursor_and_caps_page_size(client, auth_token):
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    response = client.get("/api/v1/projects", params={"cursor": "not-a-cursor"}, headers=headers)
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    
+    response = client.get("/api/v1/projects", params={"limit": 10000}, headers=headers)
+    assert response.status_code == status.HTTP_200_OK
+
 def test_get_project(client, auth_token):
     """Test getting a project."""
     headers = {"Authorization": f"Bearer {auth_token}"}
@@ -91,3 +176,49 @@ def test_delete_project(client, auth_token):
     get_response = client.get(f"/api/v1/projects/{project_id}", headers=headers)
     assert get_response.status_code == status.HTTP_404_NOT_FOUND
 
+
+def test_delete_project_with_sections(client, auth_token):
+    """Deleting a project removes its sections as well."""
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    project_data = {
+        "title": "Test Project",
+        "doc_type": "pptx",
+        "topic": "Test topic"
+    }
+    project_id = client.post("/api/v1/projects", json=project_data, headers=headers).json()["id"]
+    for i in range(3):
+        client.post(
+            f"/api/v1/projects/{project_id}/sections",
+            json={"title": f"Slide {i}", "order_index": i},
+            headers=headers
+        )
+    assert len(client.get(f"/api/v1/projects/{project_id}", headers=headers).json()["sections"]) == 3
+    
+    response = client.delete(f"/api/v1/projects/{project_id}", headers=headers)
+    assert response.status_code == status.HTTP_204_NO_CONTENT
+    assert client.get("/api/v1/projects", headers=headers).json() == []
+
+async def test_slow_query_does_not_block_event_loop(client, auth_token):
+    """A request waiting on Postgres leaves the worker free for others."""
+    async def slow_db():
+        async with TestingAsyncSessionLocal() as db:
+            await db.execute(text("SELECT pg_sleep(1)"))
+            yield db
+    
+    app.dependency_overrides[get_async_db] = slow_db
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+        async def timed(coro):
+            started = time.perf_counter()
+            response = await coro
+            return response, time.perf_counter() - started
+        
+        (slow, slow_elapsed), (fast, fast_elapsed) = await asyncio.gather(
+            timed(http.get("/api/v1/projects", headers=headers)),
+            timed(http.get("/health"))
+        )
+    assert slow.status_code == status.HTTP_200_OK
+    assert fast.status_code == status.HTTP_200_OK
+    assert slow_elapsed >= 1.0
+    assert fast_elapsed < 0.5
@@ -0,0 +1,48 @@
+from types import SimpleNamespace
+from app.services.llm_service import LLMService
+from app.services.prompt_budget import allocate, count_tokens, stale_summary
+
+LONG_TEXT = " ".join(f"Sentence number {i} explains another detail of the topic." for i in range(200))
+
+def test_allocate_redistributes_unused_budget():
+    # The short item keeps all it needs; the rest is split by weight
+    assert allocate([10, 500, 500], [1, 1, 1], 310) == [10, 150, 150]
+    assert allocate([10, 20], [3, 1], 1000) == [10, 20]
+    assert allocate([], [], 100) == []
+
+def test_generation_prompt_respects_token_budget():
+    service = LLMService()
+    prompt = service.build_generation_prompt(
+        project_topic=LONG_TEXT,
+        section_title="Market overview",
+        section_type="slide",
+        previous_content=LONG_TEXT,
+        neighboring_sections=[{"title": f"Slide {i}", "content": LONG_TEXT} for i in range(3)],
+        token_budget=400
+    )
+    assert count_tokens(prompt) <= 400
+    assert "Section/Slide Title: Market overview" in prompt
+    assert "- Slide 2: Sentence number 0" in prompt
+
+def test_short_context_is_not_truncated():
+    service = LLMService()
+    prompt = service.build_generation_prompt(
+        project_topic="Tidal energy",
+        section_title="Costs",
+        section_type="section",
+        previous_content="Turbines are expensive to maintain.",
+        neighboring_sections=[{"title": "Intro", "summary": "Tides are predictable."}],
+        token_budget=400
+    )
+    assert "- Intro: Tides are predictable." in prompt
+    assert "Turbines are expensive to maintain." in prompt
+    assert "..." not in prompt
+
+def test_section_summary_is_stale_only_when_content_changes():
+    section = SimpleNamespace(content="First fact. Second fact.", summary=None, summary_hash=None)
+    section.summary, section.summary_hash = stale_summary(section)
+    assert section.summary == "First fact. Second fact."
+    assert stale_summary(section) is None
+
+    section.content = "Rewritten fact."
+    assert stale_summary(section)[0] == "Rewritten fact."
@@ -0,0 +1,181 @@
+"""Query-plan harness: every SELECT an endpoint issues must be index-backed.
+
+Each case seeds a few thousand rows, calls one endpoint while capturing the
+statements it sends, then EXPLAINs them with sequential scans disabled. A
+plan that still contains a Seq Scan has no usable index.
+"""
+import json
+import uuid
+from datetime import datetime, timedelta
+import pytest
+from fastapi import status
+from sqlalchemy import insert, text
+from app.models.comment import Comment
+from app.models.feedback import Feedback
+from app.models.project import DocumentType, Project
+from app.models.revision import Revision
+from app.models.section import Section, SectionType
+from app.models.user import User
+from tests.conftest import async_engine
+
+OTHER_USERS = 20
+PROJECTS_PER_USER = 20
+SECTIONS_PER_PROJECT = 8
+
+def seed(db, owner: User) -> dict:
+    """Bulk-insert users, projects, sections and their history."""
+    base = datetime(2026, 1, 1)
+    users = [{"id": uuid.uuid4(), "email": f"user{i}@example.com", "password_hash": "x"} for i in range(OTHER_USERS)]
+    db.execute(insert(User), users)
+
+    projects, sections, revisions, comments, feedbacks = [], [], [], [], []
+    for user_id in [owner.id] + [u["id"] for u in users]:
+        for p in range(PROJECTS_PER_USER):
+            project_id = uuid.uuid4()
+            projects.append({
+                "id": project_id, "user_id": user_id, "title": f"Deck {p}",
+                "doc_type": DocumentType.PPTX, "topic": "Seeded topic",
+                "created_at": base, "updated_at": base + timedelta(minutes=p),
+            })
+            for s in range(SECTIONS_PER_PROJECT):
+                section_id = uuid.uuid4()
+                sections.append({
+                    "id": section_id, "project_id": project_id, "type": SectionType.SLIDE,
+                    "order_index": s, "title": f"Slide {s}", "content": "Seeded content.",
+                })
+                history = {"section_id": section_id, "project_id": project_id, "user_id": user_id}
+                revisions.extend(
+                    dict(history, id=uuid.uuid4(), prompt="p", version=r + 1, snapshot="c", created_at=base + timedelta(seconds=r))
+                    for r in range(2)
+                )
+                comments.append(dict(history, id=uuid.uuid4(), comment_text="Nice", created_at=base))
+                feedbacks.append(dict(history, id=uuid.uuid4(), liked=True, created_at=base))
+
+    for model, rows in ((Project, projects), (Section, sections), (Revision, revisions),
+                        (Comment, comments), (Feedback, feedbacks)):
+        db.execute(insert(model), rows)
+    db.commit()
+    db.execute(text("ANALYZE"))
+    project = next(p for p in projects if p["user_id"] == owner.id)
+    section = next(s for s in sections if s["project_id"] == project["id"])
+    return {"project_id": str(project["id"]), "section_id": str(section["id"])}
+
+async def explain(statement: str, parameters) -> dict:
+    async with async_engine.connect() as conn:
+        await conn.exec_driver_sql("SET enable_seqscan = off")
+        result = await conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters)
+        plan = result.scalar()
+    return (json.loads(plan) if isinstance(plan, str) else plan)[0]["Plan"]
+
+def seq_scans(plan: dict) -> list:
+    """Relations read by a sequential scan anywhere in ``plan``."""
+    found = [plan["Relation Name"]] if plan["Node Type"] == "Seq Scan" else []
+    for child in plan.get("Plans", []):
+        found.extend(seq_scans(child))
+    return found
+
+def list_projects(client, headers, ids):
+    return client.get("/api/v1/projects", headers=headers)
+
+def list_projects_page(client, headers, ids):
+    first = client.get("/api/v1/projects", params={"limit": 5}, headers=headers)
+    return client.get(
+        "/api/v1/projects",
+        params={"limit": 5, "cursor": first.headers["X-Next-Cursor"], "doc_type": "pptx", "title_prefix": "deck"},
+        headers=headers
+    )
+
+def get_project(client, headers, ids):
+    return client.get(f"/api/v1/projects/{ids['project_id']}", headers=headers)
+
+def update_section(client, headers, ids):
+    return client.put(
+        f"/api/v1/projects/{ids['project_id']}/sections/{ids['section_id']}",
+        json={"title": "Renamed"},
+        headers=headers
+    )
+
+def delete_section(client, headers, ids):
+    return client.delete(f"/api/v1/projects/{ids['project_id']}/sections/{ids['section_id']}", headers=headers)
+
+def batch_sections(client, headers, ids):
+    project = client.get(f"/api/v1/projects/{ids['project_id']}", headers=headers).json()
+    return client.post(
+        f"/api/v1/projects/{ids['project_id']}/sections/batch",
+        json={"sections": [{"title": "New"}] + [{"id": s["id"]} for s in project["sections"][1:]],
+              "delete": [project["sections"][0]["id"]]},
+        headers=headers
+    )
+
+def delete_project(client, headers, ids):
+    return client.delete(f"/api/v1/projects/{ids['project_id']}", headers=headers)
+
+def generate_section(client, headers, ids):
+    return client.post("/api/v1/generate/section", json=ids, headers=headers)
+
+def refine_section(client, headers, ids):
+    return client.post("/api/v1/refine/section", json=dict(ids, prompt="Shorter"), headers=headers)
+
+def add_comment(client, headers, ids):
+    return client.post("/api/v1/comments", json=dict(ids, comment_text="Looks good"), headers=headers)
+
+def submit_feedback(client, headers, ids):
+    return client.post("/api/v1/feedback", json=dict(ids, liked=False), headers=headers)
+
+def feedback_totals(client, headers, ids):
+    return client.get(f"/api/v1/feedback/projects/{ids['project_id']}/sections/{ids['section_id']}", headers=headers)
+
+def export_project(client, headers, ids):
+    return client.get(f"/api/v1/export/project/{ids['project_id']}?type=pptx", headers=headers)
+
+ENDPOINTS = [
+    list_projects,
+    list_projects_page,
+    get_project,
+    update_section,
+    delete_section,
+    batch_sections,
+    delete_project,
+    generate_section,
+    refine_section,
+    add_comment,
+    submit_feedback,
+    feedback_totals,
+    export_project,
+]
+
+@pytest.mark.parametrize("call", ENDPOINTS, ids=lambda call: call.__name__)
+async def test_endpoint_queries_use_indexes(call, client, auth_token, test_user_data, db_session, provider, capture_sql):
+    owner = db_session.query(User).filter(User.email == test_user_data["email"]).first()
+    ids = seed(db_session, owner)
+    headers = {"Authorization": f"Bearer {auth_token}"}
+
+    with capture_sql(lambda statement: statement.lstrip().upper().startswith("SELECT")) as statements:
+        response = call(client, headers, ids)
+    assert response.status_code < 400, response.text
+    assert statements
+
+    for statement, parameters in zip(statements, statements.parameters):
+        plan = await explain(statement, parameters)
+        assert seq_scans(plan) == [], f"Sequential scan in:\n{statement}"
+
+def plan_nodes(plan: dict):
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from plan_nodes(child)
+
+async def test_project_listing_limits_before_aggregating(client, auth_token, test_user_data, db_session, capture_sql):
+    """Only the page's projects are joined to sections and aggregated."""
+    owner = db_session.query(User).filter(User.email == test_user_data["email"]).first()
+    seed(db_session, owner)
+    headers = {"Authorization": f"Bearer {auth_token}"}
+
+    with capture_sql(lambda statement: "array_agg" in statement) as statements:
+        response = client.get("/api/v1/projects", params={"limit": 5}, headers=headers)
+    assert response.status_code == status.HTTP_200_OK
+    assert len(response.json()) == 5
+
+    [statement] = statements
+    plan = await explain(statement, statements.parameters[0])
+    aggregate = next(node for node in plan_nodes(plan) if node["Node Type"] == "Aggregate")
+    assert any(node["Node Type"] == "Limit" for node in plan_nodes(aggregate)), json.dumps(plan, indent=1)
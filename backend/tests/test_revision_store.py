@@ -0,0 +1,129 @@
+import asyncio
+import itertools
+import pytest
+from types import SimpleNamespace
+from fastapi import status
+from app.models.revision import Revision
+from app.models.user import User
+from app.services import revision_store
+from app.services.revision_store import apply_delta, encode_delta, old_content_of, pack, rebuild
+from tests.conftest import TestingAsyncSessionLocal
+
+@pytest.mark.parametrize("source, target", [
+    ("", "Fresh text."),
+    ("Solar power converts sunlight.", ""),
+    ("Solar power converts sunlight into electricity.", "Solar power turns sunlight into cheap electricity."),
+    ("  Leading and trailing  \n\n", "Leading\n\nand trailing"),
+    ("Ünïcode — stays intact.", "Ünïcode — still stays intact!"),
+])
+def test_delta_round_trip(source, target):
+    assert apply_delta(source, encode_delta(source, target)) == target
+    assert apply_delta(source, encode_delta(source, None)) is None
+
+def test_pack_snapshots_periodically_and_rebuilds_every_version():
+    words = [f"word{i}" for i in range(200)]
+    contents = []
+    for version in range(25):
+        words[version * 7 % len(words)] = f"edit{version}"
+        contents.append(" ".join(words))
+
+    rows, previous = [], None
+    for version, content in enumerate(contents, start=1):
+        rows.append(SimpleNamespace(**pack(version, previous, previous, content, interval=10)))
+        previous = content
+
+    assert [row.version for row in rows if row.snapshot is not None] == [1, 11, 21]
+    stored = sum(len(row.snapshot or row.delta) for row in rows)
+    assert stored < sum(map(len, contents)) / 5
+
+    rebuilt = rebuild(rows)
+    assert [rebuilt[v] for v in range(1, 26)] == contents
+    assert all(row.old_delta is None for row in rows)
+    assert old_content_of(rows[4], rebuilt) == contents[3]
+
+def test_pack_keeps_old_content_that_differs_from_previous_version():
+    first = SimpleNamespace(**pack(1, None, None, "Generated draft."))
+    row = SimpleNamespace(**pack(2, "Generated draft.", "Hand edited draft.", "Refined draft."))
+    contents = rebuild([first, row])
+    assert contents[2] == "Refined draft."
+    assert old_content_of(row, contents) == "Hand edited draft."
+
+def edited_reply():
+    """Replies that each rewrite one sentence of the last, like a refinement."""
+    versions = itertools.count(1)
+    def reply(prompt):
+        version = next(versions)
+        sentences = [f"Sentence {i} about solar power." for i in range(20)]
+        sentences[version % 20] = f"Rewritten sentence in version {version}."
+        return " ".join(sentences)
+    return reply
+
+@pytest.fixture
+def section_ids(client, auth_token):
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    project = client.post("/api/v1/projects", json={
+        "title": "Revisions", "doc_type": "docx", "topic": "Solar"
+    }, headers=headers).json()
+    section = client.post(f"/api/v1/projects/{project['id']}/sections", json={
+        "title": "Intro", "order_index": 0
+    }, headers=headers).json()
+    return {"project_id": project["id"], "section_id": section["id"]}
+
+@pytest.mark.parametrize("provider", [{"reply": edited_reply()}], indirect=True)
+async def test_refinements_store_deltas_and_rebuild_any_version(client, auth_token, section_ids, provider, db_session, monkeypatch):
+    monkeypatch.setattr(revision_store.settings, "REVISION_SNAPSHOT_INTERVAL", 5)
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    url = f"/api/v1/projects/{section_ids['project_id']}/sections/{section_ids['section_id']}"
+    client.put(url, json={"content": "Hand written start."}, headers=headers)
+
+    responses = []
+    for i in range(12):
+        if i == 7:
+            # A manual edit between refinements must survive as old_content
+            client.put(url, json={"content": "Manually edited text."}, headers=headers)
+        response = client.post("/api/v1/refine/section", json=dict(section_ids, prompt=f"Edit {i}"), headers=headers)
+        assert response.status_code == status.HTTP_200_OK, response.text
+        responses.append(response.json())
+
+    rows = db_session.query(Revision).filter(
+        Revision.section_id == section_ids["section_id"]
+    ).order_by(Revision.version).all()
+    assert [r.version for r in rows] == list(range(1, 13))
+    assert [r.version for r in rows if r.snapshot is not None] == [1, 6, 11]
+    assert [r.version for r in rows if r.old_delta is not None] == [1, 8]
+
+    async with TestingAsyncSessionLocal() as db:
+        for version, expected in enumerate(responses, start=1):
+            old, new = await revision_store.load_version(db, rows[0].section_id, version)
+            assert (old, new) == (expected["old_content"], expected["new_content"])
+
+        # The attributes are only available once loaded explicitly
+        revision = await db.get(Revision, rows[7].id)
+        with pytest.raises(RuntimeError, match="load_contents"):
+            revision.old_content
+        await revision_store.load_contents(db, revision)
+        assert revision.old_content == "Manually edited text."
+        assert revision.new_content == responses[7]["new_content"]
+
+async def test_concurrent_revisions_take_consecutive_versions(section_ids, db_session):
+    user = db_session.query(User).one()
+
+    async def refine(text):
+        async with TestingAsyncSessionLocal() as db:
+            await revision_store.record_revision(
+                db, section_ids["section_id"], section_ids["project_id"], user.id,
+                "Edit", None, text
+            )
+            # Hold the transaction open so the two writers overlap
+            await asyncio.sleep(0.2)
+            await db.commit()
+
+    await asyncio.gather(refine("First text."), refine("Second text."))
+
+    rows = db_session.query(Revision).filter(
+        Revision.section_id == section_ids["section_id"]
+    ).order_by(Revision.version).all()
+    assert [r.version for r in rows] == [1, 2]
+    async with TestingAsyncSessionLocal() as db:
+        contents = [await revision_store.load_version(db, rows[0].section_id, v) for v in (1, 2)]
+    assert {new for _, new in contents} == {"First text.", "Second text."}
@@ -0,0 +1,187 @@
+import uuid
+import pytest
+from fastapi import status
+
+@pytest.fixture
+def selects(capture_sql):
+    """SELECTs issued by request handlers, excluding the principal lookup."""
+    return capture_sql(
+        lambda statement: statement.lstrip().upper().startswith("SELECT") and "FROM users" not in statement
+    )
+
+def section_ids(deck, index=0):
+    return {"project_id": deck.project["id"], "section_id": deck.sections[index]["id"]}
+
+def test_section_endpoints_load_in_one_statement(client, deck, provider, selects):
+    headers = deck.headers
+    ids = section_ids(deck)
+    url = f"/api/v1/projects/{ids['project_id']}/sections/{ids['section_id']}"
+    calls = [
+        lambda: client.put(url, json={"title": "Renamed"}, headers=headers),
+        lambda: client.post("/api/v1/comments", json=dict(ids, comment_text="Nice"), headers=headers),
+        lambda: client.post("/api/v1/feedback", json=dict(ids, liked=True), headers=headers),
+        lambda: client.post("/api/v1/generate/section", json=ids, headers=headers),
+        lambda: client.post("/api/v1/refine/section", json=dict(ids, prompt="Shorter"), headers=headers),
+    ]
+    for call in calls:
+        selects.clear()
+        response = call()
+        assert response.status_code < 400, response.text
+        # Authorization and loading share the first statement; later SELECTs
+        # are refreshes after the endpoint's own writes
+        assert "JOIN sections" in selects[0]
+        assert not any("FROM projects" in s for s in selects[1:])
+
+def test_generation_prompt_sees_neighbors(client, deck, provider):
+    response = client.post("/api/v1/generate/section", json=section_ids(deck, 2), headers=deck.headers)
+    assert response.status_code == status.HTTP_200_OK
+    prompt = provider.prompts[-1]
+    for title in ("Slide 0", "Slide 1", "Slide 3"):
+        assert title in prompt
+    assert "Slide 4" not in prompt
+
+def test_other_users_section_is_not_found(client, deck):
+    other = client.post("/api/v1/auth/register", json={
+        "email": "intruder@example.com",
+        "password": "intruderpassword123"
+    }).json()
+    headers = {"Authorization": f"Bearer {other['access_token']}"}
+    ids = section_ids(deck)
+    response = client.put(
+        f"/api/v1/projects/{ids['project_id']}/sections/{ids['section_id']}",
+        json={"title": "Stolen"},
+        headers=headers
+    )
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+    assert response.json()["detail"] == "Project not found"
+
+def test_missing_section_is_not_found(client, deck):
+    ids = dict(section_ids(deck), section_id=str(uuid.uuid4()))
+    response = client.post("/api/v1/comments", json=dict(ids, comment_text="Hello?"), headers=deck.headers)
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+    assert response.json()["detail"] == "Section not found"
+
+    response = client.delete(
+        f"/api/v1/projects/{ids['project_id']}/sections/{deck.sections[1]['id']}",
+        headers=deck.headers
+    )
+    assert response.status_code == status.HTTP_204_NO_CONTENT
+
+@pytest.fixture
+def statements(capture_sql):
+    """Every statement request handlers send, excluding the principal lookup."""
+    return capture_sql(lambda statement: "FROM users" not in statement)
+
+def batch_url(deck):
+    return f"/api/v1/projects/{deck.project['id']}/sections/batch"
+
+def test_batch_reorders_in_a_handful_of_statements(client, deck, statements):
+    reversed_ids = [s["id"] for s in reversed(deck.sections)]
+    response = client.post(batch_url(deck), json={
+        "sections": [{"id": sid} for sid in reversed_ids]
+    }, headers=deck.headers)
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert [s["id"] for s in data] == reversed_ids
+    assert [s["order_index"] for s in data] == list(range(len(reversed_ids)))
+    # Load, one executemany UPDATE, the project bump, reload (plus transaction bookkeeping)
+    assert len([s for s in statements if s.lstrip().upper().startswith(("SELECT", "UPDATE"))]) == 4
+
+def test_batch_applies_creates_updates_and_deletes(client, deck, provider):
+    sections = deck.sections
+    headers = deck.headers
+    doomed = sections[1]["id"]
+    # Give the doomed section some history that must go with it
+    ids = {"project_id": deck.project["id"], "section_id": doomed}
+    client.post("/api/v1/generate/section", json=ids, headers=headers)
+    client.post("/api/v1/comments", json=dict(ids, comment_text="Cut this"), headers=headers)
+    client.post("/api/v1/feedback", json=dict(ids, liked=False), headers=headers)
+
+    response = client.post(batch_url(deck), json={
+        "sections": [
+            {"title": "Intro"},
+            {"id": sections[0]["id"], "title": "Renamed", "content": "Edited"},
+            {"id": sections[2]["id"]},
+            {"id": sections[4]["id"]},
+            {"id": sections[3]["id"]},
+        ] + [{"id": s["id"]} for s in sections[5:]],
+        "delete": [doomed],
+    }, headers=headers)
+    assert response.status_code == status.HTTP_200_OK, response.text
+    data = response.json()
+    assert [s["title"] for s in data] == [
+        "Intro", "Renamed", "Slide 2", "Slide 4", "Slide 3", "Slide 5", "Slide 6", "Slide 7"
+    ]
+    assert data[0]["type"] == "slide"
+    assert data[1]["content"] == "Edited"
+    assert data[1]["updated_at"] > sections[0]["updated_at"]
+
+    project = client.get(f"/api/v1/projects/{deck.project['id']}", headers=headers).json()
+    assert doomed not in [s["id"] for s in project["sections"]]
+    assert project["updated_at"] > deck.project["updated_at"]
+
+def section_url(deck, index=0):
+    return f"/api/v1/projects/{deck.project['id']}/sections/{deck.sections[index]['id']}"
+
+SECTION_WRITES = {
+    "create": lambda client, deck: client.post(
+        f"/api/v1/projects/{deck.project['id']}/sections",
+        json={"title": "Appendix", "order_index": 8}, headers=deck.headers
+    ),
+    "update": lambda client, deck: client.put(section_url(deck), json={"title": "Renamed"}, headers=deck.headers),
+    "delete": lambda client, deck: client.delete(section_url(deck), headers=deck.headers),
+    "batch": lambda client, deck: client.post(batch_url(deck), json={
+        "sections": [{"id": s["id"]} for s in reversed(deck.sections)]
+    }, headers=deck.headers),
+    "generate": lambda client, deck: client.post(
+        "/api/v1/generate/section", json=section_ids(deck), headers=deck.headers
+    ),
+    "generate_project": lambda client, deck: client.post(
+        f"/api/v1/generate/project/{deck.project['id']}", json={}, headers=deck.headers
+    ),
+    "refine": lambda client, deck: client.post(
+        "/api/v1/refine/section", json=dict(section_ids(deck), prompt="Shorter"), headers=deck.headers
+    ),
+}
+
+@pytest.mark.parametrize("write", SECTION_WRITES.values(), ids=SECTION_WRITES.keys())
+def test_section_write_moves_project_to_top_of_listing(client, deck, provider, write):
+    headers = deck.headers
+    client.put(section_url(deck), json={"content": "Written before the newer project."}, headers=headers)
+    newer = client.post("/api/v1/projects", json={
+        "title": "Newer",
+        "doc_type": "docx",
+        "topic": "Untouched"
+    }, headers=headers).json()
+    listing = client.get("/api/v1/projects", params={"limit": 1}, headers=headers).json()
+    assert listing[0]["id"] == newer["id"]
+
+    response = write(client, deck)
+    assert response.status_code < 400, response.text
+
+    listing = client.get("/api/v1/projects", params={"limit": 1}, headers=headers).json()
+    assert listing[0]["id"] == deck.project["id"]
+
+def test_batch_rejects_stale_or_foreign_lists(client, deck):
+    sections = deck.sections
+    headers = deck.headers
+
+    response = client.post(batch_url(deck), json={
+        "sections": [{"id": s["id"]} for s in sections[:-1]]
+    }, headers=headers)
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    response = client.post(batch_url(deck), json={
+        "sections": [{"id": s["id"]} for s in sections] + [{"id": str(uuid.uuid4())}]
+    }, headers=headers)
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    response = client.post(batch_url(deck), json={
+        "sections": [{"id": s["id"]} for s in sections],
+        "delete": [sections[0]["id"]]
+    }, headers=headers)
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    # Nothing was applied
+    project = client.get(f"/api/v1/projects/{deck.project['id']}", headers=headers).json()
+    assert [s["title"] for s in project["sections"]] == [s["title"] for s in sections]
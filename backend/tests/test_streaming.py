@@ -0,0 +1,161 @@
+import json
+from uuid import UUID
+import pytest
+from fastapi import status
+from sqlalchemy import select
+from app.api.v1.streaming import stream_completion
+from app.models.revision import Revision
+from app.models.section import Section
+from app.services.llm_service import LLMService
+from app.services.revision_store import load_contents
+from tests.conftest import FakeProvider, TestingAsyncSessionLocal
+
+@pytest.fixture
+def provider(provider):
+    provider.reply = "Solar power converts sunlight into electricity."
+    return provider
+
+@pytest.fixture
+def section_ids(client, auth_token):
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    project = client.post("/api/v1/projects", json={
+        "title": "Energy",
+        "doc_type": "docx",
+        "topic": "Renewable energy"
+    }, headers=headers).json()
+    section = client.post(f"/api/v1/projects/{project['id']}/sections", json={
+        "title": "Solar",
+        "order_index": 0
+    }, headers=headers).json()
+    return {"project_id": project["id"], "section_id": section["id"]}
+
+def parse_events(body: str):
+    events = []
+    for frame in body.strip().split("\n\n"):
+        lines = frame.split("\n")
+        events.append((lines[0][len("event: "):], json.loads(lines[1][len("data: "):])))
+    return events
+
+def test_stream_generation_persists_content(client, auth_token, section_ids, provider, db_session):
+    """Tokens arrive as SSE and the final text is committed with a revision."""
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    response = client.post("/api/v1/generate/section/stream", json=section_ids, headers=headers)
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"].startswith("text/event-stream")
+
+    events = parse_events(response.text)
+    tokens = [data["text"] for event, data in events if event == "token"]
+    assert len(tokens) == 6
+    assert events[-1][0] == "done"
+    assert events[-1][1]["content"] == provider.reply
+
+    section = db_session.query(Section).filter(Section.id == section_ids["section_id"]).first()
+    db_session.refresh(section)
+    assert section.content == provider.reply
+    assert section.llm_raw == provider.reply
+    assert db_session.query(Revision).filter(Revision.section_id == section.id).count() == 1
+
+async def test_stream_refinement_records_revision(client, auth_token, section_ids, provider):
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    client.post("/api/v1/generate/section", json=section_ids, headers=headers)
+    provider.reply = "Shorter solar text."
+
+    response = client.post("/api/v1/refine/section/stream", json={
+        **section_ids,
+        "prompt": "Make it shorter"
+    }, headers=headers)
+    events = parse_events(response.text)
+    done = events[-1][1]
+    assert events[-1][0] == "done"
+    assert done["old_content"] == "Solar power converts sunlight into electricity."
+    assert done["new_content"] == "Shorter solar text."
+
+    async with TestingAsyncSessionLocal() as db:
+        revision = await db.get(Revision, UUID(done["revision_id"]))
+        await load_contents(db, revision)
+    assert revision.prompt == "Make it shorter"
+    assert revision.new_content == "Shorter solar text."
+
+def test_stream_unknown_section_returns_404(client, auth_token, section_ids, provider):
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    response = client.post("/api/v1/generate/section/stream", json={
+        "project_id": section_ids["project_id"],
+        "section_id": section_ids["project_id"]
+    }, headers=headers)
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+async def stored_rows(section_id: str):
+    """A section's content, raw output and revisions as the database has them."""
+    async with TestingAsyncSessionLocal() as db:
+        section = await db.get(Section, UUID(section_id))
+        revisions = (await db.execute(
+            select(Revision).where(Revision.section_id == section.id).order_by(Revision.version)
+        )).scalars().all()
+        for revision in revisions:
+            await load_contents(db, revision)
+    return section.content, section.llm_raw, [
+        (r.version, r.prompt, r.old_content, r.new_content) for r in revisions
+    ]
+
+@pytest.mark.parametrize("path, body", [
+    ("generate/section", {}),
+    ("refine/section", {"prompt": "Make it shorter"}),
+], ids=["generate", "refine"])
+async def test_stream_and_json_store_the_same_rows(client, auth_token, provider, path, body):
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    project = client.post("/api/v1/projects", json={
+        "title": "Energy", "doc_type": "docx", "topic": "Renewable energy"
+    }, headers=headers).json()
+    section_ids = []
+    for i in range(2):
+        section = client.post(f"/api/v1/projects/{project['id']}/sections", json={
+            "title": "Solar", "order_index": i
+        }, headers=headers).json()
+        client.put(f"/api/v1/projects/{project['id']}/sections/{section['id']}", json={
+            "content": "Hand written draft."
+        }, headers=headers)
+        section_ids.append(section["id"])
+
+    for section_id, suffix in zip(section_ids, ("", "/stream")):
+        response = client.post(f"/api/v1/{path}{suffix}", json=dict(
+            body, project_id=project["id"], section_id=section_id
+        ), headers=headers)
+        assert response.status_code == status.HTTP_200_OK, response.text
+
+    json_rows, stream_rows = [await stored_rows(section_id) for section_id in section_ids]
+    assert json_rows == stream_rows
+    assert json_rows[1] == provider.reply
+    assert len(json_rows[2]) == 1
+
+class DisconnectingRequest:
+    """Request stub that reports a disconnect after ``after`` checks."""
+
+    def __init__(self, after: int):
+        self.after = after
+
+    async def is_disconnected(self):
+        self.after -= 1
+        return self.after < 0
+
+async def test_client_disconnect_cancels_upstream():
+    provider = FakeProvider("one two three four five six", delay=0.01)
+    service = LLMService()
+    service._provider = provider
+    service.cache = None
+    saved = []
+
+    async def save(text):
+        saved.append(text)
+        return {}
+
+    response = stream_completion(
+        DisconnectingRequest(after=2),
+        service.stream_content("prompt"),
+        save,
+        "Failed"
+    )
+    frames = [frame async for frame in response.body_iterator]
+
+    assert len(frames) == 2
+    assert provider.closed
+    assert saved == []
@@ -127,10 +127,12 @@ const CreateProject: React.FC = () => {
         topic: topic.trim(),
       });
 
-      // Create sections/slides
-      for (const section of sections) {
-        await projectService.createSection(project.id, section);
-      }
+      // Create all sections/slides in one request
+      await projectService.batchSections(project.id, {
+        sections: [...sections]
+          .sort((a, b) => a.order_index - b.order_index)
+          .map(({ title }) => ({ title })),
+      });
 
       navigate(`/projects/${project.id}`);
     } catch (err: any) {
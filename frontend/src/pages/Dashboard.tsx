@@ -1,7 +1,7 @@
 import React, { useEffect, useState } from "react";
 import { Link, useNavigate } from "react-router-dom";
 import { useAuth } from "../contexts/AuthContext";
-import { projectService, Project } from "../services/projects";
+import { projectService, ProjectSummary } from "../services/projects";
 
 const formatError = (err: any, fallback: string): string => {
   if (typeof err?.response?.data?.detail === "string") {
@@ -18,8 +18,10 @@ const formatError = (err: any, fallback: string): string => {
 const Dashboard: React.FC = () => {
   const { user, logout } = useAuth();
   const navigate = useNavigate();
-  const [projects, setProjects] = useState<Project[]>([]);
+  const [projects, setProjects] = useState<ProjectSummary[]>([]);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [error, setError] = useState("");
 
   useEffect(() => {
@@ -28,8 +30,9 @@ const Dashboard: React.FC = () => {
 
   const loadProjects = async () => {
     try {
-      const data = await projectService.listProjects();
-      setProjects(data);
+      const page = await projectService.listProjects();
+      setProjects(page.items);
+      setNextCursor(page.nextCursor);
     } catch (err: any) {
       setError(formatError(err, "Failed to load projects"));
     } finally {
@@ -37,6 +40,20 @@ const Dashboard: React.FC = () => {
     }
   };
 
+  const loadMore = async () => {
+    if (!nextCursor) return;
+    setLoadingMore(true);
+    try {
+      const page = await projectService.listProjects({ cursor: nextCursor });
+      setProjects((current) => [...current, ...page.items]);
+      setNextCursor(page.nextCursor);
+    } catch (err: any) {
+      setError(formatError(err, "Failed to load projects"));
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const handleDelete = async (id: string, e: React.MouseEvent) => {
     e.stopPropagation();
     if (window.confirm("Are you sure you want to delete this project?")) {
@@ -150,7 +167,7 @@ const Dashboard: React.FC = () => {
                       {project.doc_type.toUpperCase()}
                     </span>
                     <span className="text-xs text-silver">
-                      {project.sections.length}{" "}
+                      {project.section_count}{" "}
                       {project.doc_type === "docx" ? "sections" : "slides"}
                     </span>
                   </div>
@@ -158,6 +175,18 @@ const Dashboard: React.FC = () => {
               ))}
             </div>
           )}
+
+          {!loading && nextCursor && (
+            <div className="text-center mt-10">
+              <button
+                onClick={loadMore}
+                disabled={loadingMore}
+                className="text-silver hover:text-white px-6 py-2 rounded-lg text-sm font-medium transition-colors border border-white/10 hover:border-white/20"
+              >
+                {loadingMore ? "Loading..." : "Load more"}
+              </button>
+            </div>
+          )}
         </div>
       </main>
     </div>
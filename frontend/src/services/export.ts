@@ -1,31 +1,68 @@
+import { AxiosResponse } from 'axios';
 import api from './api';
 
+export type ExportJobStatus = 'queued' | 'running' | 'done' | 'failed';
+
+export interface ExportJob {
+  id: string;
+  project_id: string;
+  doc_type: 'docx' | 'pptx';
+  status: ExportJobStatus;
+  sections_done: number;
+  sections_total: number;
+  size?: number;
+  error?: string;
+  created_at: string;
+  finished_at?: string;
+  expires_at?: string;
+}
+
+function saveDownload(response: AxiosResponse<Blob>, fallbackName: string): void {
+  // Create download link
+  const url = window.URL.createObjectURL(new Blob([response.data]));
+  const link = document.createElement('a');
+  link.href = url;
+  
+  // Extract filename from Content-Disposition header or use default
+  const contentDisposition = response.headers['content-disposition'];
+  let filename = fallbackName;
+  if (contentDisposition) {
+    const filenameMatch = contentDisposition.match(/filename="?(.+)"?/);
+    if (filenameMatch) {
+      filename = filenameMatch[1];
+    }
+  }
+  
+  link.setAttribute('download', filename);
+  document.body.appendChild(link);
+  link.click();
+  link.remove();
+  window.URL.revokeObjectURL(url);
+}
+
 export const exportService = {
   async exportProject(projectId: string, type: 'docx' | 'pptx'): Promise<void> {
     const response = await api.get(`/export/project/${projectId}?type=${type}`, {
       responseType: 'blob',
     });
-    
-    // Create download link
-    const url = window.URL.createObjectURL(new Blob([response.data]));
-    const link = document.createElement('a');
-    link.href = url;
-    
-    // Extract filename from Content-Disposition header or use default
-    const contentDisposition = response.headers['content-disposition'];
-    let filename = `export.${type}`;
-    if (contentDisposition) {
-      const filenameMatch = contentDisposition.match(/filename="?(.+)"?/);
-      if (filenameMatch) {
-        filename = filenameMatch[1];
-      }
-    }
-    
-    link.setAttribute('download', filename);
-    document.body.appendChild(link);
-    link.click();
-    link.remove();
-    window.URL.revokeObjectURL(url);
+    saveDownload(response, `export.${type}`);
+  },
+
+  async createExportJob(projectId: string, type: 'docx' | 'pptx'): Promise<ExportJob> {
+    const response = await api.post(`/export/project/${projectId}/jobs?type=${type}`);
+    return response.data;
+  },
+
+  async getExportJob(jobId: string): Promise<ExportJob> {
+    const response = await api.get(`/export/jobs/${jobId}`);
+    return response.data;
+  },
+
+  async downloadExportJob(job: ExportJob): Promise<void> {
+    const response = await api.get(`/export/jobs/${job.id}/download`, {
+      responseType: 'blob',
+    });
+    saveDownload(response, `export.${job.doc_type}`);
   },
 };
 
@@ -13,6 +13,13 @@ export interface Feedback {
   user_id: string;
   liked: boolean;
   created_at: string;
+  updated_at?: string;
+}
+
+export interface FeedbackTotals {
+  section_id: string;
+  likes: number;
+  dislikes: number;
 }
 
 export interface CommentCreate {
@@ -36,6 +43,11 @@ export const feedbackService = {
     return response.data;
   },
 
+  async getFeedbackTotals(projectId: string, sectionId: string): Promise<FeedbackTotals> {
+    const response = await api.get<FeedbackTotals>(`/feedback/projects/${projectId}/sections/${sectionId}`);
+    return response.data;
+  },
+
   async addComment(data: CommentCreate): Promise<Comment> {
     const response = await api.post<Comment>('/comments', data);
     return response.data;
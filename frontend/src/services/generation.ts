@@ -26,12 +26,40 @@ export interface RefineResponse {
   message: string;
 }
 
+export interface GenerateProjectRequest {
+  section_ids?: string[];
+  batch?: boolean;
+}
+
+export interface SectionGenerationResult {
+  section_id: string;
+  success: boolean;
+  content?: string;
+  error?: string;
+}
+
+export interface GenerateProjectResponse {
+  project_id: string;
+  results: SectionGenerationResult[];
+  succeeded: number;
+  failed: number;
+  message: string;
+}
+
 export const generationService = {
   async generateSection(data: GenerateRequest): Promise<GenerateResponse> {
     const response = await api.post<GenerateResponse>('/generate/section', data);
     return response.data;
   },
 
+  async generateProject(
+    projectId: string,
+    data: GenerateProjectRequest = {}
+  ): Promise<GenerateProjectResponse> {
+    const response = await api.post<GenerateProjectResponse>(`/generate/project/${projectId}`, data);
+    return response.data;
+  },
+
   async refineSection(data: RefineRequest): Promise<RefineResponse> {
     const response = await api.post<RefineResponse>('/refine/section', data);
     return response.data;
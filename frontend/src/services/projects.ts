@@ -24,6 +24,31 @@ export interface Project {
   sections: Section[];
 }
 
+export interface ProjectSummary {
+  id: string;
+  user_id: string;
+  title: string;
+  doc_type: DocumentType;
+  topic: string;
+  created_at: string;
+  updated_at: string;
+  section_count: number;
+  last_updated_at: string;
+  section_titles: string[];
+}
+
+export interface ProjectListParams {
+  cursor?: string;
+  limit?: number;
+  doc_type?: DocumentType;
+  title_prefix?: string;
+}
+
+export interface ProjectPage {
+  items: ProjectSummary[];
+  nextCursor: string | null;
+}
+
 export interface ProjectCreate {
   title: string;
   doc_type: DocumentType;
@@ -35,10 +60,24 @@ export interface SectionCreate {
   order_index: number;
 }
 
+export interface SectionBatchItem {
+  id?: string;
+  title?: string;
+  content?: string;
+}
+
+export interface SectionBatch {
+  sections: SectionBatchItem[];
+  delete?: string[];
+}
+
 export const projectService = {
-  async listProjects(): Promise<Project[]> {
-    const response = await api.get<Project[]>('/projects');
-    return response.data;
+  async listProjects(params: ProjectListParams = {}): Promise<ProjectPage> {
+    const response = await api.get<ProjectSummary[]>('/projects', { params });
+    return {
+      items: response.data,
+      nextCursor: response.headers['x-next-cursor'] ?? null,
+    };
   },
 
   async getProject(id: string): Promise<Project> {
@@ -65,6 +104,11 @@ export const projectService = {
     return response.data;
   },
 
+  async batchSections(projectId: string, data: SectionBatch): Promise<Section[]> {
+    const response = await api.post<Section[]>(`/projects/${projectId}/sections/batch`, data);
+    return response.data;
+  },
+
   async updateSection(projectId: string, sectionId: string, data: Partial<SectionCreate & { content?: string }>): Promise<Section> {
     const response = await api.put<Section>(`/projects/${projectId}/sections/${sectionId}`, data);
     return response.data;